@@ -6,6 +6,7 @@ from .health import router as health_router
 from .journal import router as journal_router
 from .logs import router as logs_router
 from .manager import router as manager_router
+from .model import router as model_router
 from .optimal import router as optimal_router
 from .recomendation import router as recommendation_router
 from .reports import router as report_router
@@ -27,3 +28,4 @@ api_router.include_router(report_router)
 api_router.include_router(journal_router)
 api_router.include_router(logs_router)
 api_router.include_router(health_router)
+api_router.include_router(model_router)
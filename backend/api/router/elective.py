@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from backend.logic.services.elective_service.orm import ORMElectiveService
 
@@ -10,6 +10,16 @@ async def get_all_elective(elective_service: ORMElectiveService = Depends()):
     return await elective_service.get_all_electives()
 
 
+@router.get("/elective/search")
+async def search_electives(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1),
+    elective_service: ORMElectiveService = Depends(),
+):
+    return await elective_service.search_electives(q, page=page, limit=limit)
+
+
 @router.get("/elective/{elective_id}")
 async def get_elective(
     elective_id: int, elective_service: ORMElectiveService = Depends()
@@ -7,6 +7,7 @@ from backend.logic.services.healthcheck.alchemy import (
     PostgresHealthcheckService,
     RedisHealthcheckService,
 )
+from backend.logic.services.healthcheck.readiness import ReadinessHealthcheckService
 
 router = APIRouter(prefix="/health", tags=["healthcheks"])
 
@@ -35,3 +36,11 @@ async def database_healthcheck() -> Dict[str, bool]:
 async def redis_healthcheck() -> Dict[str, bool]:
     response_data = await RedisHealthcheckService().check()
     return response_data
+
+
+@router.get("/ready", response_model=Dict[str, bool])
+async def readiness_healthcheck() -> JSONResponse:
+    """200, только когда воркер прогрет (модели, матрица элективов, индексы)."""
+    response_data = await ReadinessHealthcheckService().check()
+    status_code = 200 if response_data[ReadinessHealthcheckService.__name__] else 503
+    return JSONResponse(content=response_data, status_code=status_code)
@@ -0,0 +1,51 @@
+from logging import getLogger
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+
+from backend.generate_embeddings import generate_embeddings
+from backend.logic.services.inference_service.onnx import inference_service
+from backend.logic.services.inference_service.registry import model_registry
+from backend.logic.services.student_service.orm import ORMStudentService
+from backend.logic.services.zexceptions.base import ServiceException
+from backend.logic.use_cases.activate_model import ActivateModelUseCase
+
+log = getLogger(__name__)
+
+router = APIRouter(prefix="/model", tags=["model"])
+
+
+def _use_case() -> ActivateModelUseCase:
+    return ActivateModelUseCase(ORMStudentService(), inference_service, model_registry)
+
+
+@router.get("/versions")
+async def get_model_versions():
+    return {
+        "active": inference_service.version,
+        "quantized": inference_service.is_loaded and inference_service.bundle.quantized,
+        "previous": model_registry.previous_version(),
+        "versions": model_registry.versions(),
+        "quantized_versions": [v for v in model_registry.versions() if model_registry.has_quantized(v)],
+    }
+
+
+@router.post("/activate/{version}")
+async def activate_model(version: str, background_tasks: BackgroundTasks):
+    try:
+        active = await _use_case().execute(version)
+    except ServiceException as e:
+        raise HTTPException(detail=e.message, status_code=404)
+    background_tasks.add_task(generate_embeddings)
+    background_tasks.add_task(ORMStudentService().refresh_recommendations)
+    return {"active": active}
+
+
+@router.post("/rollback")
+async def rollback_model(background_tasks: BackgroundTasks):
+    try:
+        active = await _use_case().rollback()
+    except ServiceException as e:
+        raise HTTPException(detail=e.message, status_code=404)
+    background_tasks.add_task(generate_embeddings)
+    background_tasks.add_task(ORMStudentService().refresh_recommendations)
+    return {"active": active}
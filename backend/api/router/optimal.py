@@ -3,6 +3,7 @@ from logging import getLogger
 from fastapi import APIRouter
 
 from backend.logic.services.transfer_service.orm import ORMTransferService
+from backend.logic.services.transfer_service.schemas import TransferPageParams
 from backend.logic.use_cases.optimize_transfers import OptimizeTransfers
 from backend.optimization.data_for_optimization import DataGetter
 from backend.optimization.ilp_method import ILPSolver
@@ -19,8 +20,10 @@ async def optimize():
     solver = ILPSolver
     optimizer = OptimizeTransfers(solver, data_getter)
     recommended_transfer_ids = await optimizer.execute()
-    all_transfers = await transfer_service.get_all_transfers()
+    all_transfers = await transfer_service.get_all_transfers(
+        page=TransferPageParams(sort="id", order="asc"), paginate=False
+    )
     return {
-        "transfers": all_transfers,
+        "transfers": all_transfers["items"],
         "recommended_transfers": recommended_transfer_ids,
     }
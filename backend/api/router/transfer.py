@@ -1,17 +1,30 @@
+from contextlib import aclosing
 from logging import getLogger
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, Body, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from backend.config import settings
 from backend.logic.services.student_service.orm import ORMStudentService
 from backend.logic.services.transfer_service.orm import ORMTransferService
+from backend.logic.services.elective_service.orm import ORMElectiveService
+from backend.logic.services.transfer_service.export import EXPORT_FORMATS, MEDIA_TYPES
+from backend.logic.services.transfer_service.events import transfer_events
 from backend.logic.services.transfer_service.schemas import (
+    TransferBatchAction,
+    TransferBatchResult,
     TransferData,
+    TransferFilter,
+    TransferLockAll,
+    TransferPageParams,
     TransferReorder,
 )
 from backend.logic.services.zexceptions.base import ServiceException
+from backend.logic.services.zexceptions.orm import TransfersNotFound
 from backend.logic.use_cases.create_transfer import CreateTransferUseCase
+from backend.logic.use_cases.create_transfers_batch import CreateTransfersBatchUseCase
 
 log = getLogger(__name__)
 
@@ -45,6 +58,16 @@ async def create_transfer(transfer: TransferData):
         raise HTTPException(detail=e.message, status_code=400)
 
 
+@router.post("/transfer/batch", response_model=List[TransferBatchResult])
+async def create_transfers_batch(
+        # многострочный INSERT: 6 параметров на заявку при лимите asyncpg в 32767
+        transfers: List[TransferData] = Body(min_length=1, max_length=1000),
+):
+    return await CreateTransfersBatchUseCase(
+        ORMStudentService(), ORMTransferService(), ORMElectiveService()
+    ).execute(transfers)
+
+
 @router.delete("/transfer/{transfer_id}")
 async def delete_transfer(transfer_id: int):
     transfer_service = ORMTransferService()
@@ -53,15 +76,74 @@ async def delete_transfer(transfer_id: int):
 
 
 @router.get("/all_transfer")
-async def get_all_transfers():
+async def get_all_transfers(filters: TransferFilter = Depends()):
+    """Все заявки списком, как раньше; для больших выборок — /all_transfer/page."""
     try:
         transfer_service = ORMTransferService()
-        transfers = await transfer_service.get_all_transfers()
-        return transfers
+        transfers = await transfer_service.get_all_transfers(
+            filters=filters, page=TransferPageParams(sort="id", order="asc"), paginate=False
+        )
+        return transfers["items"]
+    except ServiceException as e:
+        raise HTTPException(detail=e.message, status_code=400)
+
+
+@router.get("/all_transfer/page")
+async def get_transfers_page(
+        filters: TransferFilter = Depends(),
+        page: TransferPageParams = Depends(),
+):
+    """Страница заявок: {"items": [...], "next_cursor": ...}; курсор передаётся в cursor."""
+    try:
+        transfer_service = ORMTransferService()
+        return await transfer_service.get_all_transfers(filters=filters, page=page)
     except ServiceException as e:
         raise HTTPException(detail=e.message, status_code=400)
 
 
+@router.get("/all_transfer/export")
+async def export_all_transfers(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        filters: TransferFilter = Depends(),
+):
+    partitions = ORMTransferService().stream_transfers(filters)
+    return StreamingResponse(
+        EXPORT_FORMATS[format](partitions),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transfers.{format}"'},
+    )
+
+
+@router.get("/transfer/events")
+async def transfer_events_stream(request: Request):
+    """SSE-поток изменений заявок для панелей менеджеров вместо опроса."""
+
+    # отключение клиента проверяется каждые EVENTS_DISCONNECT_CHECK секунд,
+    # а не только при очередном событии или heartbeat
+    check = settings.TRANSFERS.EVENTS_DISCONNECT_CHECK
+
+    async def stream():
+        idle = 0
+        async with aclosing(transfer_events.subscribe(timeout=check)) as events:
+            async for event in events:
+                if await request.is_disconnected():
+                    break
+                if event is not None:
+                    idle = 0
+                    yield f"data: {event}\n\n"
+                    continue
+                idle += check
+                if idle >= transfer_events.heartbeat:
+                    idle = 0
+                    yield ": ping\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 class TransferActionRequest(BaseModel):
     manager_id: int
 
@@ -70,9 +152,35 @@ class TransferActionRequest(BaseModel):
 async def approve_transfer(
         transfer_id: int,
         request: TransferActionRequest,
+        background_tasks: BackgroundTasks,
         transfer_service: ORMTransferService = Depends(),
 ):
-    return await transfer_service.approve_transfer(transfer_id, request.manager_id)
+    try:
+        result = await transfer_service.approve_transfer(transfer_id, request.manager_id)
+    except ServiceException as e:
+        raise HTTPException(detail=e.message, status_code=400)
+    background_tasks.add_task(ORMStudentService().refresh_statistics)
+    return result
+
+
+@router.post("/transfer/approve:batch", response_model=List[TransferBatchResult])
+async def approve_transfers_batch(
+        request: TransferBatchAction,
+        background_tasks: BackgroundTasks,
+        transfer_service: ORMTransferService = Depends(),
+):
+    results = await transfer_service.approve_transfers(request.transfer_ids, request.manager_id)
+    if any(r.success for r in results):
+        background_tasks.add_task(ORMStudentService().refresh_statistics)
+    return results
+
+
+@router.post("/transfer/reject:batch", response_model=List[TransferBatchResult])
+async def reject_transfers_batch(
+        request: TransferBatchAction,
+        transfer_service: ORMTransferService = Depends(),
+):
+    return await transfer_service.reject_transfers(request.transfer_ids, request.manager_id)
 
 
 @router.post("/transfer/reject/{transfer_id}")
@@ -86,9 +194,19 @@ async def reject_transfer(
 
 @router.post("/transfer/reorder")
 async def reorder_transfers(order: List[TransferReorder]):
-    transfer_service = ORMTransferService()
-    result = await transfer_service.reorder_transfers(order)
-    return result
+    try:
+        transfer_service = ORMTransferService()
+        result = await transfer_service.reorder_transfers(order)
+        return result
+    except ServiceException as e:
+        raise HTTPException(detail=e.message, status_code=400)
+
+
+@router.get("/transfer/counters")
+async def get_transfer_counters(
+        transfer_service: ORMTransferService = Depends(),
+) -> dict:
+    return await transfer_service.get_transfer_counters()
 
 
 @router.get("/transfer/active-count")
@@ -113,8 +231,19 @@ async def lock_transfers(
     try:
         updated_count = await transfer_service.lock_transfers(payload.ids)
         return {"success": True, "updated": updated_count}
-    except ORMTransferService.NotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    except TransfersNotFound as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+
+@router.post("/transfer/lock:all")
+async def lock_all_drafts(
+    payload: TransferLockAll,
+    transfer_service: ORMTransferService = Depends(),
+):
+    updated_count = await transfer_service.lock_all_drafts(
+        elective_id=payload.elective_id, potok=payload.potok
+    )
+    return {"success": True, "updated": updated_count}
 
 
 @router.post("/transfer/unlock")
@@ -125,5 +254,5 @@ async def unlock_transfers(
     try:
         updated_count = await transfer_service.unlock_transfers(payload.ids)
         return {"success": True, "updated": updated_count}
-    except ORMTransferService.NotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+    except TransfersNotFound as e:
+        raise HTTPException(status_code=404, detail=e.message)
\ No newline at end of file
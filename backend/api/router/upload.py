@@ -1,9 +1,12 @@
 from logging import getLogger
 
-from fastapi import APIRouter, File, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile
 
+from backend.generate_embeddings import generate_embeddings
+from backend.logic.services.elective_service.search import elective_search_index
 from backend.logic.services.journal_service.orm import JournalService
 from backend.logic.services.parsing_service.parser_all import AllFileParser
+from backend.logic.services.student_service.orm import ORMStudentService
 from backend.parse_choose import ChooseFileParser
 from backend.parse_course import ElectiveFileParser
 from backend.parse_students import StudentsDataParser
@@ -14,7 +17,9 @@ router = APIRouter(prefix="/upload", tags=["upload"])
 
 
 @router.post("/student-choices")
-async def handle_student_choices(file: UploadFile = File(...)):
+async def handle_student_choices(
+        background_tasks: BackgroundTasks, file: UploadFile = File(...)
+):
     journal_service = JournalService()
     parser = ChooseFileParser(
         file, reset=False
@@ -23,33 +28,53 @@ async def handle_student_choices(file: UploadFile = File(...)):
     await journal_service.add_record_upload_choose()
     await parser()
     await journal_service.add_record_upload_choose_success()
+    background_tasks.add_task(ORMStudentService().refresh_statistics)
+    background_tasks.add_task(ORMStudentService().refresh_fallback)
 
     return {"filename": file.filename}
 
 
 @router.post("/update-students-data")
 async def update_students_data(
-        diagnostics_file: UploadFile = File(...), competencies_file: UploadFile = File(...)
+        background_tasks: BackgroundTasks,
+        diagnostics_file: UploadFile = File(...),
+        competencies_file: UploadFile = File(...),
 ):
+    student_service = ORMStudentService()
     parser = StudentsDataParser(diagnostics_file, competencies_file)
     await parser()
-    return {"status": "students data updated"}
+    # эмбеддинги пересчитываются один раз, внутри refresh_recommendations
+    invalidated = await student_service.drop_stale_recommendations()
+    background_tasks.add_task(student_service.refresh_recommendations)
+    return {"status": "students data updated", "recommendations_invalidated": invalidated}
 
 
 @router.post("/courses-info")
-async def handle_courses_info(file: UploadFile = File(...)):
+async def handle_courses_info(
+        background_tasks: BackgroundTasks, file: UploadFile = File(...)
+):
     journal = JournalService()
     parser = ElectiveFileParser(file)
 
     await journal.add_record_upload_elective()
     await parser()
     await journal.add_record_upload_elective_success()
+    background_tasks.add_task(generate_embeddings)
+    background_tasks.add_task(elective_search_index.invalidate)
+    background_tasks.add_task(ORMStudentService().refresh_statistics)
 
     return {"filename": file.filename}
 
 
 @router.post("/all-upload")
-async def upload_all_file(file: UploadFile = File(...)):
+async def upload_all_file(
+        background_tasks: BackgroundTasks, file: UploadFile = File(...)
+):
     parser = AllFileParser(file)
     await parser()
+    background_tasks.add_task(generate_embeddings)
+    background_tasks.add_task(elective_search_index.invalidate)
+    background_tasks.add_task(ORMStudentService().refresh_recommendations)
+    background_tasks.add_task(ORMStudentService().refresh_statistics)
+    background_tasks.add_task(ORMStudentService().refresh_fallback)
     return {"filename": file.filename}
@@ -1,5 +1,6 @@
+import asyncio
 import logging.config
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 
@@ -7,6 +8,16 @@ from backend.api.router import api_router
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config import settings
 from backend.database.database import init_db
+from backend.logic.services.elective_service.orm import ORMElectiveService
+from backend.logic.services.healthcheck.readiness import readiness
+from backend.logic.services.inference_service.onnx import inference_service
+from backend.logic.services.inference_service.registry import model_registry
+from backend.logic.services.student_service.orm import ORMStudentService
+from backend.logic.services.transfer_service.events import transfer_events
+from backend.logic.services.transfer_service.orm import ORMTransferService
+from backend.logic.use_cases.activate_model import ActivateModelUseCase
+from backend.logic.use_cases.reconcile_transfer_counters import ReconcileTransferCountersUseCase
+from backend.logic.use_cases.warm_up import WarmUpUseCase
 
 origins = settings.CORS.origins
 
@@ -14,8 +25,26 @@ origins = settings.CORS.origins
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    # прогрев идёт в фоне: пока он не закончен, /health/ready отвечает 503
+    warm_up = asyncio.create_task(
+        WarmUpUseCase(
+            ORMStudentService(), ORMElectiveService(), inference_service, model_registry, readiness
+        ).execute()
+    )
+    model_watcher = asyncio.create_task(
+        ActivateModelUseCase(ORMStudentService(), inference_service, model_registry).watch()
+    )
+    counters_reconciler = asyncio.create_task(
+        ReconcileTransferCountersUseCase(ORMTransferService()).watch()
+    )
     yield
-    pass
+    for task in (warm_up, model_watcher, counters_reconciler):
+        task.cancel()
+        # ошибка прогрева уже залогирована в WarmUpUseCase
+        with suppress(asyncio.CancelledError, Exception):
+            await task
+    await inference_service.close()
+    await transfer_events.close()
 
 class App:
 
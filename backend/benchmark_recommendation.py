@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+benchmark_recommendation.py
+
+Офлайн-оценка качества и скорости two-tower рекомендателя.
+
+Модели берутся из реестра (models/<version>) и гоняются тем же кодом, что и
+в API (ModelBundle), поэтому цифры отражают реальный путь инференса.
+
+Снимок данных для оценки фиксируется один раз:
+
+    python -m backend.benchmark_recommendation --export-snapshot data/eval_snapshot
+
+и дальше любые версии сравниваются на одном и том же снимке:
+
+    python -m backend.benchmark_recommendation --snapshot data/eval_snapshot \
+        --versions v1 v2 --k 10 --batch-sizes 1 16 256 4096 --json report.json
+
+Качество: recall@k и NDCG@k, посчитанные матрично сразу по всем студентам.
+Скорость: p50/p99 латентности и пропускная способность (student tower +
+скоринг по матрице элективов) для каждого размера батча.
+
+С --compare-quantized для версий с int8-башнями дополнительно выводится
+разница recall@k и ускорение p50 относительно fp32.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database.database import db_session
+from backend.database.models.elective import Elective
+from backend.database.models.group import Group
+from backend.database.models.student import Student, student_group
+from backend.logic.services.inference_service.onnx import ModelBundle, top_k_items
+from backend.logic.services.inference_service.registry import model_registry
+
+DEFAULT_BATCH_SIZES = [2 ** i for i in range(13)]  # 1 … 4096
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# Снимок данных
+# ───────────────────────────────────────────────────────────────────────────────
+@db_session
+async def export_snapshot(out_dir: Path, db: AsyncSession):
+    """
+    Сохраняет снимок для оценки:
+      users_num.npy  (U, 10)  сырые числовые признаки студентов
+      users_code.npy (U,)     sp_code
+      users_prof.npy (U,)     sp_profile
+      items.npy      (I, 384) text_embed элективов
+      pairs.npy      (K, 2)   (индекс студента, индекс электива)
+    """
+    students = (await db.execute(
+        select(
+            Student.id,
+            Student.sp_code,
+            Student.sp_profile,
+            Student.competencies,
+            Student.diagnostics,
+        ).where(Student.competencies.isnot(None), Student.diagnostics.isnot(None))
+    )).all()
+    id2user = {s.id: i for i, s in enumerate(students)}
+
+    electives = (await db.execute(
+        select(Elective.id, Elective.text_embed).where(Elective.text_embed.isnot(None))
+    )).all()
+    id2item = {e.id: i for i, e in enumerate(electives)}
+
+    res_p = await db.execute(
+        select(student_group.c.student_id, Group.elective_id)
+        .join(Group, student_group.c.group_id == Group.id)
+    )
+    pairs = sorted({(id2user[s], id2item[e]) for s, e in res_p
+                    if s in id2user and e in id2item})
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "users_num.npy", np.asarray(
+        [[*s.competencies.values(), *s.diagnostics.values()] for s in students],
+        dtype=np.float32,
+    ))
+    # None -> "": иначе массив станет object и np.load без allow_pickle его не прочитает
+    np.save(out_dir / "users_code.npy", np.asarray([s.sp_code or "" for s in students], dtype=str))
+    np.save(out_dir / "users_prof.npy", np.asarray([s.sp_profile or "" for s in students], dtype=str))
+    np.save(out_dir / "items.npy", np.asarray([e.text_embed for e in electives], dtype=np.float32))
+    np.save(out_dir / "pairs.npy", np.asarray(pairs, dtype=np.int64).reshape(-1, 2))
+    print(f"Снимок сохранён в {out_dir}: "
+          f"users={len(students)} items={len(electives)} pairs={len(pairs)}")
+
+
+def load_snapshot(snapshot_dir: Path) -> dict:
+    return {
+        name: np.load(snapshot_dir / f"{name}.npy")
+        for name in ("users_num", "users_code", "users_prof", "items", "pairs")
+    }
+
+
+def user_rows(snapshot: dict, idx: np.ndarray) -> list[tuple]:
+    """Сырые признаки студентов в формате ModelBundle.embed_rows."""
+    return [
+        (snapshot["users_num"][i].tolist(), str(snapshot["users_code"][i]), str(snapshot["users_prof"][i]))
+        for i in idx
+    ]
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# Качество
+# ───────────────────────────────────────────────────────────────────────────────
+def retrieval_metrics(top_idx: np.ndarray, relevance: np.ndarray, k: int) -> dict:
+    """
+    recall@k и NDCG@k по всем пользователям сразу.
+
+    recall@k = доля всех истинных элективов студента, попавших в топ-k
+    (знаменатель — число истинных пар, а не min(n_rel, k)).
+
+    Args:
+        top_idx: (U, k) индексы рекомендованных элективов, по убыванию score.
+        relevance: (U, I) булева матрица истинных пар.
+    """
+    n_rel = relevance.sum(axis=1)
+    has_rel = n_rel > 0
+    hits = np.take_along_axis(relevance, top_idx[:, :k], axis=1).astype(np.float32)  # (U, k)
+
+    # элективов может быть меньше k: top_idx тогда уже k
+    depth = hits.shape[1]
+    discounts = 1.0 / np.log2(np.arange(2, depth + 2))  # (depth,)
+    dcg = hits @ discounts
+    ideal_len = np.minimum(n_rel, depth)
+    idcg = np.cumsum(discounts)[np.maximum(ideal_len - 1, 0)]
+
+    recall = hits.sum(axis=1)[has_rel] / n_rel[has_rel]
+    ndcg = dcg[has_rel] / idcg[has_rel]
+    return {
+        f"recall@{k}": float(recall.mean()) if recall.size else 0.0,
+        f"ndcg@{k}": float(ndcg.mean()) if ndcg.size else 0.0,
+        "users": int(has_rel.sum()),
+    }
+
+
+def evaluate_quality(bundle: ModelBundle, snapshot: dict, k: int) -> dict:
+    n_users, n_items = len(snapshot["users_num"]), len(snapshot["items"])
+    relevance = np.zeros((n_users, n_items), dtype=bool)
+    relevance[snapshot["pairs"][:, 0], snapshot["pairs"][:, 1]] = True
+
+    embeds = bundle.embed_rows(user_rows(snapshot, np.arange(n_users)))
+    covered = np.asarray([i for i, e in enumerate(embeds) if e is not None], dtype=np.int64)
+    user_matrix = np.asarray([embeds[i] for i in covered], dtype=np.float32)
+    item_matrix = bundle.project_items(snapshot["items"])
+
+    top_idx, _ = top_k_items(user_matrix, item_matrix, np.arange(n_items), k)
+    metrics = retrieval_metrics(top_idx, relevance[covered], k)
+    metrics["coverage"] = float(len(covered) / n_users) if n_users else 0.0
+    return metrics
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# Скорость
+# ───────────────────────────────────────────────────────────────────────────────
+def benchmark_latency(
+        bundle: ModelBundle, snapshot: dict, batch_sizes: list[int], k: int,
+        repeats: int, warmup: int,
+) -> list[dict]:
+    """Латентность student tower + скоринга по матрице элективов для каждого размера батча."""
+    rng = np.random.default_rng(42)
+    n_users, n_items = len(snapshot["users_num"]), len(snapshot["items"])
+    item_matrix = bundle.project_items(snapshot["items"])
+    item_ids = np.arange(n_items)
+
+    results = []
+    for batch_size in batch_sizes:
+        rows = user_rows(snapshot, rng.integers(0, n_users, size=batch_size))
+        timings = []
+        for step in range(warmup + repeats):
+            start = time.perf_counter()
+            embeds = bundle.embed_rows(rows)
+            user_matrix = np.asarray([e for e in embeds if e is not None], dtype=np.float32)
+            if len(user_matrix):
+                top_k_items(user_matrix, item_matrix, item_ids, k)
+            if step >= warmup:
+                timings.append(time.perf_counter() - start)
+
+        timings = np.asarray(timings)
+        results.append({
+            "batch_size": batch_size,
+            "p50_ms": float(np.percentile(timings, 50) * 1000),
+            "p99_ms": float(np.percentile(timings, 99) * 1000),
+            "throughput_per_s": float(batch_size / timings.mean()),
+        })
+    return results
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# MAIN
+# ───────────────────────────────────────────────────────────────────────────────
+def get_args():
+    p = argparse.ArgumentParser(prog="benchmark_recommendation")
+    p.add_argument("--export-snapshot", type=Path,
+                   help="выгрузить снимок данных из БД в каталог и выйти")
+    p.add_argument("--snapshot", type=Path, help="каталог со снимком данных")
+    p.add_argument("--versions", nargs="+",
+                   help="версии из реестра моделей (по умолчанию активная)")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    p.add_argument("--repeats", type=int, default=50)
+    p.add_argument("--warmup", type=int, default=5)
+    p.add_argument("--compare-quantized", action="store_true",
+                   help="сравнить fp32 и int8-варианты версий")
+    p.add_argument("--json", type=Path, help="сохранить отчёт в JSON")
+    return p.parse_args()
+
+
+def benchmark_bundle(bundle: ModelBundle, snapshot: dict, args) -> dict:
+    bundle.warm_up()
+    quality = evaluate_quality(bundle, snapshot, args.k)
+    latency = benchmark_latency(
+        bundle, snapshot, args.batch_sizes, args.k, args.repeats, args.warmup
+    )
+
+    print(f"\n=== {bundle.cache_tag} ===")
+    print("  " + "  ".join(f"{name}={value:.4f}" if isinstance(value, float) else f"{name}={value}"
+                           for name, value in quality.items()))
+    print(f"  {'batch':>6} {'p50, ms':>10} {'p99, ms':>10} {'users/s':>12}")
+    for row in latency:
+        print(f"  {row['batch_size']:>6} {row['p50_ms']:>10.3f} "
+              f"{row['p99_ms']:>10.3f} {row['throughput_per_s']:>12.0f}")
+    return {"quality": quality, "latency": latency}
+
+
+def compare_quantized(fp32: dict, int8: dict, k: int) -> dict:
+    """Потеря recall@k против ускорения p50 для каждого размера батча."""
+    recall = f"recall@{k}"
+    comparison = {
+        f"{recall}_delta": int8["quality"][recall] - fp32["quality"][recall],
+        "p50_speedup": {
+            a["batch_size"]: a["p50_ms"] / b["p50_ms"]
+            for a, b in zip(fp32["latency"], int8["latency"])
+        },
+    }
+    print(f"  int8 vs fp32: Δ{recall}={comparison[f'{recall}_delta']:+.4f}  speedup p50: "
+          + "  ".join(f"{bs}:{x:.2f}x" for bs, x in comparison["p50_speedup"].items()))
+    return comparison
+
+
+def run_benchmark(args) -> dict:
+    snapshot = load_snapshot(args.snapshot)
+    versions = args.versions or [model_registry.active_version()]
+
+    report = {}
+    for version in versions:
+        if not args.compare_quantized:
+            report[version] = benchmark_bundle(ModelBundle.load(model_registry, version), snapshot, args)
+            continue
+
+        fp32 = benchmark_bundle(ModelBundle.load(model_registry, version, quantized=False), snapshot, args)
+        report[version] = fp32
+        if not model_registry.has_quantized(version):
+            print(f"  у версии {version} нет int8-моделей")
+            continue
+        int8 = benchmark_bundle(ModelBundle.load(model_registry, version, quantized=True), snapshot, args)
+        report[f"{version}+int8"] = {**int8, "vs_fp32": compare_quantized(fp32, int8, args.k)}
+    return report
+
+
+if __name__ == "__main__":
+    args = get_args()
+    if args.export_snapshot:
+        asyncio.run(export_snapshot(args.export_snapshot))
+    else:
+        if args.snapshot is None:
+            raise SystemExit("Нужен --snapshot (или --export-snapshot для выгрузки)")
+        report = run_benchmark(args)
+        if args.json:
+            args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,44 @@
+"""student embed cache
+
+Кэш выхода student tower в student. create_all не добавляет колонки в
+существующие таблицы, поэтому базы, созданные через init_db, доводятся
+этой цепочкой ревизий: сначала alembic stamp 76ae2baca44d, затем upgrade.
+Шаги пропускают то, что init_db уже успел создать.
+
+Revision ID: 20a97080aad9
+Revises: 76ae2baca44d
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20a97080aad9"
+down_revision: Union[str, None] = "76ae2baca44d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: sa.Column):
+    if column.name not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}:
+        op.add_column(table, column)
+
+
+def upgrade() -> None:
+    _add_column("student", sa.Column(
+        "embed", postgresql.JSONB(), nullable=True,
+        comment="кэш выхода student tower (сбрасывается при обновлении признаков)",
+    ))
+    _add_column("student", sa.Column(
+        "embed_version", sa.String(), nullable=True, comment="версия модели, которой посчитан embed"
+    ))
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE student DROP COLUMN IF EXISTS embed_version")
+    op.execute("ALTER TABLE student DROP COLUMN IF EXISTS embed")
@@ -0,0 +1,43 @@
+"""student recommendation
+
+Таблица предпосчитанного топ-k элективов студента.
+
+Revision ID: 29b8242a26d2
+Revises: 94bae65141b1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "29b8242a26d2"
+down_revision: Union[str, None] = "94bae65141b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("student_recommendation"):
+        return
+    op.create_table(
+        "student_recommendation",
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("elective_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column(
+            "fingerprint", sa.String(), nullable=False,
+            comment="хэш эмбеддинга студента и матрицы элективов, по которым посчитан топ",
+        ),
+        sa.ForeignKeyConstraint(["elective_id"], ["elective.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["student_id"], ["student.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("student_id", "rank"),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS student_recommendation")
@@ -0,0 +1,92 @@
+"""transfer groups signature
+
+Ключ дедупликации заявок transfer.groups_signature и уникальное
+ограничение по (студент, элективы, подпись) для создания заявки одним
+INSERT ... ON CONFLICT DO NOTHING.
+
+Revision ID: 584dff132b0a
+Revises: d855385050f9
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "584dff132b0a"
+down_revision: Union[str, None] = "d855385050f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# подпись как у groups_signature(): отсортированные уникальные id групп
+# каждой роли. Из дублей (студент, электив-источник, электив-цель, подпись)
+# подпись получает только самая ранняя заявка, остальные остаются с NULL
+# и не мешают уникальному ограничению.
+BACKFILL_GROUPS_SIGNATURE = """
+    WITH signatures AS (
+        SELECT
+            t.id,
+            'from:' || coalesce((
+                SELECT string_agg(g.group_id::text, ',' ORDER BY g.group_id)
+                FROM (
+                    SELECT DISTINCT group_id FROM transfer_group
+                    WHERE transfer_id = t.id AND group_role = 'FROM'
+                ) AS g
+            ), '') || '|to:' || coalesce((
+                SELECT string_agg(g.group_id::text, ',' ORDER BY g.group_id)
+                FROM (
+                    SELECT DISTINCT group_id FROM transfer_group
+                    WHERE transfer_id = t.id AND group_role = 'TO'
+                ) AS g
+            ), '') AS signature
+        FROM transfer AS t
+        WHERE t.groups_signature IS NULL
+    ),
+    ranked AS (
+        SELECT
+            s.id,
+            s.signature,
+            row_number() OVER (
+                PARTITION BY t.student_id, t.from_elective_id, t.to_elective_id, s.signature
+                ORDER BY t.id
+            ) AS n,
+            EXISTS (
+                SELECT 1 FROM transfer AS o
+                WHERE o.student_id = t.student_id
+                  AND o.from_elective_id = t.from_elective_id
+                  AND o.to_elective_id = t.to_elective_id
+                  AND o.groups_signature = s.signature
+            ) AS taken
+        FROM signatures AS s
+        JOIN transfer AS t ON t.id = s.id
+    )
+    UPDATE transfer AS t
+    SET groups_signature = r.signature
+    FROM ranked AS r
+    WHERE t.id = r.id AND r.n = 1 AND NOT r.taken
+"""
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "groups_signature" not in {c["name"] for c in inspector.get_columns("transfer")}:
+        op.add_column("transfer", sa.Column(
+            "groups_signature", sa.String(), nullable=True,
+            comment="groups_signature(groups_from_ids, groups_to_ids), ключ дедупликации",
+        ))
+    op.execute(BACKFILL_GROUPS_SIGNATURE)
+    constraints = {c["name"] for c in inspector.get_unique_constraints("transfer")}
+    if "uq_transfer_groups_signature" not in constraints:
+        op.create_unique_constraint(
+            "uq_transfer_groups_signature",
+            "transfer",
+            ["student_id", "from_elective_id", "to_elective_id", "groups_signature"],
+        )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE transfer DROP CONSTRAINT IF EXISTS uq_transfer_groups_signature")
+    op.execute("ALTER TABLE transfer DROP COLUMN IF EXISTS groups_signature")
@@ -0,0 +1,41 @@
+"""direction course statistic
+
+Материализованная сводка «направление → электив» для /recomendation/{direction}.
+
+Revision ID: 5b313dcc7e7e
+Revises: 29b8242a26d2
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b313dcc7e7e"
+down_revision: Union[str, None] = "29b8242a26d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("direction_course_statistic"):
+        return
+    op.create_table(
+        "direction_course_statistic",
+        sa.Column("sp_code", sa.String(), nullable=False),
+        sa.Column("elective_id", sa.Integer(), nullable=False),
+        sa.Column("cluster", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("student_count", sa.Integer(), nullable=False, comment="студентов направления на элективе"),
+        sa.Column("capacity", sa.Integer(), nullable=False, comment="сумма вместимостей групп электива"),
+        sa.Column("direction_total", sa.Integer(), nullable=False, comment="всего студентов направления"),
+        sa.ForeignKeyConstraint(["elective_id"], ["elective.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("sp_code", "elective_id"),
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS direction_course_statistic")
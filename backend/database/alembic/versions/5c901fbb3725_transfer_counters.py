@@ -0,0 +1,138 @@
+"""transfer counters
+
+Счётчики заявок transfer_counter, журнал дельт transfer_counter_delta и
+триггеры уровня оператора на transfer. Определения триггеров зафиксированы
+здесь как есть (версия 'transfer_counter v2'), а не импортируются из кода:
+ревизия должна давать ту же схему и после изменений в
+backend/database/counters.py. Новая версия триггеров — новая ревизия.
+
+Revision ID: 5c901fbb3725
+Revises: f6a26ed99e59
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c901fbb3725"
+down_revision: Union[str, None] = "f6a26ed99e59"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRANSFER_COUNTER_APPLY = """
+    CREATE OR REPLACE FUNCTION transfer_counter_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO transfer_counter_delta (direction, elective_id, status, delta)
+            SELECT k.direction, k.elective_id, d.status, sum(d.delta)
+            FROM (
+                SELECT status::text AS status, from_elective_id, to_elective_id, 1 AS delta FROM new_rows
+            ) AS d
+            CROSS JOIN LATERAL (
+                VALUES ('all', 0), ('from', d.from_elective_id), ('to', d.to_elective_id)
+            ) AS k(direction, elective_id)
+            WHERE k.elective_id IS NOT NULL
+            GROUP BY k.direction, k.elective_id, d.status
+            HAVING sum(d.delta) <> 0;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO transfer_counter_delta (direction, elective_id, status, delta)
+            SELECT k.direction, k.elective_id, d.status, sum(d.delta)
+            FROM (
+                SELECT status::text AS status, from_elective_id, to_elective_id, -1 AS delta FROM old_rows
+            ) AS d
+            CROSS JOIN LATERAL (
+                VALUES ('all', 0), ('from', d.from_elective_id), ('to', d.to_elective_id)
+            ) AS k(direction, elective_id)
+            WHERE k.elective_id IS NOT NULL
+            GROUP BY k.direction, k.elective_id, d.status
+            HAVING sum(d.delta) <> 0;
+        ELSE
+            INSERT INTO transfer_counter_delta (direction, elective_id, status, delta)
+            SELECT k.direction, k.elective_id, d.status, sum(d.delta)
+            FROM (
+                SELECT status::text AS status, from_elective_id, to_elective_id, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT status::text AS status, from_elective_id, to_elective_id, -1 AS delta FROM old_rows
+            ) AS d
+            CROSS JOIN LATERAL (
+                VALUES ('all', 0), ('from', d.from_elective_id), ('to', d.to_elective_id)
+            ) AS k(direction, elective_id)
+            WHERE k.elective_id IS NOT NULL
+            GROUP BY k.direction, k.elective_id, d.status
+            HAVING sum(d.delta) <> 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+"""
+
+TRIGGERS = {
+    "transfer_counter_insert": "AFTER INSERT ON transfer REFERENCING NEW TABLE AS new_rows",
+    "transfer_counter_update": (
+        "AFTER UPDATE ON transfer REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows"
+    ),
+    "transfer_counter_delete": "AFTER DELETE ON transfer REFERENCING OLD TABLE AS old_rows",
+}
+
+# полный пересчёт по текущим заявкам; SHARE дожидается пишущих транзакций
+RECOUNT = [
+    "LOCK TABLE transfer IN SHARE MODE",
+    "DELETE FROM transfer_counter_delta",
+    "DELETE FROM transfer_counter",
+    """
+    INSERT INTO transfer_counter (direction, elective_id, status, count)
+    SELECT k.direction, k.elective_id, t.status::text, count(*)
+    FROM transfer AS t
+    CROSS JOIN LATERAL (
+        VALUES ('all', 0), ('from', t.from_elective_id), ('to', t.to_elective_id)
+    ) AS k(direction, elective_id)
+    WHERE k.elective_id IS NOT NULL
+    GROUP BY k.direction, k.elective_id, t.status
+    """,
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("transfer_counter"):
+        op.create_table(
+            "transfer_counter",
+            sa.Column("direction", sa.String(), nullable=False, comment="all | from | to"),
+            sa.Column("elective_id", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("direction", "elective_id", "status"),
+        )
+    if not inspector.has_table("transfer_counter_delta"):
+        op.create_table(
+            "transfer_counter_delta",
+            sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+            sa.Column("direction", sa.String(), nullable=False),
+            sa.Column("elective_id", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("delta", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    op.execute(TRANSFER_COUNTER_APPLY)
+    op.execute("COMMENT ON FUNCTION transfer_counter_apply() IS 'transfer_counter v2'")
+    for name, event in TRIGGERS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON transfer")
+        op.execute(
+            f"CREATE TRIGGER {name} {event} FOR EACH STATEMENT EXECUTE FUNCTION transfer_counter_apply()"
+        )
+    for stmt in RECOUNT:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON transfer")
+    op.execute("DROP FUNCTION IF EXISTS transfer_counter_apply()")
+    op.execute("DROP TABLE IF EXISTS transfer_counter_delta")
+    op.execute("DROP TABLE IF EXISTS transfer_counter")
@@ -0,0 +1,44 @@
+"""elective embedding cache
+
+Хэш исходного текста и item_embed с версией модели в elective.
+
+Revision ID: 94bae65141b1
+Revises: 20a97080aad9
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "94bae65141b1"
+down_revision: Union[str, None] = "20a97080aad9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_column(table: str, column: sa.Column):
+    if column.name not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}:
+        op.add_column(table, column)
+
+
+def upgrade() -> None:
+    _add_column("elective", sa.Column(
+        "text_hash", sa.String(), nullable=True, comment="sha256 текста, по которому посчитан text_embed"
+    ))
+    _add_column("elective", sa.Column(
+        "item_embed", postgresql.JSONB(), nullable=True, comment="text_embed после item tower"
+    ))
+    _add_column("elective", sa.Column(
+        "item_embed_version", sa.String(), nullable=True,
+        comment="версия модели, которой посчитан item_embed",
+    ))
+
+
+def downgrade() -> None:
+    for column in ("item_embed_version", "item_embed", "text_hash"):
+        op.execute(f"ALTER TABLE elective DROP COLUMN IF EXISTS {column}")
@@ -0,0 +1,52 @@
+"""elective search
+
+Полнотекстовый вектор elective.search_vector и GIN-индексы для гибридного
+поиска по элективам (tsvector и триграммы по названию).
+
+Revision ID: d855385050f9
+Revises: 5b313dcc7e7e
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d855385050f9"
+down_revision: Union[str, None] = "5b313dcc7e7e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(questions, '')), 'C') || "
+    "setweight(to_tsvector('russian', coalesce(text, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    if "search_vector" not in {c["name"] for c in sa.inspect(op.get_bind()).get_columns("elective")}:
+        op.add_column("elective", sa.Column(
+            "search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True),
+            comment="полнотекстовый индекс по name/description/questions/text",
+        ))
+    op.create_index(
+        "ix_elective_search_vector", "elective", ["search_vector"],
+        postgresql_using="gin", if_not_exists=True,
+    )
+    op.create_index(
+        "ix_elective_name_trgm", "elective", ["name"],
+        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_elective_name_trgm", table_name="elective", if_exists=True)
+    op.drop_index("ix_elective_search_vector", table_name="elective", if_exists=True)
+    op.execute("ALTER TABLE elective DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,38 @@
+"""transfer indexes
+
+Индексы под фильтры и keyset-сортировки /all_transfer/page.
+
+Revision ID: f6a26ed99e59
+Revises: 584dff132b0a
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6a26ed99e59"
+down_revision: Union[str, None] = "584dff132b0a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRANSFER_INDEXES = {
+    "ix_transfer_status": ["status"],
+    "ix_transfer_from_elective_id": ["from_elective_id"],
+    "ix_transfer_to_elective_id": ["to_elective_id"],
+    "ix_transfer_manager_id": ["manager_id"],
+    "ix_transfer_created_at_id": ["created_at", "id"],
+    "ix_transfer_priority_id": ["priority", "id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in TRANSFER_INDEXES.items():
+        op.create_index(name, "transfer", columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name in TRANSFER_INDEXES:
+        op.drop_index(name, table_name="transfer", if_exists=True)
@@ -0,0 +1,137 @@
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import text
+
+# Счётчики заявок transfer_counter ведутся триггерами уровня оператора:
+# из transition-таблиц берётся чистая дельта по (направление, электив,
+# статус), поэтому пакетный UPDATE на тысячи заявок — это одна вставка
+# дельт, а не тысяча. direction: all (elective_id = 0), from, to.
+#
+# Триггер только дописывает дельты в transfer_counter_delta: строки
+# счётчиков (особенно горячие all/0/status) не блокируются до коммита
+# пишущей транзакции, и одобрения, меняющие статусы в разном порядке,
+# не ловят дедлок. Дельты сворачиваются в transfer_counter в фоне
+# (TRANSFER_COUNTER_FOLD), читатели складывают счётчик и дельты.
+
+# меняется вместе с телом триггерной функции: install_transfer_counters
+# переустанавливает триггеры, только если версия в БД другая
+TRANSFER_COUNTER_VERSION = "transfer_counter v2"
+
+# свёртка и пересчёт не должны идти одновременно из разных воркеров
+TRANSFER_COUNTER_LOCK = "SELECT pg_try_advisory_xact_lock(hashtext('transfer_counter:reconcile'))"
+
+
+def _record_deltas(source: str) -> str:
+    return f"""
+        INSERT INTO transfer_counter_delta (direction, elective_id, status, delta)
+        SELECT k.direction, k.elective_id, d.status, sum(d.delta)
+        FROM ({source}) AS d
+        CROSS JOIN LATERAL (
+            VALUES ('all', 0), ('from', d.from_elective_id), ('to', d.to_elective_id)
+        ) AS k(direction, elective_id)
+        WHERE k.elective_id IS NOT NULL
+        GROUP BY k.direction, k.elective_id, d.status
+        HAVING sum(d.delta) <> 0;
+    """
+
+
+_NEW_ROWS = "SELECT status::text AS status, from_elective_id, to_elective_id, 1 AS delta FROM new_rows"
+_OLD_ROWS = "SELECT status::text AS status, from_elective_id, to_elective_id, -1 AS delta FROM old_rows"
+
+TRANSFER_COUNTER_INSTALLED = f"""
+    SELECT coalesce(
+        obj_description(to_regprocedure('transfer_counter_apply()'), 'pg_proc') = '{TRANSFER_COUNTER_VERSION}'
+        AND (
+            SELECT count(*) FROM pg_trigger
+            WHERE tgrelid = 'transfer'::regclass
+              AND tgname IN ('transfer_counter_insert', 'transfer_counter_update', 'transfer_counter_delete')
+        ) = 3,
+        false
+    )
+"""
+
+TRANSFER_COUNTER_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION transfer_counter_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_record_deltas(_NEW_ROWS)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_record_deltas(_OLD_ROWS)}
+        ELSE
+            {_record_deltas(f"{_NEW_ROWS} UNION ALL {_OLD_ROWS}")}
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+    """,
+    f"COMMENT ON FUNCTION transfer_counter_apply() IS '{TRANSFER_COUNTER_VERSION}'",
+    "DROP TRIGGER IF EXISTS transfer_counter_insert ON transfer",
+    "DROP TRIGGER IF EXISTS transfer_counter_update ON transfer",
+    "DROP TRIGGER IF EXISTS transfer_counter_delete ON transfer",
+    """
+    CREATE TRIGGER transfer_counter_insert AFTER INSERT ON transfer
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION transfer_counter_apply()
+    """,
+    """
+    CREATE TRIGGER transfer_counter_update AFTER UPDATE ON transfer
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION transfer_counter_apply()
+    """,
+    """
+    CREATE TRIGGER transfer_counter_delete AFTER DELETE ON transfer
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION transfer_counter_apply()
+    """,
+]
+
+# Свёртка дельт одним оператором: видимые (закоммиченные) дельты удаляются
+# и прибавляются к счётчикам, строки счётчиков блокируются в одном порядке.
+TRANSFER_COUNTER_FOLD = """
+    WITH folded AS (
+        DELETE FROM transfer_counter_delta
+        RETURNING direction, elective_id, status, delta
+    )
+    INSERT INTO transfer_counter (direction, elective_id, status, count)
+    SELECT direction, elective_id, status, sum(delta)
+    FROM folded
+    GROUP BY direction, elective_id, status
+    HAVING sum(delta) <> 0
+    ORDER BY direction, elective_id, status
+    ON CONFLICT (direction, elective_id, status)
+    DO UPDATE SET count = transfer_counter.count + EXCLUDED.count
+"""
+
+# Полный пересчёт. SHARE-блокировка transfer не мешает чтению, но дожидается
+# пишущих транзакций, так что их дельты не теряются и не задваиваются.
+TRANSFER_COUNTER_RECOUNT = [
+    "LOCK TABLE transfer IN SHARE MODE",
+    "DELETE FROM transfer_counter_delta",
+    "DELETE FROM transfer_counter",
+    """
+    INSERT INTO transfer_counter (direction, elective_id, status, count)
+    SELECT k.direction, k.elective_id, t.status::text, count(*)
+    FROM transfer AS t
+    CROSS JOIN LATERAL (
+        VALUES ('all', 0), ('from', t.from_elective_id), ('to', t.to_elective_id)
+    ) AS k(direction, elective_id)
+    WHERE k.elective_id IS NOT NULL
+    GROUP BY k.direction, k.elective_id, t.status
+    """,
+]
+
+
+async def install_transfer_counters(conn: AsyncConnection) -> bool:
+    """
+    Ставит триггеры счётчиков и пересчитывает их, если триггеров нет
+    (таблица transfer пересоздана) или они другой версии. При обычном
+    старте воркера ничего не меняет. Возвращает, были ли триггеры поставлены.
+    """
+    # воркеры стартуют одновременно — проверку и DDL выполняет только один за раз
+    await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('transfer_counter'))"))
+    if (await conn.execute(text(TRANSFER_COUNTER_INSTALLED))).scalar():
+        return False
+    for stmt in [*TRANSFER_COUNTER_DDL, *TRANSFER_COUNTER_RECOUNT]:
+        await conn.execute(text(stmt))
+    return True
@@ -6,6 +6,8 @@ from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import text
 
 from backend.config import settings
+from backend.database.counters import TRANSFER_COUNTER_RECOUNT, install_transfer_counters
+from backend.logic.services.transfer_service.counters import transfer_counters_cache
 
 DATABASE_URL = (
     f"{settings.DATABASE.DRIVER}://"
@@ -36,7 +38,9 @@ def db_session(func: Callable):
 async def init_db():
     async with engine.begin() as conn:
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
+        await install_transfer_counters(conn)
 
 
 async def recreate_db(tables_to_save: List[str]):
@@ -44,3 +48,9 @@ async def recreate_db(tables_to_save: List[str]):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all, tables=tables_to_drop)
         await conn.run_sync(Base.metadata.create_all)
+        if not await install_transfer_counters(conn):
+            # transfer сохранён, но связанные таблицы пересозданы — счётчики пересчитываются
+            for stmt in TRANSFER_COUNTER_RECOUNT:
+                await conn.execute(text(stmt))
+    # сводка в Redis описывает уже удалённые заявки
+    await transfer_counters_cache.invalidate()
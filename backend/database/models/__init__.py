@@ -3,3 +3,5 @@ from backend.database.models.manager import Manager
 from backend.database.models.elective import Elective
 from backend.database.models.group import Group, Teacher, group_teacher
 from backend.database.models.journal import Journal
+from backend.database.models.recommendation import StudentRecommendation
+from backend.database.models.statistic import DirectionCourseStatistic, TransferCounter, TransferCounterDelta
@@ -2,14 +2,23 @@ from typing import List
 
 from backend.database.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Table, Column, Integer, ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Table, Column, Integer, ForeignKey, Computed, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 
 from backend.database.models.group import Group
 
 
 class Elective(Base):
     __tablename__ = "elective"
+    __table_args__ = (
+        Index("ix_elective_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_elective_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str]
@@ -22,6 +31,27 @@ class Elective(Base):
     text_embed: Mapped[list[float]] = mapped_column(
         JSONB, nullable=True, comment="эмбеддинг описания курса (JSON-массив чисел)"
     )
+    text_hash: Mapped[str] = mapped_column(
+        nullable=True, comment="sha256 текста, по которому посчитан text_embed"
+    )
+    item_embed: Mapped[list[float]] = mapped_column(
+        JSONB, nullable=True, comment="text_embed после item tower"
+    )
+    item_embed_version: Mapped[str] = mapped_column(
+        nullable=True, comment="версия модели, которой посчитан item_embed"
+    )
+
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('russian', coalesce(questions, '')), 'C') || "
+            "setweight(to_tsvector('russian', coalesce(text, '')), 'D')",
+            persisted=True,
+        ),
+        comment="полнотекстовый индекс по name/description/questions/text",
+    )
 
     groups: Mapped[List["Group"]] = relationship(
         "Group",
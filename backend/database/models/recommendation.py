@@ -0,0 +1,26 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.database import Base
+
+
+class StudentRecommendation(Base):
+    """Предпосчитанный топ-k элективов студента (заполняется фоновым пересчётом)."""
+
+    __tablename__ = "student_recommendation"
+
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("student.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank: Mapped[int] = mapped_column(primary_key=True)
+    elective_id: Mapped[int] = mapped_column(ForeignKey("elective.id", ondelete="CASCADE"))
+    score: Mapped[float]
+    fingerprint: Mapped[str] = mapped_column(
+        comment="хэш эмбеддинга студента и матрицы элективов, по которым посчитан топ"
+    )
+
+    def __str__(self):
+        return f"{self.student_id} - {self.rank} - {self.elective_id}"
+
+    def __repr__(self):
+        return self.__str__()
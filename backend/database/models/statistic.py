@@ -0,0 +1,67 @@
+from sqlalchemy import BigInteger, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.database import Base
+
+
+class DirectionCourseStatistic(Base):
+    """
+    Сводка «направление → электив» для /recomendation/{direction}.
+    Пересчитывается целиком после загрузок и одобрения переводов.
+    """
+
+    __tablename__ = "direction_course_statistic"
+
+    sp_code: Mapped[str] = mapped_column(primary_key=True)
+    elective_id: Mapped[int] = mapped_column(
+        ForeignKey("elective.id", ondelete="CASCADE"), primary_key=True
+    )
+    cluster: Mapped[str] = mapped_column(nullable=True)
+    name: Mapped[str]
+    student_count: Mapped[int] = mapped_column(comment="студентов направления на элективе")
+    capacity: Mapped[int] = mapped_column(comment="сумма вместимостей групп электива")
+    direction_total: Mapped[int] = mapped_column(comment="всего студентов направления")
+
+    def __str__(self):
+        return f"{self.sp_code} - {self.elective_id} - {self.student_count}"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class TransferCounter(Base):
+    """
+    Число заявок по статусам: всего (direction=all, elective_id=0) и по
+    исходному/целевому элективу. Триггеры на transfer пишут изменения в
+    transfer_counter_delta, фоновая задача сворачивает их сюда
+    (backend/database/counters.py) и периодически сверяет полным пересчётом.
+    """
+
+    __tablename__ = "transfer_counter"
+
+    direction: Mapped[str] = mapped_column(primary_key=True, comment="all | from | to")
+    elective_id: Mapped[int] = mapped_column(primary_key=True)
+    status: Mapped[str] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+    def __str__(self):
+        return f"{self.direction} - {self.elective_id} - {self.status}: {self.count}"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class TransferCounterDelta(Base):
+    """
+    Изменения счётчиков заявок, ещё не свёрнутые в transfer_counter.
+    Триггеры только дописывают строки, поэтому параллельные транзакции
+    не держат блокировки на общих строках счётчиков до коммита.
+    """
+
+    __tablename__ = "transfer_counter_delta"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    direction: Mapped[str]
+    elective_id: Mapped[int]
+    status: Mapped[str]
+    delta: Mapped[int]
@@ -1,12 +1,15 @@
 from typing import List
 
 from backend.database.database import Base
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy import Table, Column, Integer, ForeignKey
 from sqlalchemy.dialects.postgresql import JSONB
 
 from backend.database.models.group import Group
 
+# значение атрибута ещё не загружено из БД
+_NOT_LOADED = object()
+
 
 class Student(Base):
     __tablename__ = "student"
@@ -26,6 +29,13 @@ class Student(Base):
         JSONB, nullable=True, comment="три балла из листа «Контингент»"
     )
 
+    embed: Mapped[list[float]] = mapped_column(
+        JSONB, nullable=True, comment="кэш выхода student tower (сбрасывается при обновлении признаков)"
+    )
+    embed_version: Mapped[str] = mapped_column(
+        nullable=True, comment="версия модели, которой посчитан embed"
+    )
+
     groups: Mapped[List["Group"]] = relationship(
         "Group", back_populates="students", secondary="student_group"
     )
@@ -33,6 +43,19 @@ class Student(Base):
         "Transfer", back_populates="student"
     )
 
+    @validates("sp_code", "sp_profile", "diagnostics", "competencies")
+    def _reset_embed(self, key, value):
+        """
+        Изменение входов student tower делает кэш embed недействительным.
+        Повторное присваивание того же значения (загрузки перезаписывают
+        признаки всех студентов) кэш не трогает. Незагруженное значение
+        сравнить не с чем — кэш сбрасывается.
+        """
+        if self.__dict__.get(key, _NOT_LOADED) != value:
+            self.embed = None
+            self.embed_version = None
+        return value
+
     def __str__(self):
         return f"{self.id} - {self.fio} - {self.email}"
 
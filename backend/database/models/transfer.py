@@ -9,6 +9,8 @@ from sqlalchemy import (
     Table,
     Column,
     Enum as SAEnum,
+    UniqueConstraint,
+    Index,
     and_,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -43,8 +45,32 @@ transfer_group = Table(
 )
 
 
+def groups_signature(groups_from_ids: list[int], groups_to_ids: list[int]) -> str:
+    """Каноническая запись наборов групп заявки: порядок и повторы id не важны."""
+    from_part = ",".join(map(str, sorted(set(groups_from_ids))))
+    to_part = ",".join(map(str, sorted(set(groups_to_ids))))
+    return f"from:{from_part}|to:{to_part}"
+
+
 class Transfer(Base):
     __tablename__ = "transfer"
+    GROUPS_SIGNATURE_CONSTRAINT = "uq_transfer_groups_signature"
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id",
+            "from_elective_id",
+            "to_elective_id",
+            "groups_signature",
+            name=GROUPS_SIGNATURE_CONSTRAINT,
+        ),
+        # индексы под фильтры и сортировки /all_transfer (keyset по (поле, id))
+        Index("ix_transfer_status", "status"),
+        Index("ix_transfer_from_elective_id", "from_elective_id"),
+        Index("ix_transfer_to_elective_id", "to_elective_id"),
+        Index("ix_transfer_manager_id", "manager_id"),
+        Index("ix_transfer_created_at_id", "created_at", "id"),
+        Index("ix_transfer_priority_id", "priority", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     student_id: Mapped[int] = mapped_column(ForeignKey("student.id"), nullable=False)
@@ -63,6 +89,9 @@ class Transfer(Base):
         SAEnum(TransferStatus), default=TransferStatus.draft
     )
     priority: Mapped[int] = mapped_column(Integer, default=1)
+    groups_signature: Mapped[str | None] = mapped_column(
+        nullable=True, comment="groups_signature(groups_from_ids, groups_to_ids), ключ дедупликации"
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), onupdate=func.now()
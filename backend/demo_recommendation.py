@@ -7,25 +7,37 @@
 Запуск:
 
     python recommend_train_v4.py
+        --data data/train_shards       # .npy-шарды (выгружаются из БД,
+        --export                       #  если их нет или задан --export)
         --epochs 40                    # ≤ 40 эпох с early-stop
         --tau 0.08                     # температура InfoNCE
+        --batch_size 1024              # размер шага
         --accum 4                      # grad-accum (эфф. batch≈4096)
         --hard_k 1                     # по 1 hard-neg
 
-После обучения появится student_tower.onnx – её можно
-подключать в PL/Python-UDF и выполнять
+После обучения в models/<version>/ появятся student_tower.onnx,
+item_tower.onnx и словари признаков. Версия включается без рестарта:
 
-    ORDER BY student_embed(uid) <=> elective.text_embed LIMIT 10
+    POST /model/activate/<version>
+
+С --quantize dynamic|static рядом сохраняются int8-варианты башен
+(*.int8.onnx); static калибруется на признаках реальных студентов.
+Сервис использует их при INFERENCE.QUANTIZED: true. Сравнить качество и
+скорость с fp32:
+
+    python -m backend.benchmark_recommendation --snapshot ... --compare-quantized
 """
 import argparse, asyncio, logging, random
-import math
+from datetime import datetime
 from pathlib import Path
 import json
 
 import numpy as np
 import torch
+from onnxruntime.quantization import (
+    CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static,
+)
 from torch import nn, optim
-from torch.utils.data import Dataset, DataLoader
 
 # ── DB-модули проекта ----------------------------------------------------------
 from backend.database.database import db_session
@@ -34,6 +46,7 @@ from sqlalchemy import select
 from backend.database.models.student import Student, student_group
 from backend.database.models.group import Group
 from backend.database.models.elective import Elective
+from backend.logic.services.inference_service.registry import model_registry
 
 # ── reproducibility ------------------------------------------------------------
 SEED = 42
@@ -50,80 +63,165 @@ def get_args():
     p.add_argument("--epochs", type=int, default=200)
     p.add_argument("--tau", type=float, default=0.1,
                    help="температура в InfoNCE (0.07-0.1)")
+    p.add_argument("--batch_size", type=int, default=1024,
+                   help="пар (u,i) в одном шаге")
     p.add_argument("--accum", type=int, default=4,
                    help="шагов grad-accum для крупного batch")
     p.add_argument("--hard_k", type=int, default=100,
                    help="сколько hard-negatives добавлять")
+    p.add_argument("--data", type=Path, default=Path("data/train_shards"),
+                   help="каталог с .npy-шардами признаков и пар")
+    p.add_argument("--export", action="store_true",
+                   help="перевыгрузить шарды из БД перед обучением")
+    p.add_argument("--chunk", type=int, default=50_000,
+                   help="строк в одном шарде / в одной порции курсора")
+    p.add_argument("--quantize", choices=["none", "dynamic", "static"], default="none",
+                   help="сохранить также int8-варианты башен")
+    p.add_argument("--calib_size", type=int, default=1024,
+                   help="студентов/элективов для калибровки static-квантизации")
+    p.add_argument("--version", default=datetime.now().strftime("%Y%m%d-%H%M%S"),
+                   help="имя версии в реестре моделей (models/<version>)")
     return p.parse_args()
 
 # ───────────────────────────────────────────────────────────────────────────────
-# 2. ЗАГРУЗКА ТЕНЗОРОВ
+# 2. ВЫГРУЗКА ШАРДОВ И ЗАГРУЗКА ТЕНЗОРОВ
 # ───────────────────────────────────────────────────────────────────────────────
+async def _stream_to_shards(db: AsyncSession, stmt, out_dir: Path, prefix: str, chunk: int, write_shard):
+    """Читает stmt серверным курсором порциями по chunk строк и пишет каждую порцию в шард."""
+    result = await db.stream(stmt.execution_options(yield_per=chunk))
+    n_shards = 0
+    async for rows in result.partitions():
+        write_shard(rows, lambda name: out_dir / f"{prefix}_{name}.{n_shards:05d}.npy")
+        n_shards += 1
+    return n_shards
+
 @db_session
-async def load_tensors(db: AsyncSession):
+async def export_shards(out_dir: Path, chunk: int, db: AsyncSession):
+    """
+    Колоночная выгрузка обучающих данных в .npy-шарды без ORM-объектов:
+      students_{id,num,code,prof}.NNNNN.npy  — студенты по возрастанию id
+      items_{id,embed}.NNNNN.npy             — элективы с text_embed по возрастанию id
+      pairs_ids.NNNNN.npy                    — (student_id, elective_id)
+      meta.json                              — mu/sigma признаков, словари кодов и профилей
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in [*out_dir.glob("*.npy"), *out_dir.glob("meta.json")]:
+        old.unlink()
+
+    codes, profiles = set(), set()
+    n_rows, s1, s2 = 0, 0.0, 0.0
+
+    def write_students(rows, path):
+        nonlocal n_rows, s1, s2
+        num = np.asarray([[*r.competencies.values(), *r.diagnostics.values()] for r in rows],
+                         dtype=np.float64)
+        n_rows, s1, s2 = n_rows + len(num), s1 + num.sum(0), s2 + (num ** 2).sum(0)
+        # NULL-коды — пустая строка: иначе sorted() падает, а массивы становятся object
+        sp_codes = [r.sp_code or "" for r in rows]
+        sp_profiles = [r.sp_profile or "" for r in rows]
+        codes.update(sp_codes)
+        profiles.update(sp_profiles)
+        np.save(path("id"), np.asarray([r.id for r in rows], dtype=np.int64))
+        np.save(path("num"), num.astype(np.float32))
+        np.save(path("code"), np.asarray(sp_codes, dtype=str))
+        np.save(path("prof"), np.asarray(sp_profiles, dtype=str))
+
+    def write_items(rows, path):
+        np.save(path("id"), np.asarray([r.id for r in rows], dtype=np.int64))
+        np.save(path("embed"), np.asarray([r.text_embed for r in rows], dtype=np.float32))
+
+    def write_pairs(rows, path):
+        np.save(path("ids"), np.asarray([tuple(r) for r in rows], dtype=np.int64).reshape(-1, 2))
+
+    await _stream_to_shards(db, select(
+        Student.id, Student.sp_code, Student.sp_profile, Student.competencies, Student.diagnostics,
+    ).where(
+        Student.competencies.isnot(None), Student.diagnostics.isnot(None)
+    ).order_by(Student.id), out_dir, "students", chunk, write_students)
+
+    await _stream_to_shards(db, select(Elective.id, Elective.text_embed)
+                            .where(Elective.text_embed.isnot(None))
+                            .order_by(Elective.id), out_dir, "items", chunk, write_items)
+
+    await _stream_to_shards(db, select(student_group.c.student_id, Group.elective_id)
+                            .join(Group, student_group.c.group_id == Group.id)
+                            .distinct(), out_dir, "pairs", chunk, write_pairs)
+
+    mu = s1 / max(n_rows, 1)
+    sigma = np.sqrt(np.maximum(s2 / max(n_rows, 1) - mu ** 2, 0.0)) + 1e-9
+    (out_dir / "meta.json").write_text(json.dumps({
+        "mu": np.asarray(mu, dtype=np.float32).tolist(),
+        "sigma": np.asarray(sigma, dtype=np.float32).tolist(),
+        "codes": sorted(codes),
+        "profiles": sorted(profiles),
+    }, ensure_ascii=False), encoding="utf-8")
+    logging.info(f"Шарды выгружены в {out_dir}: students={n_rows}")
+
+def _shards(data_dir: Path, prefix: str) -> list[np.ndarray]:
+    return [np.load(f, mmap_mode="r") for f in sorted(data_dir.glob(f"{prefix}.*.npy"))]
+
+def _index_of(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Позиции ids в отсортированном sorted_ids; -1 для отсутствующих."""
+    pos = np.clip(np.searchsorted(sorted_ids, ids), 0, max(len(sorted_ids) - 1, 0))
+    found = sorted_ids[pos] == ids if len(sorted_ids) else np.zeros(len(ids), dtype=bool)
+    return np.where(found, pos, -1)
+
+def load_tensors(data_dir: Path):
+    """
+    Собирает тензоры из memory-mapped шардов: в память попадают только
+    итоговые массивы, без промежуточных Python-объектов на каждую строку.
+    """
+    meta = json.loads((data_dir / "meta.json").read_text(encoding="utf-8"))
+    codes, profiles = meta["codes"], meta["profiles"]
+    code_arr, prof_arr = np.asarray(codes), np.asarray(profiles)
+    mu = np.asarray(meta["mu"], dtype=np.float32)
+    sigma = np.asarray(meta["sigma"], dtype=np.float32)
+
     # --- студенты --------------------------------------------------------------
-    res = await db.execute(select(Student))
-    students = res.scalars().all()
-
-    codes     = sorted({s.sp_code for s in students})
-    profiles  = sorted({s.sp_profile for s in students})
-    code2idx  = {c: i for i, c in enumerate(codes)}
-    prof2idx  = {p: i for i, p in enumerate(profiles)}
-
-    feats, code_lbl, prof_lbl, id2user = [], [], [], {}
-    for idx, s in enumerate(students):
-        feats.append(np.hstack([list(s.competencies.values()),
-                                list(s.diagnostics.values())]))      # (10,)
-        code_lbl.append(code2idx[s.sp_code])
-        prof_lbl.append(prof2idx[s.sp_profile])
-        id2user[s.id] = idx
-
-    feats = np.vstack(feats).astype("float32")
-    mu, sigma = feats.mean(0), feats.std(0) + 1e-9         # z-score
-    feats = (feats - mu) / sigma
-
-    X_users = torch.from_numpy(
-        np.hstack([feats,
-                   np.array(code_lbl)[:, None],
-                   np.array(prof_lbl)[:, None]])
-    ).float()                                              # (U,12)
+    user_ids = np.concatenate(_shards(data_dir, "students_id") or [np.empty(0, dtype=np.int64)])
+    X_users = np.empty((len(user_ids), len(mu) + 2), dtype=np.float32)    # (U,12)
+    start = 0
+    for num, code, prof in zip(_shards(data_dir, "students_num"),
+                               _shards(data_dir, "students_code"),
+                               _shards(data_dir, "students_prof")):
+        end = start + len(num)
+        X_users[start:end, :-2] = (num - mu) / sigma                          # z-score
+        X_users[start:end, -2] = np.searchsorted(code_arr, code)
+        X_users[start:end, -1] = np.searchsorted(prof_arr, prof)
+        start = end
 
     # --- элективы --------------------------------------------------------------
-    res_e = await db.execute(select(Elective))
-    electives = res_e.scalars().all()
-    id2item, embeds = {}, []
-    for e in electives:
-        if e.text_embed is not None:
-            id2item[e.id] = len(embeds)
-            embeds.append(e.text_embed)
-    X_items = torch.tensor(np.array(embeds), dtype=torch.float32)    # (I,384)
+    item_ids = np.concatenate(_shards(data_dir, "items_id") or [np.empty(0, dtype=np.int64)])
+    X_items = np.empty((len(item_ids), 384), dtype=np.float32)             # (I,384)
+    start = 0
+    for embed in _shards(data_dir, "items_embed"):
+        X_items[start:start + len(embed)] = embed
+        start += len(embed)
 
     # --- пары (u,i) ------------------------------------------------------------
-    res_p = await db.execute(
-        select(Student.id, Group.elective_id)
-        .join(student_group, student_group.c.student_id == Student.id)
-        .join(Group,        student_group.c.group_id   == Group.id)
-    )
-    pairs = {(id2user[s], id2item[e]) for s, e in res_p
-             if s in id2user and e in id2item}
-    pairs = torch.tensor(list(pairs), dtype=torch.int64)             # (K,2)
-
+    pair_parts = []
+    for part in _shards(data_dir, "pairs_ids"):
+        u, i = _index_of(user_ids, part[:, 0]), _index_of(item_ids, part[:, 1])
+        keep = (u >= 0) & (i >= 0)
+        pair_parts.append(np.stack([u[keep], i[keep]], axis=1))
+    pairs = np.unique(np.concatenate(pair_parts or [np.empty((0, 2), dtype=np.int64)]), axis=0)
+
+    X_users, X_items, pairs = torch.from_numpy(X_users), torch.from_numpy(X_items), torch.from_numpy(pairs)
     logging.info(f"Users : {X_users.shape}  | "
                  f"Items : {X_items.shape}  | "
                  f"Pairs : {pairs.shape}")
-    return X_users, X_items, pairs, codes, profiles, {"mu": mu.tolist(), "sigma": sigma.tolist()}
+    return X_users, X_items, pairs, codes, profiles, {"mu": meta["mu"], "sigma": meta["sigma"]}
 
 # ───────────────────────────────────────────────────────────────────────────────
-# 3. DATASET
+# 3. БАТЧИ
 # ───────────────────────────────────────────────────────────────────────────────
-class ContrastiveDS(Dataset):
-    def __init__(self, pairs):          # pairs: (K,2)
-        self.u  = pairs[:, 0]
-        self.ip = pairs[:, 1]
+def iter_batches(n: int, batch_size: int, shuffle: bool = False):
+    """Индексы батчей срезами одного тензора вместо поэлементного Dataset."""
+    order = torch.randperm(n, device=DEVICE) if shuffle else torch.arange(n, device=DEVICE)
+    yield from order.split(batch_size)
 
-    def __len__(self):  return len(self.u)
-    def __getitem__(self, idx):
-        return self.u[idx], self.ip[idx]
+def num_batches(n: int, batch_size: int) -> int:
+    return (n + batch_size - 1) // batch_size
 
 # ───────────────────────────────────────────────────────────────────────────────
 # 4. МОДЕЛЬ
@@ -159,41 +257,58 @@ class ItemTower(nn.Module):
 # ───────────────────────────────────────────────────────────────────────────────
 # 5. HARD NEGATIVE МИНЁР
 # ───────────────────────────────────────────────────────────────────────────────
-def build_hard_neg(stu, itm, X_users, X_items, pairs, k=1):
+def encode_users(stu, X_users):
+    return stu(X_users[:, :10], X_users[:, -2].long(), X_users[:, -1].long())
+
+def build_hard_neg(stu, itm, X_users, X_items, pairs, k=1, chunk=8192):
+    """
+    Hard-negatives для всех пар сразу: строки матрицы сходства (U,I)
+    берутся по пользователям пар, позитив маскируется, затем один topk.
+    Возвращает тензор (K,k), выровненный с pairs.
+    """
+    k = min(k, X_items.shape[0] - 1)
     with torch.no_grad():
-        u_vec = stu(X_users[:, :10].to(DEVICE),
-                    X_users[:, -2].long().to(DEVICE),
-                    X_users[:, -1].long().to(DEVICE))
-        i_vec = itm(X_items.to(DEVICE))
-        sims  = u_vec @ i_vec.T                                   # (U,I)
-
-    dic = {}
-    for (u, ip) in pairs.tolist():
-        s = sims[u].clone()
-        s[ip] = -1.0
-        dic[(u, ip)] = s.topk(k).indices.cpu().tolist()
-    return dic
+        sims = encode_users(stu, X_users) @ itm(X_items).T       # (U,I)
+        out = []
+        for part in pairs.split(chunk):                           # память: chunk×I
+            s = sims[part[:, 0]]                                  # (C,I)
+            s.scatter_(1, part[:, 1:2], float("-inf"))
+            out.append(s.topk(k, dim=1).indices)
+    return torch.cat(out)                                         # (K,k)
 
 # ───────────────────────────────────────────────────────────────────────────────
 # 6. ОБУЧЕНИЕ
 # ───────────────────────────────────────────────────────────────────────────────
+def evaluate(stu, itm, X_users, X_items, val_p, k=10, chunk=8192):
+    """recall/precision/MRR/NDCG@k по всем валидационным парам без цикла по строкам."""
+    i_vec = itm(X_items)
+    ranks = torch.arange(1, k + 1, device=DEVICE, dtype=torch.float32)
+    hit = mrr_sum = ndcg_sum = 0.0
+    for part in val_p.split(chunk):
+        topk = (encode_users(stu, X_users[part[:, 0]]) @ i_vec.T).topk(k, dim=1).indices
+        hits = (topk == part[:, 1:2]).float()                     # (C,k), ≤1 единица в строке
+        hit += hits.sum().item()
+        mrr_sum += (hits / ranks).sum().item()
+        ndcg_sum += (hits / torch.log2(ranks + 1)).sum().item()
+    tot = max(len(val_p), 1)
+    return hit / tot, hit / (tot * k), mrr_sum / tot, ndcg_sum / tot
+
 def train(args, X_users, X_items, pairs):
     # train/val split by user
     u_unique = torch.unique(pairs[:, 0])
-    val_u = set(random.sample(u_unique.tolist(), int(0.2 * len(u_unique))))
-    msk   = torch.tensor([u.item() in val_u for u in pairs[:, 0]])
-    train_p, val_p = pairs[~msk], pairs[msk]
+    val_u = torch.tensor(random.sample(u_unique.tolist(), int(0.2 * len(u_unique))),
+                         dtype=torch.int64)
+    msk   = torch.isin(pairs[:, 0], val_u)
+    X_users, X_items = X_users.to(DEVICE), X_items.to(DEVICE)
+    train_p, val_p = pairs[~msk].to(DEVICE), pairs[msk].to(DEVICE)
     logging.info(f"Training pairs count: {len(train_p)}")
-    logging.info(f"Hyperparameters: epochs={args.epochs}, tau={args.tau}, accum_steps={args.accum}, hard_k={args.hard_k}")
-
-    dl_train = DataLoader(ContrastiveDS(train_p), batch_size=16, shuffle=True)
-    dl_val   = DataLoader(ContrastiveDS(val_p),   batch_size=16)
+    logging.info(f"Hyperparameters: epochs={args.epochs}, tau={args.tau}, batch_size={args.batch_size}, "
+                 f"accum_steps={args.accum}, hard_k={args.hard_k}")
 
     code_card = int(X_users[:, -2].max()+1)
     prof_card = int(X_users[:, -1].max()+1)
     stu = StudentTower(code_card, prof_card).to(DEVICE)
     itm = ItemTower().to(DEVICE)
-    X_items_d = X_items.to(DEVICE)
 
     opt = optim.AdamW(list(stu.parameters()) + list(itm.parameters()),
                       lr=1e-4, weight_decay=1e-4)
@@ -209,22 +324,19 @@ def train(args, X_users, X_items, pairs):
         stu.train(); itm.train()
         tot_loss, step_accum = 0.0, 0
 
-        for u, ip in dl_train:
+        for idx in iter_batches(len(train_p), args.batch_size, shuffle=True):
+            u, ip = train_p[idx, 0], train_p[idx, 1]
             # случайный негатив
-            ir = torch.randint(0, len(X_items), (len(u),), dtype=torch.int64)
-            # hard-neg
-            ih = torch.tensor([random.choice(hard_neg[(u_i.item(), ip_i.item())])
-                               for u_i, ip_i in zip(u, ip)], dtype=torch.int64)
+            ir = torch.randint(0, len(X_items), (len(idx),), device=DEVICE)
+            # hard-neg: случайный из k заранее найденных для пары
+            pick = torch.randint(0, hard_neg.shape[1], (len(idx),), device=DEVICE)
+            ih = hard_neg[idx, pick]
 
             # эмбеддинги
-            u_vec = stu(
-                X_users[u, :10].to(DEVICE),
-                X_users[u, -2].long().to(DEVICE),
-                X_users[u, -1].long().to(DEVICE)
-            )
-            v_pos  = itm(X_items_d[ip.to(DEVICE)])
-            v_rand = itm(X_items_d[ir.to(DEVICE)])
-            v_hard = itm(X_items_d[ih.to(DEVICE)])
+            u_vec  = encode_users(stu, X_users[u])
+            v_pos  = itm(X_items[ip])
+            v_rand = itm(X_items[ir])
+            v_hard = itm(X_items[ih])
 
             # in-batch negatives: positive, rand, hard, shift-pos
             all_v  = torch.cat([v_pos,
@@ -251,34 +363,10 @@ def train(args, X_users, X_items, pairs):
                                       k=args.hard_k)
 
         # ---- validation metrics --------------------------------------------
-        import math
         with torch.no_grad():
             stu.eval(); itm.eval()
-            hit = tot = 0
-            mrr_sum = ndcg_sum = 0.0
-            for u, ip in dl_val:
-                u_vec = stu(
-                    X_users[u, :10].to(DEVICE),
-                    X_users[u, -2].long().to(DEVICE),
-                    X_users[u, -1].long().to(DEVICE)
-                )
-                sims = u_vec @ itm(X_items_d).T
-                topk = sims.topk(10).indices.cpu()
-                for row, true_i in zip(topk, ip):
-                    tot += 1
-                    # hit for recall
-                    hit_flag = int(true_i in row)
-                    hit += hit_flag
-                    # position of true item (0-based)
-                    if hit_flag:
-                        pos = (row == true_i).nonzero(as_tuple=True)[0].item()
-                        mrr_sum += 1.0 / (pos + 1)
-                        ndcg_sum += 1.0 / math.log2(pos + 2)
-            recall10 = hit / tot
-            precision10 = hit / (tot * 10)
-            mrr10 = mrr_sum / tot
-            ndcg10 = ndcg_sum / tot
-        avg_loss = tot_loss / len(dl_train)
+            recall10, precision10, mrr10, ndcg10 = evaluate(stu, itm, X_users, X_items, val_p)
+        avg_loss = tot_loss / num_batches(len(train_p), args.batch_size)
         sch.step(avg_loss)
 
         if recall10 > best_recall:
@@ -310,8 +398,10 @@ def train(args, X_users, X_items, pairs):
 # ───────────────────────────────────────────────────────────────────────────────
 # 7. ЭКСПОРТ
 # ───────────────────────────────────────────────────────────────────────────────
-def export_onnx(stu: StudentTower, itm: ItemTower, codes: list[str], profiles: list[str], num_stats: dict):
-    path = Path("student_tower.onnx")
+def export_onnx(stu: StudentTower, itm: ItemTower, codes: list[str], profiles: list[str], num_stats: dict,
+                out_dir: Path):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "student_tower.onnx"
     dummy_num  = torch.zeros(1, 10, dtype=torch.float32)
     dummy_code = torch.zeros(1, dtype=torch.int64)
     dummy_prof = torch.zeros(1, dtype=torch.int64)
@@ -331,7 +421,7 @@ def export_onnx(stu: StudentTower, itm: ItemTower, codes: list[str], profiles: l
     )
     logging.info(f"ONNX-модель сохранена: {path.resolve()}")
     # ─ item tower ─
-    path_itm = Path("item_tower.onnx")
+    path_itm = out_dir / "item_tower.onnx"
     dummy_vec = torch.zeros(1, 384, dtype=torch.float32)
     torch.onnx.export(
         itm,
@@ -355,6 +445,47 @@ def export_onnx(stu: StudentTower, itm: ItemTower, codes: list[str], profiles: l
     (path.parent / "profile_list.json").write_text(json.dumps(profiles, ensure_ascii=False), encoding="utf-8")
     logging.info("Списки code_list.json и profile_list.json сохранены.")
 
+# ───────────────────────────────────────────────────────────────────────────────
+# 8. INT8-КВАНТИЗАЦИЯ
+# ───────────────────────────────────────────────────────────────────────────────
+class TowerCalibrationReader(CalibrationDataReader):
+    """Отдаёт ONNX Runtime батчи реальных входов башни для static-калибровки."""
+
+    def __init__(self, feeds: list[dict]):
+        self.feeds = iter(feeds)
+
+    def get_next(self):
+        return next(self.feeds, None)
+
+def quantize_onnx(out_dir: Path, mode: str, X_users, X_items, calib_size: int, batch: int = 64):
+    """
+    Post-training квантизация экспортированных башен в int8:
+    dynamic — веса int8, активации квантуются на лету;
+    static  — QDQ с диапазонами активаций по калибровочной выборке.
+    """
+    towers = {"student_tower": None, "item_tower": None}
+    if mode == "static":
+        users = X_users[torch.randperm(len(X_users))[:calib_size]].numpy()
+        items = X_items[torch.randperm(len(X_items))[:calib_size]].numpy()
+        towers["student_tower"] = lambda: TowerCalibrationReader([
+            {"num": u[:, :10], "code": u[:, -2].astype(np.int64), "prof": u[:, -1].astype(np.int64)}
+            for u in np.array_split(users, max(len(users) // batch, 1))
+        ])
+        towers["item_tower"] = lambda: TowerCalibrationReader([
+            {"text_embed": x} for x in np.array_split(items, max(len(items) // batch, 1))
+        ])
+
+    for tower, make_reader in towers.items():
+        src, dst = out_dir / f"{tower}.onnx", out_dir / f"{tower}.int8.onnx"
+        if mode == "dynamic":
+            quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+        else:
+            quantize_static(src, dst, make_reader(),
+                            quant_format=QuantFormat.QDQ,
+                            activation_type=QuantType.QInt8,
+                            weight_type=QuantType.QInt8)
+        logging.info(f"int8 ({mode}) сохранён: {dst.resolve()}")
+
 # ───────────────────────────────────────────────────────────────────────────────
 # MAIN
 # ───────────────────────────────────────────────────────────────────────────────
@@ -363,9 +494,15 @@ async def async_main():
     logging.basicConfig(level=logging.INFO,
                         format="%(levelname)s: %(message)s")
 
-    X_users, X_items, pairs, codes, profiles, num_stats = await load_tensors()
+    if args.export or not (args.data / "meta.json").exists():
+        await export_shards(args.data, args.chunk)
+    X_users, X_items, pairs, codes, profiles, num_stats = load_tensors(args.data)
     stu_best, itm_best = train(args, X_users, X_items, pairs)
-    export_onnx(stu_best, itm_best, codes, profiles, num_stats)
+    out_dir = model_registry.path / args.version
+    export_onnx(stu_best, itm_best, codes, profiles, num_stats, out_dir)
+    if args.quantize != "none":
+        quantize_onnx(out_dir, args.quantize, X_users, X_items, args.calib_size)
+    logging.info(f"Версия {args.version} готова: POST /model/activate/{args.version}")
 
 if __name__ == "__main__":
     asyncio.run(async_main())
\ No newline at end of file
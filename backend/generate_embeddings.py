@@ -2,54 +2,182 @@
 """
 generate_embeddings.py
 
-Скрипт для подсчёта эмбeддингов из текстовых полей курса
-и записи их в колонку text_embed (JSONB) модели Elective.
+Пайплайн подсчёта эмбеддингов из текстовых полей курса.
+
+За один проход:
+  * пропускает курсы, у которых sha256 исходного текста не изменился;
+  * кодирует оставшиеся тексты пачками (на CPU — в нескольких процессах);
+  * прогоняет результат через item tower (в пуле потоков инференса);
+  * после смены версии модели только перепроецирует сохранённые text_embed:
+    от версии зависит item tower, а не sentence-transformers;
+  * пишет text_embed, item_embed и text_hash bulk-UPDATE'ами;
+  * сбрасывает эмбеддинги курсов, у которых текст стал пустым.
+
+Запуск:
+
+    python -m backend.generate_embeddings [--batch-size 64] [--processes 4] [--force]
+
+Из API вызывается после /upload/all-upload и /upload/courses-info.
 """
 
 import os
 import sys
+import argparse
 import asyncio
-from typing import Optional
+import hashlib
+from logging import getLogger
+
+import numpy as np
 
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 # импорт вашей модели
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from backend.config import settings  # noqa
 from backend.database.database import Base, db_session  # noqa
 from backend.database.models.elective import Elective  # noqa
+from backend.logic.services.embedding_service.sentence import encode_texts  # noqa
+from backend.logic.services.inference_service.onnx import inference_service  # noqa
+from backend.utils.time_measure import time_log  # noqa
+
+name = __name__
+log = getLogger(name)
 
 
-# Используем модель all-MiniLM-L6-v2 для эмбеддингов
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+def source_text(elective) -> str:
+    return (elective.description or elective.text or "").strip()
 
-# --- Настройка асинхронного подключения к БД ---
-def get_embedding(text: str) -> Optional[list[float]]:
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@time_log(name)
+@db_session
+async def generate_embeddings(
+        db: AsyncSession,
+        batch_size: int | None = None,
+        processes: int | None = None,
+        force: bool = False,
+) -> int:
     """
-    Возвращает эмбеддинг текста с помощью all-MiniLM-L6-v2.
+    Пересчитывает эмбеддинги курсов, у которых изменился исходный текст;
+    у курсов с item_embed другой версии модели обновляет только item_embed.
+
+    Returns:
+        int: Количество обновлённых курсов (включая сброшенные).
     """
-    if not text.strip():
-        return None
-    embedding = embedder.encode(text, show_progress_bar=False)
-    return embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+    batch_size = batch_size or settings.EMBEDDINGS.BATCH_SIZE
+    processes = processes or settings.EMBEDDINGS.PROCESSES
+    if not inference_service.is_loaded:
+        await inference_service.aload()
+    bundle = inference_service.bundle
 
-@db_session
-async def main(db: AsyncSession):
-        result = await db.execute(select(Elective))
-        electives = result.scalars().all()
-        print(f"Найдено курсов: {len(electives)}")
-        updated = 0
-        for el in electives:
-            source = el.description or el.text or ""
-            embedding = get_embedding(source)
-            if embedding:
-                el.text_embed = embedding
-                updated += 1
+    rows = (await db.execute(
+        select(
+            Elective.id,
+            Elective.description,
+            Elective.text,
+            Elective.text_hash,
+            Elective.text_embed.isnot(None).label("has_text_embed"),
+            Elective.item_embed_version.is_distinct_from(bundle.cache_tag).label("stale_item_embed"),
+        )
+    )).all()
+
+    pending_ids, pending_texts, pending_hashes, emptied_ids, reproject_ids = [], [], [], [], []
+    for row in rows:
+        text = source_text(row)
+        if not text:
+            if row.text_hash is not None or row.has_text_embed:
+                emptied_ids.append(row.id)
+            continue
+        digest = text_hash(text)
+        if force or digest != row.text_hash or not row.has_text_embed:
+            pending_ids.append(row.id)
+            pending_texts.append(text)
+            pending_hashes.append(digest)
+        elif row.stale_item_embed:
+            reproject_ids.append(row.id)
+
+    log.info(
+        f"Найдено курсов: {len(rows)}, к пересчёту: {len(pending_ids)}, "
+        f"к перепроецированию: {len(reproject_ids)}, без текста: {len(emptied_ids)}"
+    )
+    if emptied_ids:
+        await db.execute(
+            update(Elective)
+            .where(Elective.id.in_(emptied_ids))
+            .values(text_embed=None, item_embed=None, item_embed_version=None, text_hash=None)
+        )
+    if not pending_ids and not reproject_ids:
         await db.commit()
-        print(f"Обновлено эмбеддингов: {updated}")
+        if emptied_ids:
+            bundle.invalidate_item_matrix()
+        return len(emptied_ids)
+
+    encoded = []
+    if pending_ids:
+        text_embeds = await asyncio.to_thread(encode_texts, pending_texts, batch_size, processes)
+        item_embeds = await inference_service.run(bundle.project_items, text_embeds)
+        encoded = [
+            {
+                "id": elective_id,
+                "text_embed": text_vec,
+                "item_embed": item_vec,
+                "item_embed_version": bundle.cache_tag,
+                "text_hash": digest,
+            }
+            for elective_id, text_vec, item_vec, digest in zip(
+                pending_ids, text_embeds.tolist(), item_embeds.tolist(), pending_hashes
+            )
+        ]
+
+    reprojected = []
+    for start in range(0, len(reproject_ids), batch_size):
+        cached = (await db.execute(
+            select(Elective.id, Elective.text_embed)
+            .where(Elective.id.in_(reproject_ids[start:start + batch_size]))
+        )).all()
+        item_embeds = await inference_service.run(
+            bundle.project_items, np.asarray([r.text_embed for r in cached], dtype=np.float32)
+        )
+        reprojected += [
+            {"id": r.id, "item_embed": item_vec, "item_embed_version": bundle.cache_tag}
+            for r, item_vec in zip(cached, item_embeds.tolist())
+        ]
+
+    # у пачек разный набор колонок — bulk UPDATE для каждой отдельно
+    for mappings in (encoded, reprojected):
+        for start in range(0, len(mappings), batch_size):
+            await db.execute(update(Elective), mappings[start:start + batch_size])
+    await db.commit()
+    bundle.invalidate_item_matrix()
+
+    log.info(
+        f"Пересчитано эмбеддингов: {len(encoded)}, перепроецировано: {len(reprojected)}, "
+        f"сброшено: {len(emptied_ids)}"
+    )
+    return len(encoded) + len(reprojected) + len(emptied_ids)
+
+
+def get_args():
+    p = argparse.ArgumentParser(prog="generate_embeddings")
+    p.add_argument("--batch-size", type=int, default=None,
+                   help="размер пачки (по умолчанию EMBEDDINGS.BATCH_SIZE)")
+    p.add_argument("--processes", type=int, default=None,
+                   help="сколько CPU-процессов использовать для кодирования "
+                        "(по умолчанию EMBEDDINGS.PROCESSES)")
+    p.add_argument("--force", action="store_true",
+                   help="пересчитать все курсы, игнорируя text_hash")
+    return p.parse_args()
+
 
 if __name__ == "__main__":
+    args = get_args()
     print("Запуск генерации эмбеддингов...")
-    asyncio.run(main())
\ No newline at end of file
+    updated = asyncio.run(generate_embeddings(
+        batch_size=args.batch_size, processes=args.processes, force=args.force
+    ))
+    print(f"Обновлено эмбеддингов: {updated}")
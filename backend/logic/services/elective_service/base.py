@@ -0,0 +1,6 @@
+from abc import ABC, abstractmethod
+
+
+class IElectiveService(ABC):
+    @abstractmethod
+    async def get_groups_electives(self, group_ids: list[int]): ...
@@ -1,15 +1,24 @@
-from sqlalchemy import select, func, case
+import asyncio
+
+from sqlalchemy import select, func, case, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload, with_loader_criteria
 
 from backend.database.database import db_session
 from backend.database.models.elective import Elective
 from backend.database.models.group import Group
-from backend.database.models.student import Student
+from backend.config import settings
+from backend.database.models.student import Student, student_group
 from backend.database.models.transfer import Transfer
+from backend.logic.services.elective_service.base import IElectiveService
+from backend.logic.services.elective_service.search import (
+    elective_search_index,
+    encode_query,
+    reciprocal_rank_fusion,
+)
 
 
-class ORMElectiveService:
+class ORMElectiveService(IElectiveService):
     @db_session
     async def get_all_electives(self, db: AsyncSession) -> list[dict]:
         """
@@ -100,6 +109,121 @@ class ORMElectiveService:
 
         return result
 
+    @staticmethod
+    async def free_spots(db: AsyncSession, elective_ids: list[int]) -> dict[int, int]:
+        """
+        Свободные места по элективам одним агрегирующим запросом:
+        сумма по группам одного типа, минимум по типам.
+        """
+        group_free_subq = (
+            select(
+                Group.elective_id.label("elective_id"),
+                Group.type.label("type"),
+                (Group.capacity - func.count(student_group.c.student_id)).label("free"),
+            )
+            .outerjoin(student_group, student_group.c.group_id == Group.id)
+            .where(Group.elective_id.in_(elective_ids))
+            .group_by(Group.id)
+            .subquery()
+        )
+        free_by_type_subq = (
+            select(
+                group_free_subq.c.elective_id,
+                func.sum(group_free_subq.c.free).label("free"),
+            )
+            .group_by(group_free_subq.c.elective_id, group_free_subq.c.type)
+            .subquery()
+        )
+        result = await db.execute(
+            select(
+                free_by_type_subq.c.elective_id,
+                func.min(free_by_type_subq.c.free),
+            ).group_by(free_by_type_subq.c.elective_id)
+        )
+        return {elective_id: free or 0 for elective_id, free in result.all()}
+
+    @db_session
+    async def get_groups_electives(self, group_ids: list[int], db: AsyncSession) -> dict[int, int]:
+        """{group_id: elective_id} для переданных групп одним запросом."""
+        if not group_ids:
+            return {}
+        result = await db.execute(
+            select(Group.id, Group.elective_id).where(Group.id.in_(set(group_ids)))
+        )
+        return dict(result.all())
+
+    @db_session
+    async def warm_up_search(self, db: AsyncSession):
+        """Загружает модель эмбеддингов запросов и матрицу text_embed до первого поиска."""
+        await asyncio.gather(
+            asyncio.to_thread(encode_query, "электив"), elective_search_index.ensure(db)
+        )
+
+    @db_session
+    async def search_electives(
+            self, query: str, db: AsyncSession, page: int = 1, limit: int = 20
+    ) -> dict:
+        """
+        Гибридный поиск по name/description/questions/text.
+
+        Лексические кандидаты берутся из GIN-индексов (tsvector + триграммы
+        по названию), семантические — по близости эмбеддинга запроса к
+        text_embed в памяти. Ранжирования склеиваются reciprocal rank fusion,
+        свободные места считаются только для текущей страницы.
+        """
+        query = query.strip()
+        limit = min(limit, settings.SEARCH.MAX_LIMIT)
+        if not query:
+            return {"total": 0, "page": page, "limit": limit, "items": []}
+
+        tsquery = func.websearch_to_tsquery("russian", query)
+        lexical_rank = func.ts_rank_cd(Elective.search_vector, tsquery) + func.similarity(
+            Elective.name, query
+        )
+        lexical_stmt = (
+            select(Elective.id)
+            .where(or_(Elective.search_vector.op("@@")(tsquery), Elective.name.op("%")(query)))
+            .order_by(lexical_rank.desc())
+            .limit(settings.SEARCH.LEXICAL_CANDIDATES)
+        )
+
+        query_vec, _ = await asyncio.gather(
+            asyncio.to_thread(encode_query, query), elective_search_index.ensure(db)
+        )
+        lexical = list((await db.scalars(lexical_stmt)).all())
+        semantic = elective_search_index.top(query_vec, settings.SEARCH.SEMANTIC_CANDIDATES)
+
+        ranked = reciprocal_rank_fusion(lexical, semantic, k=settings.SEARCH.RRF_K)
+        page_items = ranked[(page - 1) * limit: page * limit]
+        page_ids = [elective_id for elective_id, _ in page_items]
+        if not page_ids:
+            return {"total": len(ranked), "page": page, "limit": limit, "items": []}
+
+        electives_res = await db.execute(
+            select(Elective.id, Elective.name, Elective.description, Elective.cluster)
+            .where(Elective.id.in_(page_ids))
+        )
+        id2elective = {e.id: e for e in electives_res.all()}
+        free_spots = await self.free_spots(db, page_ids)
+
+        return {
+            "total": len(ranked),
+            "page": page,
+            "limit": limit,
+            "items": [
+                {
+                    "id": elective_id,
+                    "name": id2elective[elective_id].name,
+                    "description": id2elective[elective_id].description,
+                    "cluster": id2elective[elective_id].cluster,
+                    "free_spots": free_spots.get(elective_id, 0),
+                    "score": round(score, 6),
+                }
+                for elective_id, score in page_items
+                if elective_id in id2elective
+            ],
+        }
+
     @db_session
     async def get_groups_students_by_elective(self, elective_id: int, db: AsyncSession):
         query = (
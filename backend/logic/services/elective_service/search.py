@@ -0,0 +1,82 @@
+import asyncio
+import time
+from functools import lru_cache
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.database.models.elective import Elective
+from backend.logic.services.embedding_service.sentence import get_embedder
+
+log = getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def encode_query(query: str) -> np.ndarray:
+    """Нормированный эмбеддинг поискового запроса (повторные запросы берутся из кэша)."""
+    vec = get_embedder().encode([query], show_progress_bar=False, convert_to_numpy=True)[0]
+    return vec / (np.linalg.norm(vec) + 1e-9)
+
+
+class ElectiveSearchIndex:
+    """
+    Семантическая часть поиска: нормированная матрица text_embed всех
+    элективов в памяти процесса. Перечитывается из БД раз в SEARCH.INDEX_TTL
+    или после invalidate().
+    """
+
+    def __init__(self):
+        self.ids: Optional[np.ndarray] = None
+        self.matrix: Optional[np.ndarray] = None
+        self.loaded_at = 0.0
+        self.lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        age = time.monotonic() - self.loaded_at
+        return self.matrix is None or age > settings.SEARCH.INDEX_TTL
+
+    def invalidate(self):
+        self.loaded_at = 0.0
+
+    async def ensure(self, db: AsyncSession):
+        if not self.is_stale:
+            return
+        async with self.lock:
+            if not self.is_stale:
+                return
+            rows = (await db.execute(
+                select(Elective.id, Elective.text_embed).where(Elective.text_embed.isnot(None))
+            )).all()
+            matrix = np.asarray([r.text_embed for r in rows], dtype=np.float32).reshape(len(rows), -1)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-9
+            self.ids = np.asarray([r.id for r in rows], dtype=np.int64)
+            self.matrix = matrix
+            self.loaded_at = time.monotonic()
+            log.info(f"Индекс поиска элективов загружен: {len(rows)}")
+
+    def top(self, query_vec: np.ndarray, k: int) -> list[int]:
+        """id элективов по убыванию косинусной близости к запросу."""
+        if self.matrix is None or not len(self.matrix):
+            return []
+        scores = self.matrix @ query_vec
+        k = min(k, len(scores))
+        top_idx = np.argpartition(-scores, k - 1)[:k]
+        top_idx = top_idx[np.argsort(-scores[top_idx])]
+        return self.ids[top_idx].tolist()
+
+
+def reciprocal_rank_fusion(*rankings: list[int], k: int) -> list[tuple[int, float]]:
+    """Склеивает несколько ранжирований: score = Σ 1 / (k + позиция)."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for position, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + position)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+elective_search_index = ElectiveSearchIndex()
@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+import numpy as np
+
+from backend.config import settings
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """
+    Модель для эмбеддингов загружается один раз на процесс.
+
+    sentence-transformers (и torch) импортируются при первом вызове:
+    сервисы, которые только импортируют этот модуль, их не тянут.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(settings.EMBEDDINGS.MODEL, device="cpu")
+
+
+def encode_texts(texts: list[str], batch_size: int, processes: int) -> np.ndarray:
+    """
+    Кодирует тексты пачками. При processes > 1 используется пул процессов
+    sentence-transformers, каждый процесс считает на CPU.
+    """
+    embedder = get_embedder()
+    if processes > 1 and len(texts) > batch_size:
+        pool = embedder.start_multi_process_pool(target_devices=["cpu"] * processes)
+        try:
+            return embedder.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            embedder.stop_multi_process_pool(pool)
+    return embedder.encode(
+        texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True
+    )
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+
+from backend.logic.services.healthcheck.base import IHealthCheckService
+
+
+@dataclass
+class Readiness:
+    """
+    Этапы прогрева воркера. Пока не пройдены обязательные этапы,
+    /health/ready отдаёт 503; необязательные, которые не удалось пройти,
+    только переводят воркер в состояние degraded.
+    """
+
+    steps: dict[str, bool] = field(default_factory=dict)
+    required: frozenset[str] = frozenset()
+    ready: bool = False
+    degraded: bool = False
+
+    def start(self, required: tuple[str, ...], optional: tuple[str, ...] = ()):
+        self.steps = {step: False for step in (*required, *optional)}
+        self.required = frozenset(required)
+        self.ready = not self.required
+        self.degraded = False
+
+    def mark(self, step: str):
+        self.steps[step] = True
+        self.ready = all(self.steps[s] for s in self.required)
+
+    def fail(self, step: str):
+        """Необязательный этап не пройден: воркер обслуживает трафик без него."""
+        self.steps[step] = False
+        self.degraded = True
+
+
+readiness = Readiness()
+
+
+@dataclass
+class ReadinessHealthcheckService(IHealthCheckService):
+    state: Readiness = field(default_factory=lambda: readiness)
+
+    async def check(self) -> dict[str, bool]:
+        return {
+            self.__class__.__name__: self.state.ready,
+            "degraded": self.state.degraded,
+            **self.state.steps,
+        }
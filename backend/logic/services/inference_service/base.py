@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class IInferenceService(ABC):
+    @abstractmethod
+    def load(self): ...
+
+    @abstractmethod
+    async def prepare(self, version: str): ...
+
+    @abstractmethod
+    def swap(self, bundle): ...
+
+    @abstractmethod
+    async def recommend(self, student, top_k: int): ...
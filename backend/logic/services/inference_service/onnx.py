@@ -0,0 +1,364 @@
+import asyncio
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Callable, Optional
+
+import numpy as np
+import onnxruntime as ort
+
+from backend.config import settings
+from backend.logic.services.inference_service.base import IInferenceService
+from backend.logic.services.inference_service.batcher import MicroBatcher
+from backend.logic.services.inference_service.registry import ModelRegistry, model_registry
+
+log = getLogger(__name__)
+
+
+def top_k_items(
+        user_matrix: np.ndarray, item_matrix: np.ndarray, item_ids: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Топ-k элективов для пачки студентов одним матричным умножением.
+
+    Returns:
+        (ids, scores): две матрицы (B, k), отсортированные по убыванию score.
+    """
+    scores = user_matrix @ item_matrix.T  # (B, I)
+    k = min(k, scores.shape[1])
+    top_idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top_idx, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top_idx = np.take_along_axis(top_idx, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    return item_ids[top_idx], top_scores
+
+
+def student_features(student) -> Optional[tuple[list[float], str, str]]:
+    """
+    Сырые признаки студента для student tower: (числовые признаки, sp_code, sp_profile).
+
+    Принимает объект Student или строку с полями sp_code, sp_profile,
+    competencies, diagnostics. Возвращает None, если признаков нет.
+    """
+    if not student.competencies or not student.diagnostics:
+        return None
+    num = [*student.competencies.values(), *student.diagnostics.values()]
+    return num, student.sp_code, student.sp_profile
+
+
+def _session_options() -> ort.SessionOptions:
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = settings.INFERENCE.INTRA_OP_THREADS
+    options.inter_op_num_threads = settings.INFERENCE.INTER_OP_THREADS
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+@dataclass
+class ModelBundle:
+    """
+    Всё, что относится к одной версии модели: словари, статистики,
+    ONNX-сессии и матрица элективов, посчитанная её item tower.
+    Подменяется целиком, поэтому запрос никогда не видит смесь версий.
+    """
+
+    version: str
+    code2idx: dict[str, int]
+    prof2idx: dict[str, int]
+    mu_vec: np.ndarray
+    sigma_vec: np.ndarray
+    student_sess: ort.InferenceSession
+    item_sess: ort.InferenceSession
+    quantized: bool = False
+
+    item_ids: Optional[np.ndarray] = None
+    item_matrix: Optional[np.ndarray] = None
+    item_fingerprint: str = ""
+    item_matrix_loaded_at: float = 0.0
+
+    @classmethod
+    def load(
+            cls, registry: ModelRegistry, version: str, quantized: Optional[bool] = None
+    ) -> "ModelBundle":
+        """
+        Загружает версию из реестра. При quantized (по умолчанию
+        INFERENCE.QUANTIZED) берутся int8-варианты башен, если они есть.
+        """
+        if quantized is None:
+            quantized = settings.INFERENCE.QUANTIZED
+        base = registry.version_path(version)
+        if quantized and not registry.has_quantized(version):
+            log.warning(f"У версии {version} нет int8-моделей, загружается fp32")
+            quantized = False
+        code_list = json.loads((base / "code_list.json").read_text(encoding="utf-8"))
+        profile_list = json.loads((base / "profile_list.json").read_text(encoding="utf-8"))
+        stats = json.loads((base / "num_stats.json").read_text(encoding="utf-8"))
+
+        def create_session(tower: str) -> ort.InferenceSession:
+            return ort.InferenceSession(
+                str(registry.tower_path(version, tower, quantized)),
+                sess_options=_session_options(),
+                providers=["CPUExecutionProvider"],
+            )
+
+        bundle = cls(
+            version=version,
+            code2idx={c: i for i, c in enumerate(code_list)},
+            prof2idx={p: i for i, p in enumerate(profile_list)},
+            mu_vec=np.array(stats["mu"], dtype=np.float32).reshape(1, -1),
+            sigma_vec=np.array(stats["sigma"], dtype=np.float32).reshape(1, -1) + 1e-9,
+            student_sess=create_session("student_tower"),
+            item_sess=create_session("item_tower"),
+            quantized=quantized,
+        )
+        log.info(f"ONNX-модели версии {bundle.cache_tag} загружены из {base}")
+        return bundle
+
+    @property
+    def cache_tag(self) -> str:
+        """Метка для кэшей эмбеддингов: int8- и fp32-варианты дают разные векторы."""
+        return f"{self.version}+int8" if self.quantized else self.version
+
+    def warm_up(self):
+        """Пробный run() обеих башен, чтобы первый запрос не платил за инициализацию."""
+        code = next(iter(self.code2idx))
+        profile = next(iter(self.prof2idx))
+        self.embed_rows([([0.0] * self.mu_vec.shape[1], code, profile)])
+        dim = self.item_sess.get_inputs()[0].shape[1]
+        self.project_items(np.zeros((1, dim), dtype=np.float32))
+
+    def embed_rows(self, rows: list[tuple[list[float], str, str]]) -> list[Optional[np.ndarray]]:
+        """
+        Один run() student tower для пачки сырых признаков (num, sp_code, sp_profile).
+        Для кодов/профилей, неизвестных этой версии, возвращает None.
+        """
+        known, nums, codes, profs = [], [], [], []
+        for i, (num, sp_code, sp_profile) in enumerate(rows):
+            code_idx = self.code2idx.get(sp_code)
+            prof_idx = self.prof2idx.get(sp_profile)
+            if code_idx is None or prof_idx is None:
+                continue
+            known.append(i)
+            nums.append(num)
+            codes.append(code_idx)
+            profs.append(prof_idx)
+
+        result: list[Optional[np.ndarray]] = [None] * len(rows)
+        if not known:
+            return result
+
+        num_feats = (np.asarray(nums, dtype=np.float32) - self.mu_vec) / self.sigma_vec
+        inputs = self.student_sess.get_inputs()
+        embeds = self.student_sess.run(None, {
+            inputs[0].name: num_feats,
+            inputs[1].name: np.asarray(codes, dtype=np.int64),
+            inputs[2].name: np.asarray(profs, dtype=np.int64),
+        })[0]  # shape=(B, D)
+        for i, vec in zip(known, embeds):
+            result[i] = vec
+        return result
+
+    def embed_students(self, students) -> dict[int, list[float]]:
+        """Считает эмбеддинги пачки студентов одним run()."""
+        ids, rows = [], []
+        for student in students:
+            features = student_features(student)
+            if features is not None:
+                ids.append(student.id)
+                rows.append(features)
+        return {
+            student_id: vec.tolist()
+            for student_id, vec in zip(ids, self.embed_rows(rows))
+            if vec is not None
+        }
+
+    def project_items(self, text_embeds) -> np.ndarray:
+        """Прогоняет матрицу text_embed (I, 384) через item tower."""
+        return self.item_sess.run(
+            None,
+            {self.item_sess.get_inputs()[0].name: np.asarray(text_embeds, dtype=np.float32)},
+        )[0]
+
+    @property
+    def item_matrix_is_stale(self) -> bool:
+        age = time.monotonic() - self.item_matrix_loaded_at
+        return self.item_matrix is None or age > settings.INFERENCE.ITEM_MATRIX_TTL
+
+    def set_item_matrix(self, item_ids: list[int], item_matrix: np.ndarray):
+        self.item_ids = np.asarray(item_ids, dtype=np.int64)
+        self.item_matrix = np.ascontiguousarray(item_matrix, dtype=np.float32)
+        self.item_matrix_loaded_at = time.monotonic()
+        self.item_fingerprint = hashlib.sha1(
+            self.item_ids.tobytes() + self.item_matrix.tobytes()
+        ).hexdigest()
+
+    def invalidate_item_matrix(self):
+        """Матрица будет перечитана из БД при следующем запросе."""
+        self.item_matrix_loaded_at = 0.0
+
+
+class ONNXInferenceService(IInferenceService):
+    """
+    Инференс student/item tower через ONNX Runtime.
+
+    Сессии создаются один раз (в lifespan приложения) с настроенными
+    пулами потоков и оптимизациями графа. Сам инференс выполняется в
+    отдельном пуле потоков, чтобы не блокировать event loop, а
+    конкурентные запросы рекомендаций склеиваются в один run() и одно
+    матричное умножение с матрицей элективов.
+
+    Активная версия модели хранится в ModelBundle и подменяется атомарно:
+    новая версия загружается и прогревается в фоне, запросы в полёте
+    дорабатывают на старой.
+    """
+
+    def __init__(self, registry: ModelRegistry = model_registry):
+        self.registry = registry
+        self.bundle: Optional[ModelBundle] = None
+        self.item_matrix_lock = asyncio.Lock()
+        # версии, которые сейчас загружаются: прогрев и watch() делят одну загрузку
+        self._preparing: dict[str, asyncio.Future] = {}
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.INFERENCE.EXECUTOR_WORKERS,
+            thread_name_prefix="onnx",
+        )
+        self.score_batcher = MicroBatcher(
+            self._score_rows,
+            self.executor,
+            max_batch=settings.INFERENCE.MAX_BATCH,
+            max_wait=settings.INFERENCE.MAX_WAIT_MS / 1000,
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.bundle is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.bundle.version if self.bundle is not None else None
+
+    def load_bundle(self, version: str) -> ModelBundle:
+        bundle = ModelBundle.load(self.registry, version)
+        bundle.warm_up()
+        return bundle
+
+    def load(self):
+        """Загружает активную версию модели из реестра."""
+        self.bundle = self.load_bundle(self.registry.active_version())
+
+    async def aload(self):
+        await self.run(self.load)
+
+    async def prepare(self, version: str) -> ModelBundle:
+        """
+        Загружает и прогревает версию в пуле потоков, не трогая активную.
+        Конкурентные вызовы для одной версии ждут одну и ту же загрузку.
+        """
+        future = self._preparing.get(version)
+        if future is None:
+            future = asyncio.ensure_future(self.run(self.load_bundle, version))
+            self._preparing[version] = future
+            future.add_done_callback(lambda _: self._preparing.pop(version, None))
+        return await asyncio.shield(future)
+
+    def swap(self, bundle: ModelBundle):
+        previous, self.bundle = self.version, bundle
+        log.info(f"Активная версия модели: {previous} -> {bundle.version}")
+
+    def current(self) -> ModelBundle:
+        """Активная версия; для скриптов, которые работают без lifespan приложения."""
+        if self.bundle is None:
+            self.load()
+        return self.bundle
+
+    async def close(self):
+        await self.score_batcher.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args):
+        """Выполняет func в пуле потоков инференса."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def warm_up_scoring(self):
+        """
+        Пробный запрос через MicroBatcher: прогревает пул потоков,
+        student tower и умножение на матрицу элективов.
+        """
+        bundle = self.current()
+        features = (
+            [0.0] * bundle.mu_vec.shape[1],
+            next(iter(bundle.code2idx)),
+            next(iter(bundle.prof2idx)),
+        )
+        await self.score_batcher.submit((None, None, features, 1))
+
+    def _score_rows(self, rows: list[tuple]) -> list[tuple]:
+        """
+        Скоринг пачки запросов: один run() student tower для тех, у кого
+        нет кэшированного эмбеддинга текущей версии, и одно матричное
+        умножение (B, D) @ (D, I).
+
+        rows: [(embed | None, embed_version | None, features | None, top_k), ...]
+        Возвращает [(version, embed | None, [(item_id, score), ...]), ...].
+        """
+        bundle = self.bundle
+
+        embeds = [
+            embed if embed is not None and embed_version == bundle.cache_tag else None
+            for embed, embed_version, _, _ in rows
+        ]
+        to_embed = [
+            i for i, embed in enumerate(embeds)
+            if embed is None and rows[i][2] is not None
+        ]
+        if to_embed:
+            computed = bundle.embed_rows([rows[i][2] for i in to_embed])
+            for i, vec in zip(to_embed, computed):
+                embeds[i] = vec
+
+        results = [(bundle.cache_tag, None, [])] * len(rows)
+        scored = [i for i, embed in enumerate(embeds) if embed is not None]
+        if not scored or bundle.item_matrix is None:
+            return results
+
+        user_matrix = np.asarray([embeds[i] for i in scored], dtype=np.float32)
+        max_k = max(rows[i][3] for i in scored)
+        top_ids, top_scores = top_k_items(
+            user_matrix, bundle.item_matrix, bundle.item_ids, max_k
+        )
+
+        for row, i in enumerate(scored):
+            top_k = rows[i][3]
+            top = list(zip(top_ids[row, :top_k].tolist(), top_scores[row, :top_k].tolist()))
+            results[i] = (bundle.cache_tag, user_matrix[row].tolist(), top)
+        return results
+
+    async def recommend(
+            self, student, top_k: int
+    ) -> tuple[str, Optional[list[float]], list[tuple[int, float]]]:
+        """
+        Топ-k элективов для студента по кэшированному эмбеддингу или признакам.
+
+        Конкурентные вызовы копятся MicroBatcher'ом до INFERENCE.MAX_WAIT_MS
+        или INFERENCE.MAX_BATCH запросов и считаются одним батчем.
+        Возвращает версию модели, эмбеддинг студента (для записи в кэш)
+        и пары (item_id, score).
+        """
+        if not self.is_loaded:
+            await self.aload()
+        features = student_features(student)
+        if student.embed is None and features is None:
+            return self.bundle.cache_tag, None, []
+        return await self.score_batcher.submit(
+            (student.embed, student.embed_version, features, top_k)
+        )
+
+
+inference_service = ONNXInferenceService()
@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from backend.config import PROJECT_PATH, settings
+from backend.logic.services.zexceptions.inference import ModelVersionNotFound
+
+MODELS_PATH = PROJECT_PATH.parent / settings.INFERENCE.MODELS_PATH
+
+
+class ModelRegistry:
+    """
+    Каталог версионированных артефактов рекомендательной модели.
+
+    Каждая версия — подкаталог с student_tower.onnx, item_tower.onnx,
+    num_stats.json, code_list.json и profile_list.json. Активная версия
+    записана в файле ACTIVE, предыдущая (для отката) — в PREVIOUS.
+    Рядом с башнями могут лежать их int8-варианты (*.int8.onnx).
+    """
+
+    ACTIVE = "ACTIVE"
+    PREVIOUS = "PREVIOUS"
+    REQUIRED_FILES = (
+        "student_tower.onnx",
+        "item_tower.onnx",
+        "num_stats.json",
+        "code_list.json",
+        "profile_list.json",
+    )
+    TOWERS = ("student_tower", "item_tower")
+    QUANTIZED_SUFFIX = ".int8.onnx"
+
+    def __init__(self, path: Path = MODELS_PATH):
+        self.path = path
+
+    def versions(self) -> list[str]:
+        if not self.path.is_dir():
+            return []
+        return sorted(
+            p.name for p in self.path.iterdir()
+            if p.is_dir() and all((p / f).exists() for f in self.REQUIRED_FILES)
+        )
+
+    def version_path(self, version: str) -> Path:
+        if version not in self.versions():
+            raise ModelVersionNotFound(version)
+        return self.path / version
+
+    def tower_path(self, version: str, tower: str, quantized: bool = False) -> Path:
+        suffix = self.QUANTIZED_SUFFIX if quantized else ".onnx"
+        return self.version_path(version) / f"{tower}{suffix}"
+
+    def has_quantized(self, version: str) -> bool:
+        return all(self.tower_path(version, t, quantized=True).exists() for t in self.TOWERS)
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        pointer = self.path / name
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding="utf-8").strip() or None
+
+    def _write_pointer(self, name: str, version: str):
+        # запись через временный файл + os.replace атомарна для читателей
+        tmp = self.path / f".{name}.tmp"
+        tmp.write_text(version, encoding="utf-8")
+        os.replace(tmp, self.path / name)
+
+    def active_version(self) -> str:
+        version = self._read_pointer(self.ACTIVE)
+        if version is not None:
+            return version
+        versions = self.versions()
+        if not versions:
+            raise ModelVersionNotFound(self.ACTIVE)
+        return versions[-1]
+
+    def previous_version(self) -> Optional[str]:
+        return self._read_pointer(self.PREVIOUS)
+
+    def set_active(self, version: str):
+        self.version_path(version)
+        current = self._read_pointer(self.ACTIVE)
+        if current is not None and current != version:
+            self._write_pointer(self.PREVIOUS, current)
+        self._write_pointer(self.ACTIVE, version)
+
+
+model_registry = ModelRegistry()
@@ -12,3 +12,8 @@ class IStudentService(ABC):
     async def get_student_groups_for_elective(
             self, student_id: int, elective_id: int
     ): ...
+
+    @abstractmethod
+    async def get_students_groups_for_electives(
+            self, pairs: list[tuple[int, int]]
+    ): ...
@@ -0,0 +1,48 @@
+import numpy as np
+
+SIGNALS = ("cluster_popularity", "peers")
+
+# источник score: двухбашенная модель или запасной рекомендатель
+SCORE_SOURCES = ("similarity", "co_enrollment")
+
+
+def explain_recommendations(
+        score: np.ndarray,
+        cluster_share: np.ndarray,
+        peer_share: np.ndarray,
+        peer_count: np.ndarray,
+        source: str = "similarity",
+) -> list[dict]:
+    """
+    Объяснения для всей пачки рекомендаций сразу.
+
+    Каждый сигнал нормируется по пачке (min-max), и для каждого электива
+    сигналы сортируются по вкладу: так видно, чем он выделяется среди
+    остальных рекомендаций. Пачка — это уже отданный студенту топ,
+    а не все кандидаты.
+
+    Args:
+        score: (N,) score рекомендателя: косинусная близость студента и
+            электива или балл по совместным записям (см. source).
+        cluster_share: (N,) доля студентов направления в кластере электива.
+        peer_share: (N,) доля студентов направления на самом элективе.
+        peer_count: (N,) число студентов направления на элективе.
+        source: откуда взят score, одно из SCORE_SOURCES.
+    """
+    signals = (source, *SIGNALS)
+    raw = np.stack([score, cluster_share, peer_share], axis=1).astype(np.float32)  # (N, 3)
+    span = raw.max(axis=0) - raw.min(axis=0)
+    strength = np.where(span > 0, (raw - raw.min(axis=0)) / np.where(span > 0, span, 1), 0.0)
+    order = np.argsort(-strength, axis=1)
+
+    return [
+        {
+            "source": source,
+            source: round(float(score[i]), 4),
+            "cluster_popularity": round(float(cluster_share[i]) * 100, 1),
+            "peers": int(peer_count[i]),
+            "peers_percent": round(float(peer_share[i]) * 100, 1),
+            "top_signals": [signals[j] for j in order[i] if strength[i, j] > 0],
+        }
+        for i in range(len(raw))
+    ]
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+
+from backend.config import settings
+
+log = getLogger(__name__)
+
+
+@dataclass
+class CoEnrollmentModel:
+    """
+    Матрицы запасного рекомендателя в CSR-виде (indptr/indices/data):
+    элективы студентов, совместные записи «электив → электив» и
+    популярность элективов по направлениям.
+    """
+
+    student_ids: np.ndarray       # (U,) отсортированные id студентов
+    elective_ids: np.ndarray      # (I,) отсортированные id элективов
+    student_indptr: np.ndarray    # (U+1,)
+    student_indices: np.ndarray   # индексы элективов студента
+    co_indptr: np.ndarray         # (I+1,)
+    co_indices: np.ndarray
+    co_data: np.ndarray           # нормированное число совместных записей
+    codes: np.ndarray             # (P,) отсортированные sp_code
+    popularity: np.ndarray        # (P, I) доля студентов направления на элективе
+    global_popularity: np.ndarray  # (I,)
+
+    @classmethod
+    def build(
+            cls, student_ids: np.ndarray, elective_ids: np.ndarray, sp_codes: np.ndarray,
+            chunk: int = 4096,
+    ) -> "CoEnrollmentModel":
+        """
+        Args:
+            student_ids, elective_ids, sp_codes: (K,) пары «студент — электив»
+                и направление студента.
+        """
+        s_ids, s_inv = np.unique(student_ids, return_inverse=True)
+        e_ids, e_inv = np.unique(elective_ids, return_inverse=True)
+        n_users, n_items = len(s_ids), len(e_ids)
+
+        keys, first = np.unique(s_inv * n_items + e_inv, return_index=True)
+        users, items = keys // n_items, keys % n_items  # отсортированы по студенту
+        student_indptr = np.concatenate([[0], np.cumsum(np.bincount(users, minlength=n_users))])
+
+        # совместные записи A^T A порциями студентов, косинусная нормировка
+        co = np.zeros((n_items, n_items), dtype=np.float32)
+        for start in range(0, n_users, chunk):
+            lo, hi = student_indptr[start], student_indptr[min(start + chunk, n_users)]
+            block = np.zeros((min(chunk, n_users - start), n_items), dtype=np.float32)
+            block[users[lo:hi] - start, items[lo:hi]] = 1.0
+            co += block.T @ block
+        item_count = np.diag(co).copy()
+        np.fill_diagonal(co, 0.0)
+        co /= np.sqrt(np.outer(item_count, item_count)) + 1e-9
+        rows, cols = np.nonzero(co)
+        co_indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_items))])
+
+        codes, code_inv = np.unique(np.asarray(sp_codes)[first], return_inverse=True)
+        popularity = np.zeros((len(codes), n_items), dtype=np.float32)
+        np.add.at(popularity, (code_inv, items), 1.0)
+        global_popularity = popularity.sum(axis=0)
+        popularity /= popularity.sum(axis=1, keepdims=True) + 1e-9
+        global_popularity /= global_popularity.sum() + 1e-9
+
+        return cls(
+            student_ids=s_ids,
+            elective_ids=e_ids,
+            student_indptr=student_indptr,
+            student_indices=items,
+            co_indptr=co_indptr,
+            co_indices=cols,
+            co_data=co[rows, cols],
+            codes=codes,
+            popularity=popularity,
+            global_popularity=global_popularity,
+        )
+
+    def _row(self, sorted_ids: np.ndarray, value) -> Optional[int]:
+        pos = int(np.searchsorted(sorted_ids, value))
+        if pos < len(sorted_ids) and sorted_ids[pos] == value:
+            return pos
+        return None
+
+    def recommend(self, student_id: int, sp_code: Optional[str], k: int) -> list[tuple[int, float]]:
+        """
+        Топ-k элективов: соседи по совместным записям текущих элективов
+        студента плюс популярность на его направлении (или общая).
+        Свои элективы студента исключаются.
+        """
+        scores = np.zeros(len(self.elective_ids), dtype=np.float32)
+        own = np.empty(0, dtype=np.int64)
+
+        user = self._row(self.student_ids, student_id)
+        if user is not None:
+            own = self.student_indices[self.student_indptr[user]:self.student_indptr[user + 1]]
+            starts, ends = self.co_indptr[own], self.co_indptr[own + 1]
+            if len(own):
+                slices = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+                np.add.at(scores, self.co_indices[slices], self.co_data[slices])
+                scores /= scores.max() + 1e-9
+
+        code = self._row(self.codes, sp_code) if sp_code is not None else None
+        popularity = self.popularity[code] if code is not None else self.global_popularity
+        scores += settings.RECOMMENDATION.FALLBACK_POPULARITY_WEIGHT * popularity / (popularity.max() + 1e-9)
+        scores[own] = -np.inf
+
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return list(zip(self.elective_ids[top].tolist(), scores[top].tolist()))
+
+
+class FallbackRecommender:
+    """
+    Рекомендации без ONNX-признаков. Модель пересобирается целиком после
+    загрузок и подменяется атомарно, запросы читают только память процесса.
+    """
+
+    def __init__(self):
+        self.model: Optional[CoEnrollmentModel] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def rebuild(self, student_ids: np.ndarray, elective_ids: np.ndarray, sp_codes: np.ndarray):
+        if not len(student_ids):
+            self.model = None
+            return
+        self.model = CoEnrollmentModel.build(student_ids, elective_ids, sp_codes)
+        log.info(
+            f"Запасной рекомендатель пересобран: students={len(self.model.student_ids)} "
+            f"electives={len(self.model.elective_ids)} co_nnz={len(self.model.co_data)}"
+        )
+
+    def recommend(self, student_id: int, sp_code: Optional[str], k: int) -> list[tuple[int, float]]:
+        model = self.model
+        if model is None:
+            return []
+        return model.recommend(student_id, sp_code, k)
+
+
+fallback_recommender = FallbackRecommender()
@@ -1,31 +1,34 @@
-import json
+import asyncio
+import hashlib
 from logging import getLogger
-from pathlib import Path
 from typing import List, Optional
 
-import onnxruntime as ort
-from sqlalchemy import select, func, exists
+import numpy as np
+from sqlalchemy import select, func, exists, update, delete, insert, case, or_, and_, not_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from backend.config import settings
 from backend.database.database import db_session
 from backend.database.models.elective import Elective
 from backend.database.models.group import Group
+from backend.database.models.recommendation import StudentRecommendation
+from backend.database.models.statistic import DirectionCourseStatistic
 from backend.database.models.student import Student
 from backend.database.models.student import student_group
 from backend.database.models.transfer import Transfer
+from backend.logic.services.elective_service.orm import ORMElectiveService
+from backend.logic.services.inference_service.onnx import (
+    ModelBundle,
+    inference_service,
+    top_k_items,
+)
 from backend.logic.services.student_service.base import IStudentService
+from backend.logic.services.student_service.explain import explain_recommendations
+from backend.logic.services.student_service.fallback import fallback_recommender
 
 log = getLogger(__name__)
 
-# Globals for lazy loading
-code2idx = {}
-prof2idx = {}
-onnx_sess = None
-item_sess = None
-mu_vec = None
-sigma_vec = None
-
 
 class ORMStudentService(IStudentService):
     @db_session  # TODO: переделать на EXISTS для оптимизации
@@ -94,62 +97,32 @@ class ORMStudentService(IStudentService):
 
     @db_session
     async def get_staistic(self, direction: str, db: AsyncSession):
-        total_students_query = select(func.count(Student.id)).where(
-            Student.sp_code == direction
-        )
-        total_students = await db.scalar(total_students_query)
-
-        if not total_students:
-            return []
-
-        # Сначала получаем данные по курсам
-        subquery = (
-            select(
-                Elective.cluster,
-                Elective.id,
-                Elective.name,
-                func.count(Student.id.distinct()).label("course_student_count"),
+        """
+        Топ кластеров и курсов направления из сводной таблицы
+        direction_course_statistic (одно чтение по первичному ключу).
+        """
+        result = await db.execute(
+            select(DirectionCourseStatistic).where(
+                DirectionCourseStatistic.sp_code == direction
             )
-            .select_from(Student)
-            .join(student_group)
-            .join(Group)
-            .join(Elective)
-            .where(Student.sp_code == direction)
-            .group_by(Elective.cluster, Elective.id, Elective.name)
-            .subquery()
         )
+        rows = result.scalars().all()
+        if not rows:
+            return []
 
-        # Затем агрегируем по кластерам
-        stmt = select(
-            subquery.c.cluster,
-            func.sum(subquery.c.course_student_count).label("total_students"),
-            func.json_agg(
-                func.json_build_object(
-                    "id",
-                    subquery.c.id,
-                    "name",
-                    subquery.c.name,
-                    "student_count",
-                    subquery.c.course_student_count,
-                )
-            ).label("courses"),
-        ).group_by(subquery.c.cluster)
-
-        result = await db.execute(stmt)
-        clusters_data = result.all()
+        total_students = rows[0].direction_total
+        clusters: dict[str, list[DirectionCourseStatistic]] = {}
+        for row in rows:
+            clusters.setdefault(row.cluster, []).append(row)
 
         recommendations = []
-        for cluster, students_count, courses in clusters_data:
-            sorted_courses = sorted(
-                [dict(c) for c in courses],
-                key=lambda x: x["student_count"],
-                reverse=True,
-            )[:5]
-
+        for cluster, courses in clusters.items():
+            students_count = sum(c.student_count for c in courses)
             cluster_percent = round((students_count / total_students) * 100, 1)
             if cluster_percent <= 0:
                 continue
 
+            top_courses = sorted(courses, key=lambda c: c.student_count, reverse=True)[:5]
             recommendations.append(
                 {
                     "name": cluster,
@@ -157,25 +130,104 @@ class ORMStudentService(IStudentService):
                     "totalStudents": students_count,
                     "topCourses": [
                         {
-                            **course,
+                            "id": course.elective_id,
+                            "name": course.name,
+                            "student_count": course.student_count,
                             "cluster": cluster,
                             "percent": round(
-                                (course["student_count"] / total_students) * 100, 1
+                                (course.student_count / total_students) * 100, 1
                             ),
-                            "free_spots": (
-                                (await db.scalar(
-                                    select(func.sum(Group.capacity))
-                                    .where(Group.elective_id == course["id"])
-                                )) or 0
-                            ) - course["student_count"],
+                            "free_spots": course.capacity - course.student_count,
                         }
-                        for course in sorted_courses
+                        for course in top_courses
                     ],
                 }
             )
 
         return sorted(recommendations, key=lambda x: x["percent"], reverse=True)[:5]
 
+    @db_session
+    async def refresh_statistics(self, db: AsyncSession):
+        """
+        Пересчитывает direction_course_statistic одним INSERT ... SELECT:
+        число студентов направления на каждом элективе, сумма вместимостей
+        его групп и размер направления.
+
+        Пересчёты сериализуются advisory-локом. Если один пересчёт уже ждёт
+        своей очереди, новый не запускается: ожидающий начнёт после текущего
+        и увидит все изменения, закоммиченные к этому моменту.
+        """
+        queued = func.hashtext("direction_course_statistic:queued")
+        if not await db.scalar(select(func.pg_try_advisory_lock(queued))):
+            log.info("Пересчёт статистики уже в очереди, пропускаем")
+            return
+        try:
+            await db.execute(
+                select(func.pg_advisory_xact_lock(func.hashtext("direction_course_statistic")))
+            )
+        finally:
+            await db.execute(select(func.pg_advisory_unlock(queued)))
+
+        course_counts = (
+            select(
+                Student.sp_code,
+                Elective.id.label("elective_id"),
+                Elective.cluster,
+                Elective.name,
+                func.count(Student.id.distinct()).label("student_count"),
+            )
+            .select_from(Student)
+            .join(student_group)
+            .join(Group)
+            .join(Elective)
+            .group_by(Student.sp_code, Elective.id, Elective.cluster, Elective.name)
+            .subquery()
+        )
+        capacities = (
+            select(
+                Group.elective_id,
+                func.coalesce(func.sum(Group.capacity), 0).label("capacity"),
+            )
+            .group_by(Group.elective_id)
+            .subquery()
+        )
+        directions = (
+            select(Student.sp_code, func.count(Student.id).label("direction_total"))
+            .group_by(Student.sp_code)
+            .subquery()
+        )
+        stats = (
+            select(
+                course_counts.c.sp_code,
+                course_counts.c.elective_id,
+                course_counts.c.cluster,
+                course_counts.c.name,
+                course_counts.c.student_count,
+                func.coalesce(capacities.c.capacity, 0),
+                directions.c.direction_total,
+            )
+            .join(directions, directions.c.sp_code == course_counts.c.sp_code)
+            .outerjoin(capacities, capacities.c.elective_id == course_counts.c.elective_id)
+        )
+
+        await db.execute(delete(DirectionCourseStatistic))
+        await db.execute(
+            insert(DirectionCourseStatistic).from_select(
+                [
+                    "sp_code",
+                    "elective_id",
+                    "cluster",
+                    "name",
+                    "student_count",
+                    "capacity",
+                    "direction_total",
+                ],
+                stats,
+            )
+        )
+        await db.commit()
+        log.info("Статистика по направлениям пересчитана")
+
     @db_session
     async def get_student_groups_for_elective(
             self, student_id: int, elective_id: int, db: AsyncSession
@@ -192,88 +244,160 @@ class ORMStudentService(IStudentService):
         groups = result.unique().scalars().all()
         return groups
 
+    @db_session
+    async def get_students_groups_for_electives(
+            self, pairs: list[tuple[int, int]], db: AsyncSession
+    ) -> dict[tuple[int, int], list[int]]:
+        """
+        Группы студентов на элективах одним запросом.
+
+        Args:
+            pairs: пары (student_id, elective_id).
+
+        Returns:
+            {(student_id, elective_id): [group_id, ...]} — только для пар,
+            где студент записан хотя бы в одну группу.
+        """
+        if not pairs:
+            return {}
+        result = await db.execute(
+            select(student_group.c.student_id, Group.elective_id, Group.id)
+            .join(Group, Group.id == student_group.c.group_id)
+            .where(tuple_(student_group.c.student_id, Group.elective_id).in_(set(pairs)))
+        )
+        groups: dict[tuple[int, int], list[int]] = {}
+        for student_id, elective_id, group_id in result.all():
+            groups.setdefault((student_id, elective_id), []).append(group_id)
+        return groups
+
+    @staticmethod
+    async def load_item_matrix(db: AsyncSession, bundle: ModelBundle):
+        """
+        Загружает в bundle матрицу элективов. Сохранённый item_embed берётся,
+        только если он посчитан этой же версией модели, остальные элективы
+        проецируются через её item tower на месте.
+        """
+        res_els = await db.execute(
+            select(
+                Elective.id,
+                Elective.text_embed,
+                case(
+                    (Elective.item_embed_version == bundle.cache_tag, Elective.item_embed),
+                    else_=None,
+                ).label("item_embed"),
+            ).where(Elective.text_embed.isnot(None))
+        )
+        electives = res_els.all()
+        if not electives:
+            return
+
+        missing = [i for i, e in enumerate(electives) if e.item_embed is None]
+        projected = {}
+        if missing:
+            projected = dict(zip(missing, await inference_service.run(
+                bundle.project_items,
+                [electives[i].text_embed for i in missing],
+            )))
+        item_matrix = np.asarray(
+            [projected[i] if i in projected else e.item_embed for i, e in enumerate(electives)],
+            dtype=np.float32,
+        )
+        bundle.set_item_matrix([e.id for e in electives], item_matrix)
+
+    @db_session
+    async def load_item_matrix_for(self, bundle: ModelBundle, db: AsyncSession):
+        await self.load_item_matrix(db, bundle)
+
+    async def _ensure_item_matrix(self, db: AsyncSession) -> ModelBundle:
+        """Возвращает активную версию модели с актуальной матрицей элективов."""
+        bundle = inference_service.current()
+        if not bundle.item_matrix_is_stale:
+            return bundle
+
+        async with inference_service.item_matrix_lock:
+            if bundle.item_matrix_is_stale:
+                await self.load_item_matrix(db, bundle)
+        return bundle
+
     @db_session
     async def get_student_recommendation(
             self, student_id: int, db: AsyncSession, top_k: int = 10
     ):
         """
-        Получить рекомендации для студента по ID с помощью ONNX-модели,
-        используя лени­вую инициализацию code2idx, prof2idx и onnx_sess.
+        Получить рекомендации для студента по ID.
+
+        Сначала читается предпосчитанный топ из student_recommendation; если
+        его нет, топ считается онлайн с помощью ONNX-модели. В обоих случаях
+        элективы без свободных мест отфильтровываются по живым данным.
+        Студентам без признаков или с кодом/профилем, неизвестным модели,
+        рекомендации даёт запасной рекомендатель (совместные записи и
+        популярность на направлении). К каждой рекомендации прикладывается объяснение (близость, популярность
+        кластера и выбор студентов того же направления).
         """
-        import numpy as np
-
-        global code2idx, prof2idx, onnx_sess, item_sess, mu_vec, sigma_vec
-
-        # Lazy initialization of code2idx, prof2idx, and onnx_sess
-        if not code2idx or not prof2idx or onnx_sess is None:
-            base = Path(__file__).resolve().parents[4]
-            code_path = base / "code_list.json"
-            profile_path = base / "profile_list.json"
-            code_list = json.loads(code_path.read_text(encoding="utf-8"))
-            profile_list = json.loads(profile_path.read_text(encoding="utf-8"))
-            code2idx.clear()
-            prof2idx.clear()
-            code2idx.update({c: i for i, c in enumerate(code_list)})
-            prof2idx.update({p: i for i, p in enumerate(profile_list)})
-            onnx_sess = ort.InferenceSession(
-                str(base / "student_tower.onnx"), providers=["CPUExecutionProvider"]
-            )
-            item_sess = ort.InferenceSession(str(base / "item_tower.onnx"),
-                                             providers=["CPUExecutionProvider"])
-            stats = json.loads((base / "num_stats.json").read_text(encoding="utf-8"))
-            mu_vec = np.array(stats["mu"], dtype=np.float32).reshape(1, -1)
-            sigma_vec = np.array(stats["sigma"], dtype=np.float32).reshape(1, -1) + 1e-9
-
         # 1. Проверяем, что студент существует
         student = await db.get(Student, student_id)
         if not student:
             log.warning(f"Student with id={student_id} not found")
             return None
 
-        # 2. Формируем числовые признаки студента
-        num_feats = np.hstack([
-            np.array(list(student.competencies.values()), dtype=np.float32),
-            np.array(list(student.diagnostics.values()), dtype=np.float32)
-        ]).reshape(1, -1)
-        num_feats = (num_feats - mu_vec) / sigma_vec
-
-        # 3. Получаем индексы code_idx и prof_idx из кэша
-        code_idx_val = code2idx.get(student.sp_code)
-        prof_idx_val = prof2idx.get(student.sp_profile)
-        if code_idx_val is None or prof_idx_val is None:
-            return {"student_id": student_id, "recommendations": []}
-
-        code_idx = np.array([code_idx_val], dtype=np.int64)
-        prof_idx = np.array([prof_idx_val], dtype=np.int64)
-
-        # 4. Выполняем инференс ONNX
-        inputs = {
-            onnx_sess.get_inputs()[0].name: num_feats,
-            onnx_sess.get_inputs()[1].name: code_idx,
-            onnx_sess.get_inputs()[2].name: prof_idx,
-        }
-        student_embed = onnx_sess.run(None, inputs)[0]  # shape=(1, D)
-
-        # 5. Загружаем все элективы с непустым text_embed
-        res_els = await db.execute(
-            select(Elective).where(Elective.text_embed.isnot(None))
+        candidates_k = settings.RECOMMENDATION.CANDIDATES_K
+
+        # 2. Предпосчитанный топ
+        result = await db.execute(
+            select(StudentRecommendation.elective_id, StudentRecommendation.score)
+            .where(StudentRecommendation.student_id == student_id)
+            .order_by(StudentRecommendation.rank)
         )
-        electives = res_els.scalars().all()
-        if not electives:
-            return {"student_id": student_id, "recommendations": []}
-
-        # 6-7. Формируем матрицу эмбеддингов элективов, применяем item_sess и вычисляем сходство
-        item_embeds_raw, item_ids = [], []
-        for e in electives:
-            item_embeds_raw.append(np.array(e.text_embed, dtype=np.float32))
-            item_ids.append(e.id)
-        X_items_raw = np.vstack(item_embeds_raw).astype(np.float32)
-        item_embeds = item_sess.run(
-            None, {item_sess.get_inputs()[0].name: X_items_raw}
-        )[0]
-        sims = (student_embed @ item_embeds.T).flatten()
-        topk_idx = np.argsort(sims)[::-1][:top_k]
-        top_item_ids = [item_ids[i] for i in topk_idx]
+        scores = {elective_id: score for elective_id, score in result.all()}
+
+        # 3-7. Онлайн-скоринг: кэшированный эмбеддинг (или инференс student tower)
+        # умножается на матрицу элективов в общем батче с другими запросами
+        if not scores:
+            bundle = await self._ensure_item_matrix(db)
+            if bundle.item_matrix is not None:
+                version, embed, top_items = await inference_service.recommend(
+                    student, candidates_k
+                )
+                if embed is not None and (
+                        student.embed is None or student.embed_version != version
+                ):
+                    student.embed = embed
+                    student.embed_version = version
+                    await db.commit()
+                scores = dict(top_items)
+
+        # 8. Запасной рекомендатель
+        source = "similarity"
+        if not scores:
+            scores = dict(fallback_recommender.recommend(
+                student.id, student.sp_code, candidates_k
+            ))
+            source = "co_enrollment"
+
+        recommendations = await self._build_recommendations(
+            db, list(scores), scores=scores, sp_code=student.sp_code,
+            limit=top_k, source=source,
+        )
+        return {"student_id": student_id, "recommendations": recommendations}
+
+    async def _build_recommendations(
+            self,
+            db: AsyncSession,
+            elective_ids: list[int],
+            scores: Optional[dict[int, float]] = None,
+            sp_code: Optional[str] = None,
+            limit: Optional[int] = None,
+            source: str = "similarity",
+    ) -> list[dict]:
+        """
+        Карточки рекомендованных элективов в порядке elective_ids, только со свободными местами,
+        не больше limit. При заданных scores и sp_code к карточкам добавляется поле
+        explanation; source — откуда взяты scores (см. explain.SCORE_SOURCES).
+        """
+        free_spots = await ORMElectiveService.free_spots(db, elective_ids)
+        elective_ids = [eid for eid in elective_ids if free_spots.get(eid, 0) > 0]
+        if not elective_ids:
+            return []
 
         # подсчёт желающих (трансферов) для рекомендованных элективов
         counts_res = await db.execute(
@@ -281,60 +405,263 @@ class ORMStudentService(IStudentService):
                 Transfer.to_elective_id.label("eid"),
                 func.count(Transfer.id).label("transfer_count"),
             )
-            .where(Transfer.to_elective_id.in_(top_item_ids))
+            .where(Transfer.to_elective_id.in_(elective_ids))
             .group_by(Transfer.to_elective_id)
         )
         transfer_counts = {row.eid: row.transfer_count for row in counts_res.all()}
 
-        # Получаем полные объекты элективов по top_item_ids
-        rec_electives_result = await db.execute(
-            select(Elective).where(Elective.id.in_(top_item_ids))
+        electives_res = await db.execute(
+            select(Elective.id, Elective.name, Elective.description, Elective.cluster)
+            .where(Elective.id.in_(elective_ids))
+        )
+        id2elective = {e.id: e for e in electives_res.all()}
+        elective_ids = [eid for eid in elective_ids if eid in id2elective][:limit]
+
+        cards = [
+            {
+                "id": eid,
+                "name": id2elective[eid].name,
+                "description": id2elective[eid].description,
+                "cluster": id2elective[eid].cluster,
+                "free_spots": free_spots[eid],
+                "transfer_count": transfer_counts.get(eid, 0),
+            }
+            for eid in elective_ids
+        ]
+        if scores is not None and sp_code is not None and cards:
+            explanations = await self._explain(db, cards, scores, sp_code, source)
+            for card, explanation in zip(cards, explanations):
+                card["explanation"] = explanation
+        return cards
+
+    @staticmethod
+    async def _explain(
+            db: AsyncSession,
+            cards: list[dict],
+            scores: dict[int, float],
+            sp_code: str,
+            source: str = "similarity",
+    ) -> list[dict]:
+        """
+        Сигналы для объяснения рекомендаций: одно чтение сводки
+        direction_course_statistic по направлению студента, дальше —
+        векторный расчёт по всей пачке.
+        """
+        result = await db.execute(
+            select(
+                DirectionCourseStatistic.elective_id,
+                DirectionCourseStatistic.cluster,
+                DirectionCourseStatistic.student_count,
+                DirectionCourseStatistic.direction_total,
+            ).where(DirectionCourseStatistic.sp_code == sp_code)
+        )
+        rows = result.all()
+        direction_total = rows[0].direction_total if rows else 0
+        peers_by_elective = {r.elective_id: r.student_count for r in rows}
+        peers_by_cluster: dict[str, int] = {}
+        for r in rows:
+            peers_by_cluster[r.cluster] = peers_by_cluster.get(r.cluster, 0) + r.student_count
+
+        peer_count = np.asarray([peers_by_elective.get(c["id"], 0) for c in cards], dtype=np.float32)
+        cluster_count = np.asarray(
+            [peers_by_cluster.get(c["cluster"], 0) for c in cards], dtype=np.float32
+        )
+        score = np.asarray([scores.get(c["id"], 0.0) for c in cards], dtype=np.float32)
+        total = max(direction_total, 1)
+        return explain_recommendations(
+            score, cluster_count / total, peer_count / total, peer_count, source
+        )
+
+    @db_session
+    async def refresh_fallback(self, db: AsyncSession):
+        """
+        Пересобирает запасной рекомендатель по всем записям student_group:
+        одна выборка пар «студент — электив» и сборка CSR-матриц в потоке.
+        """
+        result = await db.execute(
+            select(student_group.c.student_id, Group.elective_id, Student.sp_code)
+            .join(Group, Group.id == student_group.c.group_id)
+            .join(Student, Student.id == student_group.c.student_id)
+            .where(Group.elective_id.isnot(None))
+        )
+        rows = result.all()
+        await asyncio.to_thread(
+            fallback_recommender.rebuild,
+            np.asarray([r.student_id for r in rows], dtype=np.int64),
+            np.asarray([r.elective_id for r in rows], dtype=np.int64),
+            # None в sp_code сделал бы массив object, и np.unique упал бы на сравнении
+            np.asarray([r.sp_code or "" for r in rows], dtype=str),
         )
-        rec_electives = rec_electives_result.scalars().all()
 
-        from collections import defaultdict
+    @db_session
+    async def refresh_student_embeddings(
+            self, db: AsyncSession, force: bool = False
+    ) -> int:
+        """
+        Пересчитывает кэш эмбеддингов студентов пачками по RECOMMENDATION.BATCH_SIZE.
 
-        id2elective = {e.id: e for e in rec_electives}
+        Args:
+            db (AsyncSession): Асинхронная сессия SQLAlchemy.
+            force (bool): Пересчитать всех студентов, а не только тех, чей кэш
+                сброшен или посчитан другой версией модели.
 
-        recommendations = []
-        for eid in top_item_ids:
-            e = id2elective[eid]
-            # Загружаем группы по элективу с joinedload студентов
-            res_groups = await db.execute(
-                select(Group)
-                .where(Group.elective_id == e.id)
-                .options(joinedload(Group.students))
+        Returns:
+            int: Количество обновлённых эмбеддингов.
+        """
+        batch_size = settings.RECOMMENDATION.BATCH_SIZE
+        bundle = inference_service.current()
+
+        query = select(
+            Student.id,
+            Student.sp_code,
+            Student.sp_profile,
+            Student.competencies,
+            Student.diagnostics,
+        )
+        if not force:
+            query = query.where(
+                or_(
+                    Student.embed.is_(None),
+                    Student.embed_version.is_distinct_from(bundle.cache_tag),
+                )
+            )
+        rows = (await db.execute(query)).all()
+
+        updated = 0
+        for start in range(0, len(rows), batch_size):
+            embeds = await inference_service.run(
+                bundle.embed_students, rows[start:start + batch_size]
+            )
+            if not embeds:
+                continue
+            await db.execute(
+                update(Student),
+                [
+                    {"id": student_id, "embed": vec, "embed_version": bundle.cache_tag}
+                    for student_id, vec in embeds.items()
+                ],
+            )
+            updated += len(embeds)
+
+        await db.commit()
+        log.info(f"Обновлено эмбеддингов студентов: {updated}")
+        return updated
+
+    @db_session
+    async def drop_stale_recommendations(self, db: AsyncSession) -> int:
+        """
+        Удаляет предпосчитанный топ студентов, чей кэш эмбеддинга сброшен.
+
+        Вызывается сразу после обновления данных студентов, чтобы до фонового
+        refresh_recommendations им не отдавались рекомендации по старым входам.
+
+        Returns:
+            int: Количество студентов, у которых удалён топ.
+        """
+        result = await db.execute(
+            delete(StudentRecommendation)
+            .where(
+                StudentRecommendation.student_id.in_(
+                    select(Student.id).where(Student.embed.is_(None))
+                )
             )
-            groups = res_groups.unique().scalars().all()
-
-            # Группируем по типу
-            type_to_groups = defaultdict(list)
-            for g in groups:
-                type_to_groups[g.type].append(g)
-
-            # Для каждого типа суммируем все свободные места
-            free_spots_per_type = []
-            for type_groups in type_to_groups.values():
-                total_free_in_type = sum(
-                    g.capacity - len(g.students) for g in type_groups
+            .returning(StudentRecommendation.student_id)
+        )
+        dropped = len(set(result.scalars().all()))
+        await db.commit()
+        log.info(f"Удалены рекомендации студентов со сброшенным эмбеддингом: {dropped}")
+        return dropped
+
+    @db_session
+    async def refresh_recommendations(
+            self, db: AsyncSession, force: bool = False
+    ) -> int:
+        """
+        Пересчитывает таблицу student_recommendation большими NumPy-батчами.
+
+        Топ пересчитывается только для студентов, у которых изменился
+        отпечаток входов (эмбеддинг студента + матрица элективов).
+
+        Returns:
+            int: Количество студентов, для которых пересчитан топ.
+        """
+        batch_size = settings.RECOMMENDATION.BATCH_SIZE
+        candidates_k = settings.RECOMMENDATION.CANDIDATES_K
+
+        await self.refresh_student_embeddings()
+        inference_service.current().invalidate_item_matrix()
+        bundle = await self._ensure_item_matrix(db)
+        if bundle.item_matrix is None:
+            return 0
+        item_ids = bundle.item_ids
+        item_matrix = bundle.item_matrix
+        item_fingerprint = bundle.item_fingerprint.encode()
+        current_embed = and_(
+            Student.embed.isnot(None), Student.embed_version == bundle.cache_tag
+        )
+
+        # у студентов без эмбеддинга текущей версии предпосчитанный топ неактуален
+        await db.execute(
+            delete(StudentRecommendation).where(
+                StudentRecommendation.student_id.in_(
+                    select(Student.id).where(not_(current_embed))
                 )
-                free_spots_per_type.append(total_free_in_type)
+            )
+        )
 
-            # Общее количество мест = минимальное из доступных по типам
-            total_free_spots = min(free_spots_per_type) if free_spots_per_type else 0
+        existing = dict((await db.execute(
+            select(StudentRecommendation.student_id, StudentRecommendation.fingerprint)
+            .where(StudentRecommendation.rank == 1)
+        )).all())
+
+        rows = (await db.execute(
+            select(Student.id, Student.embed).where(current_embed)
+        )).all()
+
+        updated = 0
+        for start in range(0, len(rows), batch_size):
+            batch = []
+            for row in rows[start:start + batch_size]:
+                embed = np.asarray(row.embed, dtype=np.float32)
+                fingerprint = hashlib.sha1(embed.tobytes() + item_fingerprint).hexdigest()
+                if force or existing.get(row.id) != fingerprint:
+                    batch.append((row.id, embed, fingerprint))
+            if not batch:
+                continue
 
-            recommendations.append(
-                {
-                    "id": e.id,
-                    "name": e.name,
-                    "description": e.description,
-                    "cluster": e.cluster,
-                    "free_spots": total_free_spots,
-                    "transfer_count": transfer_counts.get(e.id, 0),
-                }
+            top_ids, top_scores = await inference_service.run(
+                top_k_items,
+                np.vstack([embed for _, embed, _ in batch]),
+                item_matrix,
+                item_ids,
+                candidates_k,
+            )
+            student_ids = [student_id for student_id, _, _ in batch]
+            await db.execute(
+                delete(StudentRecommendation)
+                .where(StudentRecommendation.student_id.in_(student_ids))
             )
+            await db.execute(
+                insert(StudentRecommendation),
+                [
+                    {
+                        "student_id": student_id,
+                        "rank": rank,
+                        "elective_id": elective_id,
+                        "score": score,
+                        "fingerprint": fingerprint,
+                    }
+                    for (student_id, _, fingerprint), ids, scores in zip(
+                        batch, top_ids.tolist(), top_scores.tolist()
+                    )
+                    for rank, (elective_id, score) in enumerate(zip(ids, scores), start=1)
+                ],
+            )
+            updated += len(batch)
 
-        return {"student_id": student_id, "recommendations": recommendations}
+        await db.commit()
+        log.info(f"Пересчитаны рекомендации студентов: {updated}")
+        return updated
 
     @db_session
     async def can_student_transfer(self, student_id: int, elective_id: int, db: AsyncSession):
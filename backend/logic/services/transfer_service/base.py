@@ -6,7 +6,7 @@ class ITransferService(ABC):
     async def get_transfer_by_student_id(self, student_id): ...
 
     @abstractmethod
-    async def get_all_transfers(self): ...
+    async def get_all_transfers(self, filters=None, page=None, paginate=True) -> dict: ...
 
     @abstractmethod
     async def create_transfer(
@@ -18,5 +18,14 @@ class ITransferService(ABC):
             groups_to_ids: list[int],
     ): ...
 
+    @abstractmethod
+    async def create_transfers(self, transfers: list[dict]): ...
+
     @abstractmethod
     async def approve_transfer(self, transfer_id: int): ...
+
+    @abstractmethod
+    async def approve_transfers(self, transfer_ids: list[int], manager_id: int): ...
+
+    @abstractmethod
+    async def reject_transfers(self, transfer_ids: list[int], manager_id: int): ...
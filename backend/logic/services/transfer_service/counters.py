@@ -0,0 +1,48 @@
+import json
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Optional
+
+from redis.asyncio import StrictRedis
+
+from backend.config import settings
+from backend.database.redis import redis_client
+
+log = getLogger(__name__)
+
+
+@dataclass
+class RedisTransferCounters:
+    """
+    Кэш сводки счётчиков заявок. Сбрасывается после каждого изменения
+    заявок в ORMTransferService; TTL страхует от изменений в обход сервиса.
+    Недоступный Redis не ломает чтение — сводка берётся из БД.
+    """
+
+    redis: StrictRedis
+
+    key = settings.TRANSFERS.COUNTERS_KEY
+    ttl = settings.TRANSFERS.COUNTERS_TTL
+
+    async def get(self) -> Optional[dict]:
+        try:
+            cached = await self.redis.get(self.key)
+        except Exception as e:
+            log.warning(f"Не удалось прочитать счётчики заявок из Redis: {e}")
+            return None
+        return json.loads(cached) if cached else None
+
+    async def set(self, counters: dict):
+        try:
+            await self.redis.set(self.key, json.dumps(counters), ex=self.ttl)
+        except Exception as e:
+            log.warning(f"Не удалось сохранить счётчики заявок в Redis: {e}")
+
+    async def invalidate(self):
+        try:
+            await self.redis.delete(self.key)
+        except Exception as e:
+            log.warning(f"Не удалось сбросить счётчики заявок в Redis: {e}")
+
+
+transfer_counters_cache = RedisTransferCounters(redis_client)
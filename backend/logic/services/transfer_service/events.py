@@ -0,0 +1,121 @@
+import asyncio
+import json
+from contextlib import suppress
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import AsyncIterator, Optional
+
+from redis.asyncio import StrictRedis
+
+from backend.config import settings
+from backend.database.redis import redis_client
+
+log = getLogger(__name__)
+
+# подписчик пропустил события (переполнение очереди, обрыв связи с Redis) —
+# клиент должен перечитать /all_transfer целиком
+RESYNC = json.dumps({"type": "resync"})
+
+
+@dataclass
+class RedisTransferEvents:
+    """
+    Канал изменений заявок в Redis pub/sub: каждый воркер публикует события
+    после коммита, подписчики (SSE у менеджеров) получают их из всех воркеров.
+
+    Событие: {"type": "approved", "ids": [...], ...} — клиент обновляет
+    локальное состояние по id и не опрашивает /all_transfer. Массовые
+    изменения приходят как {"type": ..., "count": n, "filter": {...}}:
+    клиент перечитывает заявки по фильтру.
+
+    На воркер одна подписка на канал: слушатель раскладывает события
+    по очередям подписчиков в памяти процесса.
+    """
+
+    redis: StrictRedis
+    _queues: set[asyncio.Queue] = field(default_factory=set, init=False, repr=False)
+    _listener: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+
+    channel = settings.TRANSFERS.EVENTS_CHANNEL
+    heartbeat = settings.TRANSFERS.EVENTS_HEARTBEAT
+    queue_size = settings.TRANSFERS.EVENTS_QUEUE_SIZE
+
+    async def publish(self, event_type: str, ids: list[int], **payload):
+        if not ids:
+            return
+        await self._send(event_type, {"type": event_type, "ids": list(ids), **payload})
+
+    async def publish_bulk(self, event_type: str, count: int, filters: dict, **payload):
+        """Массовое изменение: вместо списка id — их число и фильтр выборки."""
+        if not count:
+            return
+        await self._send(event_type, {"type": event_type, "count": count, "filter": filters, **payload})
+
+    async def _send(self, event_type: str, event: dict):
+        try:
+            await self.redis.publish(self.channel, json.dumps(event, default=str))
+        except Exception as e:
+            # событие — подсказка для UI, изменение в БД уже зафиксировано
+            log.warning(f"Не удалось опубликовать событие заявок {event_type}: {e}")
+
+    async def subscribe(self, timeout: Optional[float] = None) -> AsyncIterator[Optional[str]]:
+        """События канала; None раз в timeout (по умолчанию heartbeat) секунд без событий."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.add(queue)
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout or self.heartbeat)
+                except asyncio.TimeoutError:
+                    event = None
+                yield event
+        finally:
+            self._queues.discard(queue)
+            if not self._queues and self._listener is not None:
+                # последний подписчик ушёл — соединение с Redis не держим
+                self._listener.cancel()
+                self._listener = None
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                delay = 1
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._fan_out(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Подписка на события заявок прервана: {e}")
+                self._fan_out(RESYNC)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.heartbeat)
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+
+    def _fan_out(self, event: str):
+        for queue in self._queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # медленный клиент: вместо накопления событий — одна пересинхронизация
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    async def close(self):
+        """Остановка слушателя при завершении воркера."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await listener
+
+
+transfer_events = RedisTransferEvents(redis_client)
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Sequence
+
+EXPORT_COLUMNS = (
+    "id",
+    "student_id",
+    "student_fio",
+    "from_elective_id",
+    "from_elective_name",
+    "to_elective_id",
+    "to_elective_name",
+    "groups_from",
+    "groups_to",
+    "manager_id",
+    "status",
+    "priority",
+    "created_at",
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+async def ndjson_chunks(partitions: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """Одна JSON-строка на заявку, один кусок ответа на порцию курсора."""
+    async for rows in partitions:
+        yield "".join(
+            json.dumps({c: _plain(v) for c, v in zip(EXPORT_COLUMNS, row)}, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+
+async def csv_chunks(partitions: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """CSV с BOM, чтобы Excel правильно открыл кириллицу; буфер очищается после каждой порции."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in partitions:
+        writer.writerows([_plain(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+}
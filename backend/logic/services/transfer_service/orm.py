@@ -1,28 +1,63 @@
+import base64
+import json
+from datetime import datetime
 from logging import getLogger
-from typing import List
+from typing import AsyncIterator, List, Optional, Sequence
 
-from sqlalchemy import select, func, delete, insert, update
+from sqlalchemy import select, func, delete, insert, update, literal, values, column, Integer, tuple_, or_, any_, true, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, aliased
+from sqlalchemy.sql import text
 
-from backend.database.database import db_session
-from backend.database.models import Group, Student, student_group
+from backend.database.counters import TRANSFER_COUNTER_FOLD, TRANSFER_COUNTER_LOCK, TRANSFER_COUNTER_RECOUNT
+from backend.database.database import AsyncSessionLocal, db_session
+from backend.database.models import (
+    Elective,
+    Group,
+    Student,
+    TransferCounter,
+    TransferCounterDelta,
+    student_group,
+)
 from backend.database.models.transfer import (
     Transfer,
     TransferStatus,
     transfer_group,
     GroupRole,
+    groups_signature,
 )
 from backend.logic.services.log_service.orm import DatabaseLogger
+from backend.logic.services.transfer_service.counters import transfer_counters_cache
+from backend.logic.services.transfer_service.events import transfer_events
 from backend.logic.services.transfer_service.base import ITransferService
-from backend.logic.services.transfer_service.schemas import TransferReorder
-from backend.logic.services.zexceptions.orm import AlreadyExistsTransfer
+from backend.logic.services.transfer_service.schemas import (
+    TransferBatchResult,
+    TransferFilter,
+    TransferPageParams,
+    TransferReorder,
+)
+from backend.logic.services.zexceptions.orm import (
+    AlreadyExistsTransfer,
+    DuplicateTransferIds,
+    GroupsAreFull,
+    InvalidCursor,
+    InvalidTransferPriorities,
+    TransferAlreadyApproved,
+    TransferAlreadyRejected,
+    TransferNotFound,
+    TransfersNotFound,
+)
 
 logger = getLogger(__name__)
 log = DatabaseLogger(__name__)
 
 
 class ORMTransferService(ITransferService):
+    # заявки, которые участвуют в очереди приоритетов студента
+    ACTIVE_STATUSES = (TransferStatus.draft, TransferStatus.pending)
+
     @db_session
     async def get_transfer_by_student_id(self, student_id: int, db: AsyncSession):
         stmt = (
@@ -69,42 +104,230 @@ class ORMTransferService(ITransferService):
 
         return result
 
+    SORT_COLUMNS = {
+        "created_at": Transfer.created_at,
+        "priority": Transfer.priority,
+        "id": Transfer.id,
+    }
+
     @db_session
-    async def get_all_transfers(self, db: AsyncSession):
-        query = select(Transfer).options(
-            selectinload(Transfer.student),
-            selectinload(Transfer.from_elective),
-            selectinload(Transfer.to_elective),
-            selectinload(Transfer.groups_from),
-            selectinload(Transfer.groups_to),
+    async def get_all_transfers(
+            self,
+            db: AsyncSession,
+            filters: Optional[TransferFilter] = None,
+            page: Optional[TransferPageParams] = None,
+            paginate: bool = True,
+    ) -> dict:
+        """
+        Страница заявок с фильтрами и keyset-пагинацией по (поле сортировки, id).
+
+        Строится из колоночной проекции (заявка + ФИО + названия элективов)
+        и одного запроса групп для заявок страницы, без загрузки ORM-объектов.
+        При paginate=False возвращаются все подходящие заявки в порядке page,
+        без лимита и курсора — так отдают список /all_transfer и /optimal.
+
+        Returns:
+            dict: {"items": [...], "next_cursor": str | None}
+        """
+        filters = filters or TransferFilter()
+        page = page or TransferPageParams()
+        sort_column = self.SORT_COLUMNS[page.sort]
+        from_elective, to_elective = aliased(Elective), aliased(Elective)
+
+        stmt = (
+            select(
+                Transfer.id,
+                Transfer.student_id,
+                Student.fio.label("student_fio"),
+                Transfer.from_elective_id,
+                from_elective.name.label("from_elective_name"),
+                Transfer.to_elective_id,
+                to_elective.name.label("to_elective_name"),
+                Transfer.manager_id,
+                Transfer.status,
+                Transfer.priority,
+                Transfer.created_at,
+                sort_column.label("sort_value"),
+            )
+            .join(Student, Student.id == Transfer.student_id)
+            .join(from_elective, from_elective.id == Transfer.from_elective_id)
+            .join(to_elective, to_elective.id == Transfer.to_elective_id)
+            .where(*self._transfer_conditions(filters))
         )
-        result = await db.execute(query)
-        transfers = result.scalars().all()
+        if paginate and page.cursor:
+            value, transfer_id = self._decode_cursor(page.cursor, page.sort)
+            key = tuple_(sort_column, Transfer.id)
+            stmt = stmt.where(
+                key < tuple_(value, transfer_id) if page.order == "desc" else key > tuple_(value, transfer_id)
+            )
+        if page.order == "desc":
+            stmt = stmt.order_by(sort_column.desc(), Transfer.id.desc())
+        else:
+            stmt = stmt.order_by(sort_column.asc(), Transfer.id.asc())
 
-        result_list = []
-        for transfer in transfers:
-            result_list.append(
-                {
-                    "id": transfer.id,
-                    "student_fio": transfer.student.fio,
-                    "from_elective_name": transfer.from_elective.name,
-                    "to_elective_name": transfer.to_elective.name,
-                    "groups_from": [
-                        (group.name, group.type, group.init_usage, group.capacity)
-                        for group in transfer.groups_from
-                    ],
-                    "groups_to": [
-                        (group.name, group.type, group.init_usage, group.capacity)
-                        for group in transfer.groups_to
-                    ],
-                    "status": transfer.status,
-                    "priority": transfer.priority,
-                    "created_at": transfer.created_at.isoformat()
-                    if transfer.created_at
-                    else None,
-                }
+        if paginate:
+            stmt = stmt.limit(page.limit + 1)
+        rows = (await db.execute(stmt)).all()
+        has_more = paginate and len(rows) > page.limit
+        if has_more:
+            rows = rows[:page.limit]
+
+        groups = {row.id: {GroupRole.FROM: [], GroupRole.TO: []} for row in rows}
+        if rows:
+            groups_res = await db.execute(
+                select(
+                    transfer_group.c.transfer_id,
+                    transfer_group.c.group_role,
+                    Group.name,
+                    Group.type,
+                    Group.init_usage,
+                    Group.capacity,
+                )
+                .join(Group, Group.id == transfer_group.c.group_id)
+                .where(transfer_group.c.transfer_id == any_(literal(list(groups), ARRAY(Integer))))
+            )
+            for transfer_id, role, *group in groups_res.all():
+                groups[transfer_id][role].append(tuple(group))
+
+        items = [
+            {
+                "id": row.id,
+                "student_id": row.student_id,
+                "student_fio": row.student_fio,
+                "from_elective_id": row.from_elective_id,
+                "from_elective_name": row.from_elective_name,
+                "to_elective_id": row.to_elective_id,
+                "to_elective_name": row.to_elective_name,
+                "groups_from": groups[row.id][GroupRole.FROM],
+                "groups_to": groups[row.id][GroupRole.TO],
+                "manager_id": row.manager_id,
+                "status": row.status,
+                "priority": row.priority,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            for row in rows
+        ]
+        next_cursor = (
+            self._encode_cursor(rows[-1].sort_value, rows[-1].id) if has_more else None
+        )
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def stream_transfers(
+            self, filters: Optional[TransferFilter] = None, chunk: int = 1000,
+    ) -> AsyncIterator[Sequence]:
+        """
+        Все заявки плоской проекцией (группы — строкой через «; »)
+        порциями по chunk строк через серверный курсор.
+
+        Сессия открывается внутри генератора, а не через @db_session:
+        StreamingResponse читает его уже после возврата из эндпоинта.
+        """
+        from_elective, to_elective = aliased(Elective), aliased(Elective)
+
+        def group_names(role: GroupRole):
+            return (
+                select(func.string_agg(Group.name, literal("; ")))
+                .select_from(transfer_group.join(Group, Group.id == transfer_group.c.group_id))
+                .where(
+                    transfer_group.c.transfer_id == Transfer.id,
+                    transfer_group.c.group_role == role,
+                )
+                .scalar_subquery()
+            )
+
+        stmt = (
+            select(
+                Transfer.id,
+                Transfer.student_id,
+                Student.fio,
+                Transfer.from_elective_id,
+                from_elective.name,
+                Transfer.to_elective_id,
+                to_elective.name,
+                group_names(GroupRole.FROM),
+                group_names(GroupRole.TO),
+                Transfer.manager_id,
+                Transfer.status,
+                Transfer.priority,
+                Transfer.created_at,
+            )
+            .join(Student, Student.id == Transfer.student_id)
+            .join(from_elective, from_elective.id == Transfer.from_elective_id)
+            .join(to_elective, to_elective.id == Transfer.to_elective_id)
+            .where(*self._transfer_conditions(filters or TransferFilter()))
+            .order_by(Transfer.id)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt.execution_options(yield_per=chunk))
+            async for rows in result.partitions():
+                yield rows
+
+    @staticmethod
+    def _transfer_conditions(filters: TransferFilter) -> list:
+        conditions = []
+        if filters.status is not None:
+            conditions.append(Transfer.status == filters.status)
+        if filters.student_id is not None:
+            conditions.append(Transfer.student_id == filters.student_id)
+        if filters.manager_id is not None:
+            conditions.append(Transfer.manager_id == filters.manager_id)
+        if filters.from_elective_id is not None:
+            conditions.append(Transfer.from_elective_id == filters.from_elective_id)
+        if filters.to_elective_id is not None:
+            conditions.append(Transfer.to_elective_id == filters.to_elective_id)
+        if filters.elective_id is not None:
+            conditions.append(
+                or_(
+                    Transfer.from_elective_id == filters.elective_id,
+                    Transfer.to_elective_id == filters.elective_id,
+                )
             )
-        return result_list
+        if filters.created_from is not None:
+            conditions.append(Transfer.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            conditions.append(Transfer.created_at < filters.created_to)
+        return conditions
+
+    @staticmethod
+    def _encode_cursor(value, transfer_id: int) -> str:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps([value, transfer_id]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> tuple:
+        try:
+            value, transfer_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if sort == "created_at":
+                value = datetime.fromisoformat(value)
+            return value, int(transfer_id)
+        except (ValueError, TypeError):
+            raise InvalidCursor(cursor)
+
+    @staticmethod
+    async def _lock_pairs(db: AsyncSession, pairs) -> None:
+        """
+        SELECT pg_advisory_xact_lock(student_id, from_elective_id)
+        FROM (VALUES ...) ORDER BY student_id, from_elective_id
+
+        Транзакционный advisory-лок на очередь приоритетов каждой пары
+        (студент, исходный электив). Создание, пакетное создание,
+        перестановка и удаление берут его до чтения приоритетов, поэтому
+        max(priority) + 1 и перенумерация одной пары выполняются по очереди.
+        Порядок захвата один и тот же, так что пачки не блокируют друг друга
+        накрест.
+        """
+        pairs = sorted(set(pairs))
+        if not pairs:
+            return
+        keys = values(
+            column("student_id", Integer), column("from_elective_id", Integer), name="pairs"
+        ).data(pairs)
+        await db.execute(
+            select(func.pg_advisory_xact_lock(keys.c.student_id, keys.c.from_elective_id))
+            .order_by(keys.c.student_id, keys.c.from_elective_id)
+        )
 
     @db_session
     async def create_transfer(
@@ -115,141 +338,281 @@ class ORMTransferService(ITransferService):
             groups_from_ids: list[int],
             groups_to_ids: list[int],
             db: AsyncSession,
-    ):
+    ) -> int:
+        """
+        Создаёт заявку и её связи с группами одним запросом.
+
+        Дубликаты отсекает уникальный индекс по (студент, элективы,
+        сигнатура наборов групп): при конфликте запрос не вставляет
+        ничего и возвращает пустой результат.
+
+        Returns:
+            int: id созданной заявки.
+        """
         try:
-            if await self._check_existing_transfer(
-                    db=db,
-                    student_id=student_id,
-                    groups_from_ids=groups_from_ids,
-                    groups_to_ids=groups_to_ids,
-                    from_elective_id=from_elective_id,
-                    to_elective_id=to_elective_id,
-            ):
+            await self._lock_pairs(db, [(student_id, from_elective_id)])
+            stmt = self._create_transfer_stmt(
+                student_id, from_elective_id, to_elective_id, groups_from_ids, groups_to_ids
+            )
+            transfer_id = (await db.execute(stmt)).scalar_one_or_none()
+            if transfer_id is None:
                 log.error(
                     f"Заявка уже существует: студент {student_id}, с электива {from_elective_id} на {to_elective_id}"
                 )
                 raise AlreadyExistsTransfer(
                     student_id, from_elective_id, to_elective_id
                 )
-
-            priority = await self._calculate_priority(
-                db=db, student_id=student_id, from_elective_id=from_elective_id
-            )
-
-            transfer = await self._create_new_transfer(
-                db=db,
-                student_id=student_id,
-                groups_from_ids=groups_from_ids,
-                groups_to_ids=groups_to_ids,
-                from_elective_id=from_elective_id,
-                to_elective_id=to_elective_id,
-                priority=priority,
-            )
+            await db.commit()
 
             log.info(
-                f"Создана новая заявка: ID={transfer.id}, студент={student_id}, с электива {from_elective_id} на {to_elective_id}"
+                f"Создана новая заявка: ID={transfer_id}, студент={student_id}, с электива {from_elective_id} на {to_elective_id}"
             )
-            return transfer
+            await self._notify("created", [transfer_id], student_id=student_id)
+            return transfer_id
 
         except Exception as e:
             log.error(f"Ошибка при создании заявки: {str(e)}")
             raise
 
-    @staticmethod
-    async def _check_existing_transfer(
-            db: AsyncSession,
-            student_id: int,
-            groups_from_ids: list[int],
-            groups_to_ids: list[int],
-            from_elective_id: int,
-            to_elective_id: int,
-    ) -> bool:
+    @db_session
+    async def create_transfers(self, transfers: list[dict], db: AsyncSession) -> list[Optional[int]]:
         """
-        Проверяет, существует ли уже такая заявка.
-        Сравнивает заявки по student_id, from_elective_id, to_elective_id, а также по наборам групп (из которых и в которые производится перевод).
+        Создаёт пачку заявок в одной транзакции: одно чтение текущих
+        приоритетов, один многострочный INSERT ... ON CONFLICT DO NOTHING
+        RETURNING и один executemany для связей с группами.
+
+        Приоритеты раздаются только реально вставленным заявкам: если часть
+        пачки отсеяна как дубликаты, они перенумеровываются одним
+        UPDATE ... FROM (VALUES ...), чтобы в очереди студента не было дыр.
+
+        Args:
+            transfers: словари с student_id, from_elective_id, to_elective_id,
+                groups_from_ids, groups_to_ids.
+
+        Returns:
+            id созданных заявок в порядке transfers; None — такая заявка уже есть.
         """
-        result = await db.execute(
-            select(Transfer).where(
-                Transfer.student_id == student_id,
-                Transfer.from_elective_id == from_elective_id,
-                Transfer.to_elective_id == to_elective_id,
+        if not transfers:
+            return []
+
+        pairs = {(t["student_id"], t["from_elective_id"]) for t in transfers}
+        await self._lock_pairs(db, pairs)
+        last_res = await db.execute(
+            select(Transfer.student_id, Transfer.from_elective_id, func.max(Transfer.priority))
+            .where(
+                tuple_(Transfer.student_id, Transfer.from_elective_id).in_(pairs),
+                Transfer.status.in_(self.ACTIVE_STATUSES),
             )
+            .group_by(Transfer.student_id, Transfer.from_elective_id)
         )
-        transfers = result.scalars().all()
-        for transfer in transfers:
-            existing_groups_from = {group.id for group in transfer.groups_from}
-            existing_groups_to = {group.id for group in transfer.groups_to}
-            if existing_groups_from == set(
-                    groups_from_ids
-            ) and existing_groups_to == set(groups_to_ids):
-                return True
-        return False
+        last_priority = {
+            (student_id, from_id): last for student_id, from_id, last in last_res.all()
+        }
 
-    @staticmethod
-    async def _calculate_priority(
-            db: AsyncSession, student_id: int, from_elective_id: int
-    ) -> int:
-        """
-        Рассчитывает приоритет для нового запроса на основе student_id и from_elective_id.
-        """
-        priority_query = await db.execute(
-            select(func.count()).where(
-                Transfer.student_id == student_id,
-                Transfer.from_elective_id == from_elective_id,
+        def assign_priorities(items) -> list[int]:
+            """Следующие приоритеты пары (студент, электив) в порядке items."""
+            next_priority = {key: last + 1 for key, last in last_priority.items()}
+            priorities = []
+            for item in items:
+                key = (item["student_id"], item["from_elective_id"])
+                priorities.append(next_priority.get(key, 1))
+                next_priority[key] = priorities[-1] + 1
+            return priorities
+
+        rows = []
+        for t, priority in zip(transfers, assign_priorities(transfers)):
+            rows.append(
+                {
+                    "student_id": t["student_id"],
+                    "from_elective_id": t["from_elective_id"],
+                    "to_elective_id": t["to_elective_id"],
+                    "priority": priority,
+                    "status": TransferStatus.draft,
+                    "groups_signature": groups_signature(t["groups_from_ids"], t["groups_to_ids"]),
+                }
+            )
+
+        inserted = await db.execute(
+            pg_insert(Transfer)
+            .values(rows)
+            .on_conflict_do_nothing(constraint=Transfer.GROUPS_SIGNATURE_CONSTRAINT)
+            .returning(
+                Transfer.id,
+                Transfer.student_id,
+                Transfer.from_elective_id,
+                Transfer.to_elective_id,
+                Transfer.groups_signature,
             )
         )
-        return priority_query.scalar() + 1
+        key2id = {
+            (r.student_id, r.from_elective_id, r.to_elective_id, r.groups_signature): r.id
+            for r in inserted.all()
+        }
+        transfer_ids = [
+            key2id.pop(
+                (r["student_id"], r["from_elective_id"], r["to_elective_id"], r["groups_signature"]),
+                None,
+            )
+            for r in rows
+        ]
+
+        created = [(tid, r) for tid, r in zip(transfer_ids, rows) if tid is not None]
+        final_priorities = assign_priorities([r for _, r in created])
+        renumbered = [
+            (tid, priority)
+            for (tid, r), priority in zip(created, final_priorities)
+            if r["priority"] != priority
+        ]
+        if renumbered:
+            new_priorities = values(
+                column("id", Integer), column("priority", Integer), name="new_priorities"
+            ).data(renumbered)
+            await db.execute(
+                update(Transfer)
+                .where(Transfer.id == new_priorities.c.id)
+                .values(priority=new_priorities.c.priority)
+            )
+
+        links = [
+            {"transfer_id": transfer_id, "group_id": group_id, "group_role": role}
+            for transfer_id, t in zip(transfer_ids, transfers)
+            if transfer_id is not None
+            for role, group_ids in (
+                (GroupRole.FROM, t["groups_from_ids"]),
+                (GroupRole.TO, t["groups_to_ids"]),
+            )
+            for group_id in sorted(set(group_ids))
+        ]
+        if links:
+            await db.execute(insert(transfer_group), links)
+        await db.commit()
+
+        created = sum(transfer_id is not None for transfer_id in transfer_ids)
+        log.info(f"Пакетное создание заявок: создано {created} из {len(transfers)}")
+        await self._notify("created", [tid for tid in transfer_ids if tid is not None])
+        return transfer_ids
 
     @staticmethod
-    async def _create_new_transfer(
-            db: AsyncSession,
+    def _create_transfer_stmt(
             student_id: int,
-            groups_from_ids: list[int],
-            groups_to_ids: list[int],
             from_elective_id: int,
             to_elective_id: int,
-            priority: int,
-    ) -> Transfer:
+            groups_from_ids: list[int],
+            groups_to_ids: list[int],
+    ):
         """
-        Создает новую запись Transfer в базе данных и записывает ассоциации с группами.
+        WITH new_transfer AS (
+            INSERT INTO transfer (...) SELECT ..., coalesce(max(priority), 0) + 1, ...
+            ON CONFLICT DO NOTHING RETURNING id
+        ), links AS (
+            INSERT INTO transfer_group SELECT new_transfer.id, g.* FROM new_transfer, (VALUES ...) g
+        )
+        SELECT id FROM new_transfer
 
-        Параметры:
-        - groups_from_ids: список id групп, из которых производится перевод.
-        - groups_to_ids: список id групп, в которые производится перевод.
+        Приоритет — следующий после последнего среди активных (draft/pending)
+        заявок студента с этого электива.
         """
-        transfer = Transfer(
-            student_id=student_id,
-            from_elective_id=from_elective_id,
-            to_elective_id=to_elective_id,
-            priority=priority,
+        priority = (
+            select(
+                literal(student_id),
+                literal(from_elective_id),
+                literal(to_elective_id),
+                func.coalesce(func.max(Transfer.priority), 0) + 1,
+                literal(TransferStatus.draft, Transfer.status.type),
+                literal(groups_signature(groups_from_ids, groups_to_ids)),
+            )
+            .select_from(Transfer)
+            .where(
+                Transfer.student_id == student_id,
+                Transfer.from_elective_id == from_elective_id,
+                Transfer.status.in_(ORMTransferService.ACTIVE_STATUSES),
+            )
         )
-        db.add(transfer)
-        await db.commit()
-        await db.refresh(transfer)
-
-        for group_id in groups_from_ids:
-            stmt = insert(transfer_group).values(
-                transfer_id=transfer.id, group_id=group_id, group_role=GroupRole.FROM
+        new_transfer = (
+            pg_insert(Transfer)
+            .from_select(
+                [
+                    "student_id",
+                    "from_elective_id",
+                    "to_elective_id",
+                    "priority",
+                    "status",
+                    "groups_signature",
+                ],
+                priority,
             )
-            await db.execute(stmt)
+            .on_conflict_do_nothing(constraint=Transfer.GROUPS_SIGNATURE_CONSTRAINT)
+            .returning(Transfer.id)
+            .cte("new_transfer")
+        )
+        stmt = select(new_transfer.c.id)
 
-        for group_id in groups_to_ids:
-            stmt = insert(transfer_group).values(
-                transfer_id=transfer.id, group_id=group_id, group_role=GroupRole.TO
+        links = [(group_id, GroupRole.FROM) for group_id in sorted(set(groups_from_ids))]
+        links += [(group_id, GroupRole.TO) for group_id in sorted(set(groups_to_ids))]
+        if links:
+            groups = values(
+                column("group_id", Integer),
+                column("group_role", transfer_group.c.group_role.type),
+                name="groups",
+            ).data(links)
+            insert_links = (
+                insert(transfer_group)
+                .from_select(
+                    ["transfer_id", "group_id", "group_role"],
+                    select(new_transfer.c.id, groups.c.group_id, groups.c.group_role)
+                    .select_from(new_transfer)
+                    .join(groups, true()),
+                )
+                .cte("links")
             )
-            await db.execute(stmt)
-
-        await db.commit()
-        return transfer
+            stmt = stmt.add_cte(insert_links)
+        return stmt
 
     @db_session
     async def delete_transfer(self, db: AsyncSession, transfer_id: int) -> None:
         """
-        Удаляет запись о переводе по указанному transfer_id.
+        Удаляет запись о переводе по указанному transfer_id и сдвигает
+        приоритеты оставшихся активных заявок пары, чтобы они шли подряд.
+        Пара блокируется до удаления, как и при создании и перестановке.
         """
-        await db.execute(delete(Transfer).where(Transfer.id == transfer_id))
+        pair = (await db.execute(
+            select(Transfer.student_id, Transfer.from_elective_id).where(Transfer.id == transfer_id)
+        )).first()
+        if pair is not None:
+            await self._lock_pairs(db, [tuple(pair)])
+        deleted = (await db.execute(
+            delete(Transfer)
+            .where(Transfer.id == transfer_id)
+            .returning(Transfer.student_id, Transfer.from_elective_id)
+        )).first()
+        if deleted is not None:
+            await self._compact_priorities(db, deleted.student_id, deleted.from_elective_id)
         await db.commit()
-        return
+        await self._notify("deleted", [transfer_id])
+
+    @staticmethod
+    async def _compact_priorities(db: AsyncSession, student_id: int, from_elective_id: int):
+        """
+        UPDATE transfer SET priority = row_number() OVER (ORDER BY priority, id)
+        для активных заявок пары (студент, исходный электив).
+        """
+        ranked = (
+            select(
+                Transfer.id,
+                func.row_number().over(order_by=(Transfer.priority, Transfer.id)).label("rn"),
+            )
+            .where(
+                Transfer.student_id == student_id,
+                Transfer.from_elective_id == from_elective_id,
+                Transfer.status.in_(ORMTransferService.ACTIVE_STATUSES),
+            )
+            .subquery()
+        )
+        await db.execute(
+            update(Transfer)
+            .where(Transfer.id == ranked.c.id, Transfer.priority != ranked.c.rn)
+            .values(priority=ranked.c.rn)
+        )
 
     @db_session
     async def _change_transfer_status(
@@ -276,80 +639,338 @@ class ORMTransferService(ITransferService):
             self, transfer_id: int, manager_id: int, db: AsyncSession
     ):
         """
-        Одобряет заявку на перевод, обновляя связи студента с группами.
-        При одобрении заявки отклоняет все другие заявки этого студента с того же исходного электива.
+        Одобряет заявку на перевод одной транзакцией.
+
+        Заявка и целевые группы блокируются FOR UPDATE (группы — по
+        возрастанию id, чтобы параллельные одобрения не ловили дедлок),
+        после чего вместимость проверяется без гонки за последнее место.
+        Остальные заявки студента с того же электива отклоняются одним
+        UPDATE, группы меняются одним DELETE и одним INSERT ... SELECT.
         """
         try:
-            transfer = await db.get(Transfer, transfer_id)
-            student = await db.get(Student, transfer.student_id)
-
-            # Отклоняем другие заявки с того же исходного электива
-            stmt = select(Transfer).where(
-                Transfer.student_id == student.id,
-                Transfer.from_elective_id == transfer.from_elective_id,
-                Transfer.id != transfer_id,
-                Transfer.status != TransferStatus.approved.value,
-            )
-            other_transfers = (await db.execute(stmt)).scalars().all()
-            for other_transfer in other_transfers:
-                await self._change_transfer_status(
-                    other_transfer.id, TransferStatus.rejected, manager_id
-                )
-                log.info(
-                    f"Отклонена заявка {other_transfer.id} при одобрении заявки {transfer_id}"
+            transfer = (await db.execute(
+                select(
+                    Transfer.student_id,
+                    Transfer.from_elective_id,
+                    Transfer.to_elective_id,
+                    Transfer.status,
                 )
+                .where(Transfer.id == transfer_id)
+                .with_for_update()
+            )).one_or_none()
+            if transfer is None:
+                raise TransferNotFound(transfer_id)
+            if transfer.status == TransferStatus.approved:
+                raise TransferAlreadyApproved(transfer_id)
 
-            # Удаляем старые связи студента с группами from_elective
-            stmt = delete(student_group).where(
-                student_group.c.group_id.in_(
-                    select(transfer_group.c.group_id).where(
-                        transfer_group.c.transfer_id == transfer_id,
-                        transfer_group.c.group_role == GroupRole.FROM,
-                    )
-                ),
-                student_group.c.student_id == student.id,
+            target_groups = select(transfer_group.c.group_id).where(
+                transfer_group.c.transfer_id == transfer_id,
+                transfer_group.c.group_role == GroupRole.TO,
             )
-            await db.execute(stmt)
+            groups = (await db.execute(
+                select(Group.id, Group.name, Group.capacity)
+                .where(Group.id.in_(target_groups))
+                .order_by(Group.id)
+                .with_for_update(of=Group)
+            )).all()
 
-            # Добавляем новые связи студента с группами to_elective
-            stmt = (
-                select(Group)
-                .join(transfer_group)
+            # места считаются уже под блокировкой групп
+            enrolled = dict((await db.execute(
+                select(student_group.c.group_id, func.count())
                 .where(
-                    transfer_group.c.transfer_id == transfer_id,
-                    transfer_group.c.group_role == GroupRole.TO,
+                    student_group.c.group_id.in_([g.id for g in groups]),
+                    student_group.c.student_id != transfer.student_id,
                 )
-            )
-            groups = (await db.execute(stmt)).scalars().all()
+                .group_by(student_group.c.group_id)
+            )).all())
+            full = [
+                g.name for g in groups
+                if g.capacity is not None and enrolled.get(g.id, 0) >= g.capacity
+            ]
+            if full:
+                raise GroupsAreFull(full)
 
-            for group in groups:
-                stmt = insert(student_group).values(
-                    student_id=student.id, group_id=group.id
+            rejected_ids = (await db.execute(
+                update(Transfer)
+                .where(
+                    Transfer.student_id == transfer.student_id,
+                    Transfer.from_elective_id == transfer.from_elective_id,
+                    Transfer.id != transfer_id,
+                    Transfer.status != TransferStatus.approved,
                 )
-                await db.execute(stmt)
+                .values(status=TransferStatus.rejected, manager_id=manager_id)
+                .returning(Transfer.id)
+            )).scalars().all()
 
-            await self._change_transfer_status(
-                transfer_id, TransferStatus.approved, manager_id
+            await db.execute(
+                delete(student_group).where(
+                    student_group.c.student_id == transfer.student_id,
+                    student_group.c.group_id.in_(
+                        select(transfer_group.c.group_id).where(
+                            transfer_group.c.transfer_id == transfer_id,
+                            transfer_group.c.group_role == GroupRole.FROM,
+                        )
+                    ),
+                )
             )
-            log.info(
-                f"Одобрена заявка {transfer_id}: студент {student.id} переведен с электива {transfer.from_elective_id} на {transfer.to_elective_id}"
+            await db.execute(
+                pg_insert(student_group)
+                .from_select(
+                    ["student_id", "group_id"],
+                    select(literal(transfer.student_id), transfer_group.c.group_id).where(
+                        transfer_group.c.transfer_id == transfer_id,
+                        transfer_group.c.group_role == GroupRole.TO,
+                    ),
+                )
+                .on_conflict_do_nothing()
+            )
+            await db.execute(
+                update(Transfer)
+                .where(Transfer.id == transfer_id)
+                .values(status=TransferStatus.approved, manager_id=manager_id)
             )
-
             await db.commit()
-            await db.refresh(student)
 
-            return transfer
+            if rejected_ids:
+                log.info(f"Отклонены заявки {rejected_ids} при одобрении заявки {transfer_id}")
+            log.info(
+                f"Одобрена заявка {transfer_id}: студент {transfer.student_id} переведен "
+                f"с электива {transfer.from_elective_id} на {transfer.to_elective_id}"
+            )
+            await self._notify("approved", [transfer_id], status=TransferStatus.approved)
+            await self._notify("rejected", rejected_ids, status=TransferStatus.rejected)
+            return {
+                "message": "Transfer approved",
+                "transfer_id": transfer_id,
+                "rejected_transfer_ids": rejected_ids,
+            }
 
         except Exception as e:
+            await db.rollback()
             log.error(f"Ошибка при одобрении заявки {transfer_id}: {str(e)}")
             raise
 
+    @db_session
+    async def approve_transfers(
+            self, transfer_ids: List[int], manager_id: int, db: AsyncSession
+    ) -> List[TransferBatchResult]:
+        """
+        Пакетное одобрение заявок одной транзакцией.
+
+        Заявки и все затронутые группы блокируются FOR UPDATE, заполненность
+        групп и связи студентов читаются один раз, затем пачка проходится в
+        памяти в порядке запроса. Заявка, для которой не хватает мест,
+        пропускается с причиной, остальные применяются: одобрение и
+        отклонение смежных заявок — по одному UPDATE, перенос студентов —
+        одним DELETE и одним INSERT.
+        """
+        try:
+            ids = list(dict.fromkeys(transfer_ids))
+            transfers = {
+                row.id: row for row in (await db.execute(
+                    select(Transfer.id, Transfer.student_id, Transfer.from_elective_id, Transfer.status)
+                    .where(Transfer.id.in_(ids))
+                    .order_by(Transfer.id)
+                    .with_for_update()
+                )).all()
+            }
+            links = {tid: {GroupRole.FROM: [], GroupRole.TO: []} for tid in transfers}
+            links_res = await db.execute(
+                select(transfer_group.c.transfer_id, transfer_group.c.group_id, transfer_group.c.group_role)
+                .where(transfer_group.c.transfer_id.in_(list(transfers)))
+            )
+            for tid, group_id, role in links_res.all():
+                links[tid][role].append(group_id)
+
+            group_ids = sorted({g for roles in links.values() for gs in roles.values() for g in gs})
+            groups = {
+                row.id: row for row in (await db.execute(
+                    select(Group.id, Group.name, Group.capacity)
+                    .where(Group.id.in_(group_ids))
+                    .order_by(Group.id)
+                    .with_for_update()
+                )).all()
+            }
+            occupancy = dict((await db.execute(
+                select(student_group.c.group_id, func.count())
+                .where(student_group.c.group_id.in_(group_ids))
+                .group_by(student_group.c.group_id)
+            )).all())
+            initial = {
+                (student_id, group_id) for student_id, group_id in (await db.execute(
+                    select(student_group.c.student_id, student_group.c.group_id).where(
+                        student_group.c.student_id.in_([t.student_id for t in transfers.values()]),
+                        student_group.c.group_id.in_(group_ids),
+                    )
+                )).all()
+            }
+
+            membership = set(initial)
+            approved, closed, details = [], set(), {}
+            for tid in ids:
+                transfer = transfers.get(tid)
+                if transfer is None:
+                    details[tid] = TransferNotFound(tid).message
+                    continue
+                if transfer.status == TransferStatus.approved:
+                    details[tid] = TransferAlreadyApproved(tid).message
+                    continue
+                student_id = transfer.student_id
+                if (student_id, transfer.from_elective_id) in closed:
+                    details[tid] = "В пачке уже одобрена другая заявка студента с этого электива"
+                    continue
+                full = [
+                    groups[g].name for g in links[tid][GroupRole.TO]
+                    if groups[g].capacity is not None
+                    and (student_id, g) not in membership
+                    and occupancy.get(g, 0) >= groups[g].capacity
+                ]
+                if full:
+                    details[tid] = GroupsAreFull(full).message
+                    continue
+
+                for g in links[tid][GroupRole.FROM]:
+                    if (student_id, g) in membership:
+                        membership.discard((student_id, g))
+                        occupancy[g] -= 1
+                for g in links[tid][GroupRole.TO]:
+                    if (student_id, g) not in membership:
+                        membership.add((student_id, g))
+                        occupancy[g] = occupancy.get(g, 0) + 1
+                approved.append(tid)
+                closed.add((student_id, transfer.from_elective_id))
+
+            rejected_ids = []
+            if approved:
+                await db.execute(
+                    update(Transfer)
+                    .where(Transfer.id.in_(approved))
+                    .values(status=TransferStatus.approved, manager_id=manager_id)
+                )
+                rejected_ids = (await db.execute(
+                    update(Transfer)
+                    .where(
+                        tuple_(Transfer.student_id, Transfer.from_elective_id).in_(list(closed)),
+                        Transfer.id.notin_(approved),
+                        Transfer.status != TransferStatus.approved,
+                    )
+                    .values(status=TransferStatus.rejected, manager_id=manager_id)
+                    .returning(Transfer.id)
+                )).scalars().all()
+
+                removed, added = initial - membership, membership - initial
+                if removed:
+                    await db.execute(
+                        delete(student_group).where(
+                            tuple_(student_group.c.student_id, student_group.c.group_id).in_(list(removed))
+                        )
+                    )
+                if added:
+                    await db.execute(
+                        pg_insert(student_group)
+                        .values([{"student_id": s, "group_id": g} for s, g in added])
+                        .on_conflict_do_nothing()
+                    )
+            await db.commit()
+
+        except Exception as e:
+            await db.rollback()
+            log.error(f"Ошибка при пакетном одобрении заявок: {str(e)}")
+            raise
+
+        log.info(
+            f"Пакетное одобрение заявок менеджером {manager_id}: одобрено {len(approved)} "
+            f"из {len(ids)}, отклонено смежных {len(rejected_ids)}"
+        )
+        await self._notify("approved", approved, status=TransferStatus.approved)
+        await self._notify("rejected", rejected_ids, status=TransferStatus.rejected)
+        approved = set(approved)
+        return [
+            TransferBatchResult(
+                index=index,
+                success=tid in approved,
+                transfer_id=tid,
+                detail=details.get(tid),
+            )
+            for index, tid in enumerate(transfer_ids)
+        ]
+
+    @db_session
+    async def reject_transfers(
+            self, transfer_ids: List[int], manager_id: int, db: AsyncSession
+    ) -> List[TransferBatchResult]:
+        """
+        Пакетное отклонение заявок одним UPDATE. Отклоняются только черновики
+        и заявки на рассмотрении; уже одобренные и уже отклонённые
+        возвращаются с причиной и не меняются.
+        """
+        statuses = await self._update_status(
+            db,
+            list(dict.fromkeys(transfer_ids)),
+            TransferStatus.rejected,
+            list(self.ACTIVE_STATUSES),
+            manager_id,
+        )
+        await db.commit()
+
+        results = []
+        for index, tid in enumerate(transfer_ids):
+            if tid not in statuses:
+                detail = TransferNotFound(tid).message
+            elif statuses[tid][1]:
+                detail = None
+            elif statuses[tid][0] == TransferStatus.rejected:
+                detail = TransferAlreadyRejected(tid).message
+            else:
+                detail = TransferAlreadyApproved(tid).message
+            results.append(
+                TransferBatchResult(index=index, success=detail is None, transfer_id=tid, detail=detail)
+            )
+        rejected = [tid for tid, (_, changed) in statuses.items() if changed]
+        log.info(f"Пакетное отклонение заявок менеджером {manager_id}: отклонено {len(rejected)} из {len(results)}")
+        await self._notify("rejected", rejected, status=TransferStatus.rejected)
+        return results
+
+    @staticmethod
+    async def _update_status(
+            db: AsyncSession,
+            transfer_ids: List[int],
+            status: TransferStatus,
+            from_statuses: List[TransferStatus],
+            manager_id: Optional[int] = None,
+    ) -> dict:
+        """
+        Переводит заявки из from_statuses в status одним UPDATE ... RETURNING
+        и в том же запросе читает прежние статусы всех переданных id.
+
+        Returns:
+            dict: {id: (прежний статус, изменена ли)}; несуществующих id в нём нет.
+        """
+        ids = literal(transfer_ids, ARRAY(Integer))
+        changes = {"status": status}
+        if manager_id is not None:
+            changes["manager_id"] = manager_id
+        updated = (
+            update(Transfer)
+            .where(Transfer.id == any_(ids), Transfer.status.in_(from_statuses))
+            .values(**changes)
+            .returning(Transfer.id)
+            .cte("updated")
+        )
+        rows = await db.execute(
+            select(Transfer.id, Transfer.status, updated.c.id.isnot(None))
+            .outerjoin(updated, updated.c.id == Transfer.id)
+            .where(Transfer.id == any_(ids))
+        )
+        return {tid: (old_status, changed) for tid, old_status, changed in rows.all()}
+
     async def reject_transfer(self, transfer_id: int, manager_id: int):
         try:
             await self._change_transfer_status(
                 transfer_id, TransferStatus.rejected, manager_id
             )
             log.info(f"Отклонена заявка {transfer_id}")
+            await self._notify("rejected", [transfer_id], status=TransferStatus.rejected)
         except Exception as e:
             log.error(f"Ошибка при отклонении заявки {transfer_id}: {str(e)}")
             raise
@@ -357,64 +978,265 @@ class ORMTransferService(ITransferService):
     @staticmethod
     @db_session
     async def reorder_transfers(new_orders: List[TransferReorder], db: AsyncSession):
+        """
+        Меняет приоритеты одним UPDATE transfer ... FROM (VALUES ...), затем
+        одним агрегатом проверяет, что у каждой затронутой пары
+        (студент, исходный электив) приоритеты активных (draft/pending)
+        заявок остались перестановкой 1..n. Если нет — транзакция откатывается.
+
+        Перед изменением берётся лок пар (_lock_pairs), затем их заявки
+        блокируются SELECT ... FOR UPDATE в порядке id: конкурентные
+        перестановки, создания и удаления одной пары выполняются по очереди
+        и не видят промежуточных состояний.
+        """
+        if not new_orders:
+            return
+        seen, duplicates = set(), []
         for order in new_orders:
-            stmt = (
-                update(Transfer)
-                .where(Transfer.id == order.id)
-                .values(priority=order.priority)
+            if order.id in seen:
+                duplicates.append(order.id)
+            seen.add(order.id)
+        if duplicates:
+            raise DuplicateTransferIds(duplicates)
+
+        ids = literal(list(seen), ARRAY(Integer))
+        pairs = [tuple(pair) for pair in (await db.execute(
+            select(Transfer.student_id, Transfer.from_elective_id)
+            .where(Transfer.id == any_(ids))
+            .distinct()
+        )).all()]
+        await ORMTransferService._lock_pairs(db, pairs)
+        locked = (await db.execute(
+            select(Transfer.id, Transfer.student_id, Transfer.from_elective_id, Transfer.status)
+            .where(tuple_(Transfer.student_id, Transfer.from_elective_id).in_(pairs))
+            .order_by(Transfer.id)
+            .with_for_update()
+        )).all()
+        locked = {row.id: row for row in locked}
+
+        missing = seen - set(locked)
+        if missing:
+            await db.rollback()
+            raise TransferNotFound(min(missing))
+        inactive = next(
+            (locked[tid] for tid in sorted(seen) if locked[tid].status not in ORMTransferService.ACTIVE_STATUSES),
+            None,
+        )
+        if inactive is not None:
+            await db.rollback()
+            raise InvalidTransferPriorities(inactive.student_id, inactive.from_elective_id)
+
+        new_priorities = values(
+            column("id", Integer), column("priority", Integer), name="new_priorities"
+        ).data([(order.id, order.priority) for order in new_orders])
+        await db.execute(
+            update(Transfer)
+            .where(Transfer.id == new_priorities.c.id)
+            .values(priority=new_priorities.c.priority)
+        )
+
+        touched = list({(locked[tid].student_id, locked[tid].from_elective_id) for tid in seen})
+        broken = (await db.execute(
+            select(Transfer.student_id, Transfer.from_elective_id)
+            .where(
+                tuple_(Transfer.student_id, Transfer.from_elective_id).in_(touched),
+                Transfer.status.in_(ORMTransferService.ACTIVE_STATUSES),
             )
-            await db.execute(stmt)
+            .group_by(Transfer.student_id, Transfer.from_elective_id)
+            .having(or_(
+                func.min(Transfer.priority) != 1,
+                func.max(Transfer.priority) != func.count(),
+                func.count(func.distinct(Transfer.priority)) != func.count(),
+            ))
+            .limit(1)
+        )).first()
+        if broken is not None:
+            await db.rollback()
+            raise InvalidTransferPriorities(broken.student_id, broken.from_elective_id)
+
         await db.commit()
+        await ORMTransferService._notify(
+            "reordered",
+            [order.id for order in new_orders],
+            priorities={order.id: order.priority for order in new_orders},
+        )
+
+    async def count_active_transfer(self) -> int:
+        counters = await self.get_transfer_counters()
+        return counters["total"][TransferStatus.pending.value]
 
-    @staticmethod
     @db_session
-    async def count_active_transfer(db: AsyncSession) -> int:
-        result = await db.execute(
-            select(func.count())
-            .select_from(Transfer)
-            .where(Transfer.status == TransferStatus.pending.value)
-        )
-        return result.scalar_one()
+    async def get_transfer_counters(self, db: AsyncSession) -> dict:
+        """
+        Число заявок по статусам: всего и по исходному/целевому элективу.
+        Читается из Redis, при промахе — из transfer_counter вместе с ещё
+        не свёрнутыми дельтами триггеров; COUNT(*) по transfer не выполняется.
+
+        Returns:
+            dict: {"total": {status: n}, "from": {elective_id: {status: n}}, "to": {...}}
+        """
+        cached = await transfer_counters_cache.get()
+        if cached is not None:
+            return cached
+
+        counters = {"total": {status.value: 0 for status in TransferStatus}, "from": {}, "to": {}}
+        for (direction, elective_id, status), count in (await self._read_counters(db)).items():
+            if direction == "all":
+                counters["total"][status] = count
+            else:
+                counters[direction].setdefault(str(elective_id), {})[status] = count
+
+        await transfer_counters_cache.set(counters)
+        return counters
 
     @staticmethod
+    async def _read_counters(db: AsyncSession) -> dict:
+        """{(direction, elective_id, status): count} — счётчики с учётом несвёрнутых дельт."""
+        combined = union_all(
+            select(
+                TransferCounter.direction,
+                TransferCounter.elective_id,
+                TransferCounter.status,
+                TransferCounter.count,
+            ),
+            select(
+                TransferCounterDelta.direction,
+                TransferCounterDelta.elective_id,
+                TransferCounterDelta.status,
+                TransferCounterDelta.delta,
+            ),
+        ).subquery()
+        total = func.sum(combined.c.count)
+        rows = await db.execute(
+            select(combined.c.direction, combined.c.elective_id, combined.c.status, total)
+            .group_by(combined.c.direction, combined.c.elective_id, combined.c.status)
+            .having(total != 0)
+        )
+        return {
+            (direction, elective_id, status): int(count)
+            for direction, elective_id, status, count in rows.all()
+        }
+
     @db_session
-    async def lock_transfers(transfer_ids: List[int], db: AsyncSession) -> int:
-        result = await db.execute(select(Transfer).where(Transfer.id.in_(transfer_ids)))
-        transfers = result.scalars().all()
+    async def fold_counters(self, db: AsyncSession) -> Optional[int]:
+        """
+        Сворачивает дельты триггеров в transfer_counter. Итоговые числа не
+        меняются, поэтому кэш не сбрасывается. None — свёртку или пересчёт
+        сейчас выполняет другой воркер.
+        """
+        if not (await db.execute(text(TRANSFER_COUNTER_LOCK))).scalar():
+            return None
+        folded = (await db.execute(text(TRANSFER_COUNTER_FOLD))).rowcount
+        await db.commit()
+        return folded
 
-        found_ids = {t.id for t in transfers}
-        missing = set(transfer_ids) - found_ids
-        if missing:
-            raise ORMTransferService.NotFoundError(f"Transfers not found: {missing}")
+    @db_session
+    async def reconcile_counters(self, db: AsyncSession) -> Optional[int]:
+        """
+        Сверяет transfer_counter с полным пересчётом по transfer и
+        перезаписывает его. Возвращает число расходившихся счётчиков или
+        None, если сверку сейчас выполняет другой воркер.
+        """
+        if not (await db.execute(text(TRANSFER_COUNTER_LOCK))).scalar():
+            return None
+        # первый оператор пересчёта — LOCK TABLE: «до» читается уже под ним,
+        # иначе коммиты между чтением и блокировкой сошли бы за расхождение
+        lock_table, *recount = TRANSFER_COUNTER_RECOUNT
+        await db.execute(text(lock_table))
+        before = await self._read_counters(db)
+        for stmt in recount:
+            await db.execute(text(stmt))
+        after = await self._read_counters(db)
+        await db.commit()
+        await transfer_counters_cache.invalidate()
 
-        changed = 0
-        for tr in transfers:
-            if tr.status == TransferStatus.draft:
-                tr.status = TransferStatus.pending
-                changed += 1
+        drift = sum(before.get(key, 0) != after.get(key, 0) for key in before.keys() | after.keys())
+        if drift:
+            log.warning(f"Счётчики заявок расходились с данными и пересчитаны: {drift}")
+        return drift
 
-        if changed:
-            await db.commit()
-        return changed
+    @staticmethod
+    async def _notify(event_type: str, ids: list[int], **payload):
+        """После коммита: сбросить кэш счётчиков и разослать событие менеджерам."""
+        if not ids:
+            return
+        await transfer_counters_cache.invalidate()
+        await transfer_events.publish(event_type, ids, **payload)
 
+    @staticmethod
+    @db_session
+    async def lock_transfers(transfer_ids: List[int], db: AsyncSession) -> int:
+        """Черновики из списка → на рассмотрение; один UPDATE, отсутствующие id — ошибка."""
+        return await ORMTransferService._switch_status(
+            db, transfer_ids, TransferStatus.draft, TransferStatus.pending
+        )
 
     @staticmethod
     @db_session
     async def unlock_transfers(transfer_ids: List[int], db: AsyncSession) -> int:
-        result = await db.execute(select(Transfer).where(Transfer.id.in_(transfer_ids)))
-        transfers = result.scalars().all()
+        """Заявки на рассмотрении из списка → обратно в черновики."""
+        return await ORMTransferService._switch_status(
+            db, transfer_ids, TransferStatus.pending, TransferStatus.draft
+        )
 
-        found_ids = {t.id for t in transfers}
-        missing = set(transfer_ids) - found_ids
+    @staticmethod
+    async def _switch_status(
+            db: AsyncSession,
+            transfer_ids: List[int],
+            from_status: TransferStatus,
+            to_status: TransferStatus,
+    ) -> int:
+        statuses = await ORMTransferService._update_status(
+            db, list(set(transfer_ids)), to_status, [from_status]
+        )
+        missing = sorted(set(transfer_ids) - set(statuses))
         if missing:
-            raise ORMTransferService.NotFoundError(f"Transfers not found: {missing}")
-
-        changed = 0
-        for tr in transfers:
-            if tr.status == TransferStatus.pending:
-                tr.status = TransferStatus.draft
-                changed += 1
+            await db.rollback()
+            raise TransfersNotFound(missing)
+        await db.commit()
+        changed = [tid for tid, (_, is_changed) in statuses.items() if is_changed]
+        await ORMTransferService._notify(
+            "locked" if to_status == TransferStatus.pending else "unlocked", changed, status=to_status
+        )
+        return len(changed)
 
-        if changed:
-            await db.commit()
-        return changed
\ No newline at end of file
+    @staticmethod
+    @db_session
+    async def lock_all_drafts(
+            db: AsyncSession,
+            elective_id: Optional[int] = None,
+            potok: Optional[str] = None,
+    ) -> int:
+        """
+        Закрытие приёма: все черновики (по элективу и/или потоку студентов,
+        без фильтров — все) переводятся на рассмотрение одним UPDATE.
+        """
+        conditions = [Transfer.status == TransferStatus.draft]
+        if elective_id is not None:
+            conditions.append(
+                or_(Transfer.from_elective_id == elective_id, Transfer.to_elective_id == elective_id)
+            )
+        if potok is not None:
+            conditions.append(
+                Transfer.student_id.in_(select(Student.id).where(Student.potok == potok))
+            )
+        locked = (await db.execute(
+            update(Transfer)
+            .where(*conditions)
+            .values(status=TransferStatus.pending)
+        )).rowcount
+        await db.commit()
+        log.info(
+            f"Черновики заявок переведены на рассмотрение: {locked} "
+            f"(электив={elective_id}, поток={potok})"
+        )
+        if locked:
+            # id всех черновиков в событие не кладём: клиент перечитает заявки по фильтру
+            await transfer_counters_cache.invalidate()
+            await transfer_events.publish_bulk(
+                "locked",
+                locked,
+                {"elective_id": elective_id, "potok": potok, "status": TransferStatus.draft},
+                status=TransferStatus.pending,
+            )
+        return locked
@@ -1,6 +1,9 @@
-from typing import List
+from datetime import datetime
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from backend.database.models.transfer import TransferStatus
 
 
 class TransferData(BaseModel):
@@ -10,6 +13,41 @@ class TransferData(BaseModel):
     groups_to_ids: List[int]
 
 
+class TransferBatchResult(BaseModel):
+    index: int
+    success: bool
+    transfer_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class TransferBatchAction(BaseModel):
+    transfer_ids: List[int] = Field(min_length=1, max_length=1000)
+    manager_id: int
+
+
+class TransferLockAll(BaseModel):
+    elective_id: Optional[int] = None  # исходный или целевой
+    potok: Optional[str] = None
+
+
+class TransferFilter(BaseModel):
+    status: Optional[TransferStatus] = None
+    student_id: Optional[int] = None
+    manager_id: Optional[int] = None
+    from_elective_id: Optional[int] = None
+    to_elective_id: Optional[int] = None
+    elective_id: Optional[int] = None  # исходный или целевой
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+
+class TransferPageParams(BaseModel):
+    sort: Literal["created_at", "priority", "id"] = "created_at"
+    order: Literal["asc", "desc"] = "desc"
+    limit: int = Field(50, ge=1, le=500)
+    cursor: Optional[str] = None
+
+
 class TransferReorder(BaseModel):
     id: int
     priority: int
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+from backend.logic.services.zexceptions.base import ServiceException
+
+
+@dataclass
+class ModelVersionNotFound(ServiceException):
+    version: str
+
+    @property
+    def message(self):
+        return f"Версия модели {self.version} не найдена"
+
+
+@dataclass
+class NoPreviousModelVersion(ServiceException):
+    @property
+    def message(self):
+        return "Нет предыдущей версии модели для отката"
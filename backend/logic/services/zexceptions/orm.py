@@ -12,3 +12,79 @@ class AlreadyExistsTransfer(ServiceException):
     @property
     def message(self):
         return f"Заявка студента- {self.student_id} с электива {self.from_id} на {self.to_id} уже существует"
+
+
+@dataclass
+class InvalidCursor(ServiceException):
+    cursor: str
+
+    @property
+    def message(self):
+        return f"Некорректный курсор пагинации: {self.cursor}"
+
+
+@dataclass
+class TransferNotFound(ServiceException):
+    transfer_id: int
+
+    @property
+    def message(self):
+        return f"Заявка {self.transfer_id} не найдена"
+
+
+@dataclass
+class TransferAlreadyApproved(ServiceException):
+    transfer_id: int
+
+    @property
+    def message(self):
+        return f"Заявка {self.transfer_id} уже одобрена"
+
+
+@dataclass
+class TransferAlreadyRejected(ServiceException):
+    transfer_id: int
+
+    @property
+    def message(self):
+        return f"Заявка {self.transfer_id} уже отклонена"
+
+
+@dataclass
+class GroupsAreFull(ServiceException):
+    group_names: list
+
+    @property
+    def message(self):
+        return f"Нет свободных мест в группах: {', '.join(self.group_names)}"
+
+
+@dataclass
+class InvalidTransferPriorities(ServiceException):
+    student_id: int
+    from_elective_id: int
+
+    @property
+    def message(self):
+        return (
+            f"Приоритеты активных заявок студента {self.student_id} с электива {self.from_elective_id} "
+            f"должны быть различными и идти подряд начиная с 1"
+        )
+
+
+@dataclass
+class DuplicateTransferIds(ServiceException):
+    transfer_ids: list
+
+    @property
+    def message(self):
+        return f"Заявки указаны несколько раз: {', '.join(map(str, self.transfer_ids))}"
+
+
+@dataclass
+class TransfersNotFound(ServiceException):
+    transfer_ids: list
+
+    @property
+    def message(self):
+        return f"Заявки не найдены: {', '.join(map(str, self.transfer_ids))}"
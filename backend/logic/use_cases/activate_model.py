@@ -0,0 +1,54 @@
+import asyncio
+from dataclasses import dataclass
+from logging import getLogger
+
+from backend.config import settings
+from backend.logic.services.inference_service.onnx import ONNXInferenceService
+from backend.logic.services.inference_service.registry import ModelRegistry
+from backend.logic.services.student_service.orm import ORMStudentService
+from backend.logic.services.zexceptions.inference import NoPreviousModelVersion
+
+log = getLogger(__name__)
+
+
+@dataclass
+class ActivateModelUseCase:
+    student_service: ORMStudentService
+    inference_service: ONNXInferenceService
+    registry: ModelRegistry
+
+    async def execute(self, version: str, persist: bool = True) -> str:
+        """
+        Загружает и прогревает версию в фоне, собирает для неё матрицу
+        элективов и только после этого атомарно подменяет активную модель.
+        """
+        self.registry.version_path(version)
+        bundle = await self.inference_service.prepare(version)
+        if self.inference_service.bundle is not bundle:
+            # эту же загрузку мог уже активировать конкурентный вызов
+            await self.student_service.load_item_matrix_for(bundle)
+            if self.inference_service.bundle is not bundle:
+                self.inference_service.swap(bundle)
+        if persist:
+            self.registry.set_active(version)
+        return version
+
+    async def rollback(self) -> str:
+        previous = self.registry.previous_version()
+        if previous is None:
+            raise NoPreviousModelVersion()
+        return await self.execute(previous)
+
+    async def watch(self):
+        """
+        Следит за указателем ACTIVE в реестре: так остальные воркеры
+        подхватывают версию, переключённую через API в одном из них.
+        """
+        while True:
+            await asyncio.sleep(settings.INFERENCE.POLL_INTERVAL)
+            try:
+                version = self.registry.active_version()
+                if version != self.inference_service.version:
+                    await self.execute(version, persist=False)
+            except Exception as e:
+                log.error(f"Не удалось переключить версию модели: {e}")
@@ -20,7 +20,7 @@ class CreateTransferUseCase:
             student_id, from_elective_id
         )
         group_from_ids = [group.id for group in groups_from]
-        await self.transfer_service.create_transfer(
+        transfer_id = await self.transfer_service.create_transfer(
             student_id, from_elective_id, to_elective_id, group_from_ids, groups_to_ids
         )
-        return {"message": "Transfer created"}
+        return {"message": "Transfer created", "transfer_id": transfer_id}
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+
+from backend.database.models.transfer import groups_signature
+from backend.logic.services.elective_service.base import IElectiveService
+from backend.logic.services.student_service.base import IStudentService
+from backend.logic.services.transfer_service.base import ITransferService
+from backend.logic.services.transfer_service.schemas import TransferBatchResult, TransferData
+from backend.logic.services.zexceptions.orm import AlreadyExistsTransfer
+
+
+@dataclass
+class CreateTransfersBatchUseCase:
+    student_service: IStudentService
+    transfer_service: ITransferService
+    elective_service: IElectiveService
+
+    async def execute(self, transfers: list[TransferData]) -> list[TransferBatchResult]:
+        """
+        Пакетная подача заявок: исходные группы всех студентов и электив
+        каждой целевой группы определяются двумя запросами, проверка идёт
+        в памяти, корректные заявки вставляются одной транзакцией.
+        Ошибка в одной заявке не мешает остальным.
+        """
+        groups_from = await self.student_service.get_students_groups_for_electives(
+            [(t.student_id, t.from_elective_id) for t in transfers]
+        )
+        group_electives = await self.elective_service.get_groups_electives(
+            [group_id for t in transfers for group_id in t.groups_to_ids]
+        )
+
+        results = [TransferBatchResult(index=i, success=False) for i in range(len(transfers))]
+        valid, valid_indexes, seen = [], [], set()
+        for i, t in enumerate(transfers):
+            source_groups = groups_from.get((t.student_id, t.from_elective_id), [])
+            foreign_groups = [
+                group_id for group_id in t.groups_to_ids
+                if group_electives.get(group_id) != t.to_elective_id
+            ]
+            key = (
+                t.student_id,
+                t.from_elective_id,
+                t.to_elective_id,
+                groups_signature(source_groups, t.groups_to_ids),
+            )
+
+            if t.from_elective_id == t.to_elective_id:
+                results[i].detail = "Исходный и целевой электив совпадают"
+            elif not source_groups:
+                results[i].detail = f"Студент {t.student_id} не записан на электив {t.from_elective_id}"
+            elif not t.groups_to_ids:
+                results[i].detail = "Не выбраны целевые группы"
+            elif foreign_groups:
+                results[i].detail = f"Группы {foreign_groups} не относятся к элективу {t.to_elective_id}"
+            elif key in seen:
+                results[i].detail = "Заявка повторяется в пакете"
+            else:
+                seen.add(key)
+                valid_indexes.append(i)
+                valid.append(
+                    {
+                        "student_id": t.student_id,
+                        "from_elective_id": t.from_elective_id,
+                        "to_elective_id": t.to_elective_id,
+                        "groups_from_ids": source_groups,
+                        "groups_to_ids": t.groups_to_ids,
+                    }
+                )
+
+        transfer_ids = await self.transfer_service.create_transfers(valid)
+        for i, transfer, transfer_id in zip(valid_indexes, valid, transfer_ids):
+            if transfer_id is None:
+                results[i].detail = AlreadyExistsTransfer(
+                    transfer["student_id"], transfer["from_elective_id"], transfer["to_elective_id"]
+                ).message
+            else:
+                results[i].success = True
+                results[i].transfer_id = transfer_id
+        return results
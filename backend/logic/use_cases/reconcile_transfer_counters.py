@@ -0,0 +1,34 @@
+import asyncio
+from dataclasses import dataclass
+from logging import getLogger
+
+from backend.config import settings
+from backend.logic.services.transfer_service.orm import ORMTransferService
+
+log = getLogger(__name__)
+
+
+@dataclass
+class ReconcileTransferCountersUseCase:
+    transfer_service: ORMTransferService
+
+    async def watch(self):
+        """
+        Каждые COUNTERS_FOLD_INTERVAL секунд сворачивает дельты счётчиков
+        заявок, раз в COUNTERS_RECONCILE_INTERVAL сверяет их с таблицей
+        transfer: чинит расхождения после изменений в обход триггеров
+        (TRUNCATE, ручные правки). Из воркеров работу делает тот, кто первым
+        взял advisory-блокировку, остальные пропускают ход.
+        """
+        loop = asyncio.get_running_loop()
+        reconcile_at = loop.time() + settings.TRANSFERS.COUNTERS_RECONCILE_INTERVAL
+        while True:
+            await asyncio.sleep(settings.TRANSFERS.COUNTERS_FOLD_INTERVAL)
+            try:
+                if loop.time() >= reconcile_at:
+                    reconcile_at = loop.time() + settings.TRANSFERS.COUNTERS_RECONCILE_INTERVAL
+                    await self.transfer_service.reconcile_counters()
+                else:
+                    await self.transfer_service.fold_counters()
+            except Exception as e:
+                log.error(f"Не удалось обновить счётчики заявок: {e}")
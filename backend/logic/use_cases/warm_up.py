@@ -0,0 +1,84 @@
+import asyncio
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Awaitable, Callable, Optional
+
+from backend.config import settings
+from backend.logic.services.elective_service.orm import ORMElectiveService
+from backend.logic.services.healthcheck.readiness import Readiness
+from backend.logic.services.inference_service.onnx import ONNXInferenceService
+from backend.logic.services.inference_service.registry import ModelRegistry
+from backend.logic.services.student_service.orm import ORMStudentService
+from backend.logic.use_cases.activate_model import ActivateModelUseCase
+from backend.utils.time_measure import time_log
+
+log = getLogger(__name__)
+
+
+@dataclass
+class WarmUpUseCase:
+    student_service: ORMStudentService
+    elective_service: ORMElectiveService
+    inference_service: ONNXInferenceService
+    registry: ModelRegistry
+    readiness: Readiness
+
+    # без модели воркер не может отдавать рекомендации: до их прогрева 503
+    REQUIRED_STEPS = ("model", "scoring")
+    # без них воркер работает, но хуже (объяснения, запасной рекомендатель, поиск)
+    OPTIONAL_STEPS = ("statistics", "fallback", "search")
+
+    @time_log("warm_up")
+    async def execute(self):
+        """
+        Прогрев воркера до приёма трафика: ONNX-сессии и словари активной
+        версии, матрица элективов, пробный скоринг через MicroBatcher,
+        сводная статистика, запасной рекомендатель и индекс поиска.
+
+        Каждый этап повторяется с экспоненциальной паузой. Обязательные этапы
+        повторяются до успеха, необязательные — WARM_UP.RETRIES раз, после
+        чего воркер помечается degraded, но остаётся готовым.
+        """
+        self.readiness.start(self.REQUIRED_STEPS, self.OPTIONAL_STEPS)
+        steps: dict[str, Callable[[], Awaitable]] = {
+            "model": self._load_model,
+            "scoring": self.inference_service.warm_up_scoring,
+            "statistics": self.student_service.refresh_statistics,
+            "fallback": self.student_service.refresh_fallback,
+            "search": self.elective_service.warm_up_search,
+        }
+        for step in self.REQUIRED_STEPS:
+            await self._retry(step, steps[step], attempts=None)
+            self.readiness.mark(step)
+
+        for step in self.OPTIONAL_STEPS:
+            if await self._retry(step, steps[step], attempts=settings.WARM_UP.RETRIES):
+                self.readiness.mark(step)
+            else:
+                log.error(f"Этап прогрева {step} не пройден, воркер работает в режиме degraded")
+                self.readiness.fail(step)
+
+    async def _load_model(self):
+        await ActivateModelUseCase(
+            self.student_service, self.inference_service, self.registry
+        ).execute(self.registry.active_version(), persist=False)
+
+    @staticmethod
+    async def _retry(
+            step: str, func: Callable[[], Awaitable], attempts: Optional[int]
+    ) -> bool:
+        """Вызывает func до успеха или attempts раз (None — без ограничения)."""
+        delay = settings.WARM_UP.BACKOFF
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await func()
+                return True
+            except Exception as e:
+                if attempts is not None and attempt >= attempts:
+                    log.warning(f"Этап прогрева {step} не пройден за {attempt} попыток: {e}")
+                    return False
+                log.warning(f"Этап прогрева {step}, попытка {attempt}: {e}; повтор через {delay} с")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.WARM_UP.MAX_BACKOFF)
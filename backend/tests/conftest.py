@@ -0,0 +1,122 @@
+import asyncio
+import os
+
+# окружение testing из settings.yml: отдельная БД backend_test и Redis DB 15
+os.environ.setdefault("ENV_FOR_DYNACONF", "testing")
+
+import pytest  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.sql import text  # noqa: E402
+
+import backend.database.models  # noqa: E402,F401
+import backend.database.models.log  # noqa: E402,F401
+import backend.database.models.report  # noqa: E402,F401
+import backend.database.models.transfer  # noqa: E402,F401
+from backend.database.counters import install_transfer_counters  # noqa: E402
+from backend.database.database import Base, engine  # noqa: E402
+from backend.database.models.elective import Elective  # noqa: E402
+from backend.database.models.group import Group  # noqa: E402
+from backend.database.models.manager import Manager  # noqa: E402
+from backend.database.models.student import Student, student_group  # noqa: E402
+
+
+def run(coro):
+    """
+    Выполняет корутину в новом event loop. Пул соединений привязан к loop,
+    поэтому после каждого вызова он закрывается. Соединения, оставленные
+    в пуле чужим loop (TestClient), отбрасываются без закрытия.
+
+    DatabaseLogger пишет в БД фоновыми задачами. Их дожидаемся: иначе
+    asyncio.run отменит запись посреди транзакции, и брошенное соединение
+    будет держать блокировку logs, на которой встанет TRUNCATE.
+    """
+    async def wrapper():
+        await engine.dispose(close=False)
+        try:
+            return await coro
+        finally:
+            pending = asyncio.all_tasks() - {asyncio.current_task()}
+            if pending:
+                await asyncio.wait(pending, timeout=5)
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+async def _create_schema():
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await install_transfer_counters(conn)
+
+
+async def _truncate():
+    tables = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture(scope="session")
+def database():
+    try:
+        run(_create_schema())
+    except (OSError, ConnectionError) as e:
+        # в CI база поднимается сервисом workflow — её отсутствие это ошибка
+        if os.environ.get("CI"):
+            raise
+        pytest.skip(f"PostgreSQL недоступен: {e}")
+
+
+@pytest.fixture
+def db(database):
+    """Пустая схема перед каждым тестом."""
+    run(_truncate())
+
+
+async def _seed(capacity: int):
+    """
+    Менеджер с id 1, два студента направления 09.03.01 на элективе
+    «Алгоритмы» (группа A1) и электив «Базы данных» с группами
+    B1 (capacity) и B2 (без ограничения).
+    """
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(Manager), [{"name": "Менеджер", "email": "manager@example.com", "status": "active"}]
+        )
+        electives = (await conn.execute(
+            insert(Elective).returning(Elective.id),
+            [{"name": "Алгоритмы", "cluster": "cs"}, {"name": "Базы данных", "cluster": "cs"}],
+        )).scalars().all()
+        groups = (await conn.execute(
+            insert(Group).returning(Group.id),
+            [
+                {"name": "A1", "type": "lecture", "capacity": 30, "elective_id": electives[0]},
+                {"name": "B1", "type": "lecture", "capacity": capacity, "elective_id": electives[1]},
+                {"name": "B2", "type": "lecture", "capacity": None, "elective_id": electives[1]},
+            ],
+        )).scalars().all()
+        students = (await conn.execute(
+            insert(Student).returning(Student.id),
+            [
+                {
+                    "fio": f"Студент {i}",
+                    "email": f"student{i}@example.com",
+                    "sp_code": "09.03.01",
+                    "sp_profile": "ПИ",
+                    "potok": "П1",
+                }
+                for i in range(2)
+            ],
+        )).scalars().all()
+        await conn.execute(
+            insert(student_group),
+            [{"student_id": s, "group_id": groups[0]} for s in students],
+        )
+    return {"electives": electives, "groups": groups, "students": students}
+
+
+@pytest.fixture
+def world(db):
+    return run(_seed(capacity=1))
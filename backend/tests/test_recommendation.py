@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from backend.benchmark_recommendation import retrieval_metrics
+from backend.database.models.student import Student
+from backend.logic.services.student_service.explain import explain_recommendations
+from backend.logic.services.student_service.fallback import CoEnrollmentModel
+
+
+def test_student_embed_survives_reassigning_same_features():
+    student = Student(sp_code="09.03.01", sp_profile="ПИ", diagnostics={"reading": 1}, competencies=[0.5])
+    student.embed, student.embed_version = [0.1, 0.2], "v1"
+
+    # загрузка перезаписывает признаки теми же значениями
+    student.diagnostics = {"reading": 1}
+    student.competencies = [0.5]
+    assert student.embed == [0.1, 0.2] and student.embed_version == "v1"
+
+    student.diagnostics = {"reading": 2}
+    assert student.embed is None and student.embed_version is None
+
+
+def test_retrieval_metrics():
+    relevance = np.array([
+        [True, False, True, False],
+        [False, True, False, False],
+        [False, False, False, False],  # без истинных пар — не учитывается
+    ])
+    top_idx = np.array([[0, 1], [2, 1], [0, 1]])
+
+    metrics = retrieval_metrics(top_idx, relevance, k=2)
+
+    assert metrics["users"] == 2
+    # студент 0: 1 из 2 истинных, студент 1: 1 из 1
+    assert metrics["recall@2"] == pytest.approx((0.5 + 1.0) / 2)
+    idcg0 = 1 + 1 / np.log2(3)
+    ndcg1 = (1 / np.log2(3)) / 1
+    assert metrics["ndcg@2"] == pytest.approx((1 / idcg0 + ndcg1) / 2)
+
+
+def test_retrieval_metrics_with_fewer_items_than_k():
+    relevance = np.array([[True, False, True]])
+    metrics = retrieval_metrics(np.array([[0, 2, 1]]), relevance, k=10)
+
+    assert metrics["recall@10"] == pytest.approx(1.0)
+    assert metrics["ndcg@10"] == pytest.approx(1.0)
+
+
+def test_co_enrollment_model_build():
+    # студенты 1 и 2 оба на элективах 10 и 20, студент 3 — только на 30
+    model = CoEnrollmentModel.build(
+        student_ids=np.array([1, 1, 2, 2, 3, 1]),
+        elective_ids=np.array([10, 20, 10, 20, 30, 10]),  # последняя пара — повтор
+        sp_codes=np.array(["A", "A", "A", "A", "B", "A"]),
+    )
+
+    assert model.student_ids.tolist() == [1, 2, 3]
+    assert model.elective_ids.tolist() == [10, 20, 30]
+    assert model.student_indptr.tolist() == [0, 2, 4, 5]
+    assert model.codes.tolist() == ["A", "B"]
+    assert model.popularity[0].tolist() == pytest.approx([0.5, 0.5, 0.0])
+    assert model.popularity[1].tolist() == pytest.approx([0.0, 0.0, 1.0])
+
+    # 10 и 20 всегда вместе: косинус 1, с 30 совместных записей нет
+    neighbours = {
+        int(model.elective_ids[i]): {
+            int(model.elective_ids[j]): float(w)
+            for j, w in zip(
+                model.co_indices[model.co_indptr[i]:model.co_indptr[i + 1]],
+                model.co_data[model.co_indptr[i]:model.co_indptr[i + 1]],
+            )
+        }
+        for i in range(3)
+    }
+    assert neighbours[10] == {20: pytest.approx(1.0)}
+    assert neighbours[30] == {}
+
+    # студенту 3 советуются элективы, которых у него нет
+    assert {item for item, _ in model.recommend(3, "B", 5)} == {10, 20}
+
+
+def test_explain_recommendations_labels_score_source():
+    explanations = explain_recommendations(
+        np.array([0.9, 0.1]),
+        np.array([0.2, 0.2]),
+        np.array([0.1, 0.3]),
+        np.array([1, 3]),
+        source="co_enrollment",
+    )
+
+    assert explanations[0]["source"] == "co_enrollment"
+    assert explanations[0]["co_enrollment"] == 0.9
+    assert explanations[0]["top_signals"] == ["co_enrollment"]
+    assert explanations[1]["top_signals"] == ["peers"]
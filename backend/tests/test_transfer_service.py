@@ -0,0 +1,330 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from backend.database.counters import install_transfer_counters
+from backend.database.database import AsyncSessionLocal, engine
+from backend.database.models.student import student_group
+from backend.database.models.transfer import Transfer, TransferStatus
+from backend.logic.services.transfer_service.events import RESYNC, RedisTransferEvents
+from backend.logic.services.transfer_service.orm import ORMTransferService
+from backend.logic.services.transfer_service.schemas import TransferPageParams, TransferReorder
+from backend.logic.services.zexceptions.orm import (
+    AlreadyExistsTransfer,
+    DuplicateTransferIds,
+    GroupsAreFull,
+    InvalidCursor,
+    InvalidTransferPriorities,
+    TransferAlreadyApproved,
+    TransferAlreadyRejected,
+    TransferNotFound,
+    TransfersNotFound,
+)
+from backend.tests.conftest import run
+
+
+async def _transfers() -> dict[int, tuple]:
+    """{id: (status, priority)} всех заявок."""
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(select(Transfer.id, Transfer.status, Transfer.priority))
+        return {tid: (status, priority) for tid, status, priority in rows.all()}
+
+
+def _create(world, student: int = 0, group: int = 1) -> int:
+    a1, b1, b2 = world["groups"]
+    return run(ORMTransferService().create_transfer(
+        student_id=world["students"][student],
+        from_elective_id=world["electives"][0],
+        to_elective_id=world["electives"][1],
+        groups_from_ids=[a1],
+        groups_to_ids=[world["groups"][group]],
+    ))
+
+
+def _batch_item(world, student: int = 0, group: int = 1) -> dict:
+    return {
+        "student_id": world["students"][student],
+        "from_elective_id": world["electives"][0],
+        "to_elective_id": world["electives"][1],
+        "groups_from_ids": [world["groups"][0]],
+        "groups_to_ids": [world["groups"][group]],
+    }
+
+
+async def _groups_of(student_id: int) -> set[int]:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(student_group.c.group_id).where(student_group.c.student_id == student_id)
+        )
+        return set(rows.scalars().all())
+
+
+def test_create_transfer_assigns_next_priority(world):
+    first = _create(world, group=1)
+    second = _create(world, group=2)
+
+    transfers = run(_transfers())
+    assert transfers[first] == (TransferStatus.draft, 1)
+    assert transfers[second] == (TransferStatus.draft, 2)
+
+
+def test_create_transfer_rejects_duplicate(world):
+    _create(world, group=1)
+    with pytest.raises(AlreadyExistsTransfer):
+        _create(world, group=1)
+    assert len(run(_transfers())) == 1
+
+
+def test_concurrent_creates_get_distinct_priorities(world):
+    a1, b1, b2 = world["groups"]
+
+    async def create_both():
+        service = ORMTransferService()
+        return await asyncio.gather(*(
+            service.create_transfer(
+                student_id=world["students"][0],
+                from_elective_id=world["electives"][0],
+                to_elective_id=world["electives"][1],
+                groups_from_ids=[a1],
+                groups_to_ids=[group],
+            )
+            for group in (b1, b2)
+        ))
+
+    first, second = run(create_both())
+
+    transfers = run(_transfers())
+    assert {transfers[first][1], transfers[second][1]} == {1, 2}
+
+
+def test_create_transfers_skips_duplicates_without_priority_gaps(world):
+    existing = _create(world, group=1)
+
+    ids = run(ORMTransferService().create_transfers([
+        _batch_item(world, group=1),  # дубликат existing
+        _batch_item(world, group=2),
+        _batch_item(world, student=1, group=2),
+    ]))
+
+    assert ids[0] is None
+    transfers = run(_transfers())
+    assert transfers[existing][1] == 1
+    assert transfers[ids[1]][1] == 2
+    assert transfers[ids[2]][1] == 1
+
+
+def test_keyset_pagination_round_trip(world):
+    ids = {_create(world, student=s, group=g) for s in (0, 1) for g in (1, 2)}
+
+    seen, cursor = [], None
+    while True:
+        page = run(ORMTransferService().get_all_transfers(
+            page=TransferPageParams(sort="priority", order="asc", limit=3, cursor=cursor)
+        ))
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(ids) and set(seen) == ids
+    everything = run(ORMTransferService().get_all_transfers(
+        page=TransferPageParams(sort="priority", order="asc"), paginate=False,
+    ))
+    assert [item["id"] for item in everything["items"]] == seen
+
+
+def test_bad_cursor_is_rejected(database):
+    from backend.api.router.transfer import router
+
+    with pytest.raises(InvalidCursor):
+        run(ORMTransferService().get_all_transfers(
+            page=TransferPageParams(sort="priority", cursor="not-a-cursor")
+        ))
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    response = client.get("/all_transfer/page", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    # /all_transfer по-прежнему отдаёт список, курсор ему не нужен
+    assert isinstance(client.get("/all_transfer").json(), list)
+
+
+def test_approve_transfer_moves_student_and_rejects_siblings(world):
+    a1, b1, b2 = world["groups"]
+    student = world["students"][0]
+    approved = _create(world, group=1)
+    sibling = _create(world, group=2)
+
+    result = run(ORMTransferService().approve_transfer(transfer_id=approved, manager_id=1))
+
+    assert result["rejected_transfer_ids"] == [sibling]
+    transfers = run(_transfers())
+    assert transfers[approved][0] == TransferStatus.approved
+    assert transfers[sibling][0] == TransferStatus.rejected
+    assert run(_groups_of(student)) == {b1}
+
+
+def test_approve_transfer_respects_capacity(world):
+    a1, b1, b2 = world["groups"]
+    first = _create(world, student=0, group=1)
+    second = _create(world, student=1, group=1)
+    run(ORMTransferService().approve_transfer(transfer_id=first, manager_id=1))
+
+    with pytest.raises(GroupsAreFull):
+        run(ORMTransferService().approve_transfer(transfer_id=second, manager_id=1))
+    assert run(_transfers())[second][0] == TransferStatus.draft
+    assert run(_groups_of(world["students"][1])) == {a1}
+
+
+def test_approve_transfers_skips_full_groups(world):
+    first = _create(world, student=0, group=1)
+    second = _create(world, student=1, group=1)
+
+    results = run(ORMTransferService().approve_transfers([first, second, 999], manager_id=1))
+
+    assert [r.success for r in results] == [True, False, False]
+    assert "B1" in results[1].detail
+    assert results[2].detail == TransferNotFound(999).message
+
+
+def test_reject_transfers_reports_already_closed(world):
+    approved = _create(world, student=0, group=1)
+    rejected = _create(world, student=1, group=1)
+    draft = _create(world, student=1, group=2)
+    run(ORMTransferService().approve_transfer(transfer_id=approved, manager_id=1))
+    run(ORMTransferService().reject_transfers([rejected], manager_id=1))
+
+    results = run(ORMTransferService().reject_transfers([approved, rejected, draft], manager_id=1))
+
+    assert [r.success for r in results] == [False, False, True]
+    assert results[0].detail == TransferAlreadyApproved(approved).message
+    assert results[1].detail == TransferAlreadyRejected(rejected).message
+    assert run(_transfers())[draft][0] == TransferStatus.rejected
+
+
+def test_reorder_transfers(world):
+    first = _create(world, group=1)
+    second = _create(world, group=2)
+
+    run(ORMTransferService.reorder_transfers([
+        TransferReorder(id=first, priority=2),
+        TransferReorder(id=second, priority=1),
+    ]))
+
+    transfers = run(_transfers())
+    assert transfers[first][1] == 2
+    assert transfers[second][1] == 1
+
+
+def test_reorder_transfers_validation(world):
+    first = _create(world, group=1)
+    second = _create(world, group=2)
+
+    with pytest.raises(DuplicateTransferIds):
+        run(ORMTransferService.reorder_transfers([
+            TransferReorder(id=first, priority=1),
+            TransferReorder(id=first, priority=2),
+        ]))
+    with pytest.raises(TransferNotFound):
+        run(ORMTransferService.reorder_transfers([TransferReorder(id=999, priority=1)]))
+    with pytest.raises(InvalidTransferPriorities):
+        run(ORMTransferService.reorder_transfers([
+            TransferReorder(id=first, priority=1),
+            TransferReorder(id=second, priority=3),
+        ]))
+
+    transfers = run(_transfers())
+    assert (transfers[first][1], transfers[second][1]) == (1, 2)
+
+
+def test_reorder_ignores_closed_transfers_and_delete_compacts(world):
+    first = _create(world, group=1)
+    second = _create(world, group=2)
+    run(ORMTransferService().delete_transfer(transfer_id=first))
+    assert run(_transfers())[second][1] == 1
+
+    third = _create(world, group=1)
+    run(ORMTransferService().reject_transfer(transfer_id=second, manager_id=1))
+
+    # отклонённая заявка не участвует в проверке непрерывности
+    run(ORMTransferService.reorder_transfers([TransferReorder(id=third, priority=1)]))
+    with pytest.raises(InvalidTransferPriorities):
+        run(ORMTransferService.reorder_transfers([TransferReorder(id=second, priority=1)]))
+
+
+def test_lock_transfers_reports_missing_ids(world):
+    first = _create(world, group=1)
+
+    with pytest.raises(TransfersNotFound) as e:
+        run(ORMTransferService.lock_transfers([first, 999]))
+    assert e.value.transfer_ids == [999]
+    assert run(_transfers())[first][0] == TransferStatus.draft
+
+    assert run(ORMTransferService.lock_transfers([first])) == 1
+    assert run(_transfers())[first][0] == TransferStatus.pending
+
+
+def test_lock_all_drafts_counts_locked(world):
+    first = _create(world, student=0, group=1)
+    second = _create(world, student=1, group=2)
+
+    assert run(ORMTransferService.lock_all_drafts(elective_id=world["electives"][1])) == 2
+    transfers = run(_transfers())
+    assert transfers[first][0] == transfers[second][0] == TransferStatus.pending
+    assert run(ORMTransferService.lock_all_drafts()) == 0
+
+
+def test_transfer_events_resync_slow_subscriber():
+    events = RedisTransferEvents(redis=None)
+    slow, fast = asyncio.Queue(maxsize=2), asyncio.Queue(maxsize=10)
+    events._queues.update({slow, fast})
+
+    for event in ("a", "b", "c"):
+        events._fan_out(event)
+
+    assert fast.qsize() == 3
+    assert slow.qsize() == 1 and slow.get_nowait() == RESYNC
+
+
+def test_concurrent_approvals_keep_counters_consistent(world):
+    a1, b1, b2 = world["groups"]
+    first = _create(world, student=0, group=2)
+    first_sibling = _create(world, student=0, group=1)
+    second = _create(world, student=1, group=1)
+    second_sibling = _create(world, student=1, group=2)
+    service = ORMTransferService()
+
+    async def approve_both():
+        # одиночное и пакетное одобрение меняют статусы в разном порядке
+        return await asyncio.gather(
+            service.approve_transfer(transfer_id=first, manager_id=1),
+            service.approve_transfers([second], manager_id=1),
+        )
+
+    single, batch = run(approve_both())
+
+    assert single["rejected_transfer_ids"] == [first_sibling]
+    assert batch[0].success
+    transfers = run(_transfers())
+    assert transfers[second_sibling][0] == TransferStatus.rejected
+    counters = run(service.get_transfer_counters())
+    assert counters["total"][TransferStatus.approved.value] == 2
+    assert counters["total"][TransferStatus.rejected.value] == 2
+    assert counters["total"][TransferStatus.draft.value] == 0
+
+    # свёртка дельт не меняет итоговых чисел
+    assert run(service.fold_counters()) > 0
+    assert run(service.fold_counters()) == 0
+    assert run(service.reconcile_counters()) == 0
+
+
+def test_install_transfer_counters_is_idempotent(database):
+    async def install():
+        async with engine.begin() as conn:
+            return await install_transfer_counters(conn)
+
+    assert run(install()) is False